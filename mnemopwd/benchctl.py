@@ -0,0 +1,135 @@
+# coding: utf-8
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Load generation tool: run synthetic clients against a server and report
+the throughput and the latency percentiles per protocol state.
+
+Examples:
+    mnemopwd-bench --spawn --clients 1000 --mix mixed --json v1.json
+    mnemopwd-bench --host 10.0.0.2 --cert server.pem --compare v1.json
+"""
+
+import argparse
+import asyncio
+
+from .test.benchmark import loadgen
+from .test.benchmark.aioclient import client_context
+from .test.benchmark.benchserver import BenchServer
+
+try:
+    import resource
+except ImportError:  # Not a POSIX system
+    resource = None
+
+
+def raise_open_files_limit():
+    """Allow as many connections as possible"""
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    """Main function"""
+    argparser = argparse.ArgumentParser(
+        description='MnemoPwd load generation benchmark',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    argparser.add_argument('--host', default='127.0.0.1',
+                           help='the IP address of the server')
+    argparser.add_argument('--port', type=int, default=62231,
+                           help='the server connexion port')
+    argparser.add_argument('--cert', default=None, metavar='certificate',
+                           help='the PEM X509 certificate of the server '
+                                '(anonymous TLS if not given)')
+    argparser.add_argument('--spawn', action='store_true',
+                           help='start a local server with a temporary '
+                                'database for the benchmark')
+    argparser.add_argument('--poolsize', type=int, default=10,
+                           help='the size of the pool of execution of the '
+                                'spawned server')
+    argparser.add_argument('--clients', type=int, default=100,
+                           help='number of concurrent synthetic clients')
+    argparser.add_argument('--ramp', type=int, default=50,
+                           help='number of clients set up simultaneously')
+    argparser.add_argument('--mix', default='mixed',
+                           help="the scenario mix: {} or a list like "
+                                "'login=1,add=3,search=4'"
+                           .format(', '.join(sorted(loadgen.SCENARIOS))))
+    argparser.add_argument('--duration', type=float, default=30.0,
+                           help='duration of the measure in seconds')
+    argparser.add_argument('--operations', type=int, default=0,
+                           help='maximum number of operations per client '
+                                '(0 for no limit)')
+    argparser.add_argument('--sibs', type=int, default=10,
+                           help='number of blocks added by each client '
+                                'before the measure')
+    argparser.add_argument('--size', type=int, default=64,
+                           help='size of the secret information of a block')
+    argparser.add_argument('--curve', default='sect571r1',
+                           help='the curve of the client configuration')
+    argparser.add_argument('--cipher', default='aes-256-cbc',
+                           help='the cipher of the client configuration')
+    argparser.add_argument('--seed', type=int, default=0,
+                           help='the seed of the account names and of the '
+                                'operation draws')
+    argparser.add_argument('--json', default=None, metavar='file',
+                           help='export the results in a JSON file')
+    argparser.add_argument('--compare', default=None, metavar='file',
+                           help='compare with results exported before')
+    options = argparser.parse_args()
+    try:
+        loadgen.parse_mix(options.mix)
+    except ValueError as exc:
+        argparser.error(str(exc))
+
+    raise_open_files_limit()
+    previous = loadgen.load(options.compare) if options.compare else None
+    server = None
+    if options.spawn:
+        # No admission limit: all the clients come from the same IP
+        server = BenchServer(options.host, options.port,
+                             poolsize=options.poolsize, max_sessions=0,
+                             max_ip_sessions=0, max_queue=0,
+                             idle_timeout=0).start()
+    loop = asyncio.get_event_loop()
+    try:
+        results = loop.run_until_complete(loadgen.run(
+            options, client_context(options.cert), loop))
+    finally:
+        loop.close()
+        if server is not None:
+            server.stop()
+
+    print(loadgen.report(results, previous))
+    if options.json is not None:
+        loadgen.save(results, options.json)
+
+
+if __name__ == '__main__':
+    main()
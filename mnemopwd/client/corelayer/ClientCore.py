@@ -37,8 +37,12 @@ import json
 
 from ..util.Configuration import Configuration
 from ..util.funcutils import Subject
+from ...common.util.LoopPolicy import set_loop_policy
+from ...common.util.Profiler import Profiler
 from .protocol.ProtocolHandler import ProtocolHandler
+from .ResumableSSLContext import ResumableSSLContext
 from ...common.SecretInfoBlock import SecretInfoBlock
+from ...common.KeyHandler import KeyHandler
 
 """
 Client part of MnemoPwd application.
@@ -55,12 +59,24 @@ class ClientCore(Subject):
     - transport: a SSL/TLS asynchronous socket (see the official ssl module)
     - protocol: a communication handler (see the official asyncio module)
     - table: table of blocks (a dictionary)
+    - vault: login, master secret and key handler kept while unlocked
+    - resumption: future of the session resumption in progress (or None)
+
+    A connection lost while the vault is unlocked is resumed in background:
+    the client reconnects with an exponential backoff, replays the handshake
+    without deriving the master secret again then replays the interrupted
+    task. An addition or a deletion possibly executed by the server before
+    the loss is replayed only if the blocks got again from the server show
+    it was not. The tasks waiting in the queue are executed after the
+    resumption.
 
     Method(s):
     - start: start the domain layer
     - stop: close the domain loop
     - command: execute a command coming from the UI layer
     - close: close the connection
+    - resume: start a session resumption after a disconnection
+    - is_resuming: test if a connection is a resumption attempt
     """
 
     # Internal methods
@@ -69,12 +85,8 @@ class ClientCore(Subject):
         """Initialization"""
         Subject.__init__(self)
 
-        # Create an i/o asynchronous loop
-        self.loop = asyncio.get_event_loop()
-
         # Set logging configuration
         if Configuration.loglevel is not None:
-            self.loop.set_debug(Configuration.loglevel == 'DEBUG')
             logging.basicConfig(filename="client.log",
                                 level=Configuration.loglevel,
                                 format='%(asctime)s %(levelname)s %(message)s',
@@ -82,6 +94,11 @@ class ClientCore(Subject):
         else:
             logging.basicConfig(filename=os.devnull)
 
+        # Create an i/o asynchronous loop
+        set_loop_policy(Configuration.looppolicy)
+        self.loop = asyncio.get_event_loop()
+        self.loop.set_debug(Configuration.loglevel == 'DEBUG')
+
         # Create a task queue
         self.queue = asyncio.Queue(
             maxsize=Configuration.queuesize, loop=self.loop)
@@ -93,13 +110,29 @@ class ClientCore(Subject):
         self.last_block = None  # The last block used
         self.last_index = None  # The last index used
         self.notify = True  # Flag for UI layer notification or not
+        self.vault = None  # Secrets kept for a session resumption
+        self.resumption = None  # Future of a session resumption
+        self.interrupted = False  # Flag set when a task is interrupted
 
         # Create and set an executor
         executor = concurrent.futures.ThreadPoolExecutor(Configuration.poolsize)
         self.loop.set_default_executor(executor)
 
+        # Create an executor sharing the fields of a block between threads
+        if Configuration.cryptopoolsize > 0:
+            KeyHandler.executor = concurrent.futures.ThreadPoolExecutor(
+                Configuration.cryptopoolsize)
+
+        # Create a profiler of protocol states
+        self.profiler = None
+        if Configuration.profile:
+            self.profiler = Profiler(Configuration.profile_threshold,
+                                     Configuration.profile_sample,
+                                     Configuration.profile_memory == 1)
+
         # Create a SSL context
-        self.context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        self.context = ResumableSSLContext(ssl.PROTOCOL_SSLv23)
+        self.context.resume = Configuration.tlsresume == 1  # Reuse session
         self.context.options |= ssl.OP_NO_SSLv2  # SSL v2 not allowed
         self.context.options |= ssl.OP_NO_SSLv3  # SSL v3 not allowed
         # Server certificate is optional
@@ -112,8 +145,9 @@ class ClientCore(Subject):
         else:
             self.context.set_ciphers("AECDH-AES256-SHA")  # Cipher suite to use
 
-        # Transport handler
+        # Transport and protocol handlers
         self.transport = None
+        self.protocol = None
 
         if Configuration.action == 'status':
             self._open()  # Try to open a connection to server
@@ -192,6 +226,79 @@ class ClientCore(Subject):
                 else:
                     raise
 
+    @asyncio.coroutine
+    def _wait_resumption(self):
+        """Wait for the end of the session resumption if any"""
+        if self.resumption is not None:
+            yield from asyncio.shield(self.resumption, loop=self.loop)
+
+    @asyncio.coroutine
+    def _execute(self, state, data, search=False, committed=None):
+        """Execute a protocol state then wait for the end of the task. The
+        state is executed again if the connection is lost in the meantime
+        and the session is resumed, unless the co-routine 'committed' finds
+        the request was executed by the server before the loss"""
+        while True:
+            yield from self._wait_resumption()
+            if search:
+                self.searchTable = list()  # Reset search table
+            self.protocol.state = self.protocol.states[state]
+            self.interrupted = False
+            self.taskInProgress = True
+            yield from self.loop.run_in_executor(
+                None, self.protocol.data_received, data)
+            # Waiting for the end of the task
+            while self.taskInProgress:
+                yield from asyncio.sleep(0.01, loop=self.loop)
+            if not self.interrupted:
+                break
+            if committed is not None:
+                yield from self._wait_resumption()
+                if (yield from committed()):
+                    break
+
+    @asyncio.coroutine
+    def _resync(self):
+        """Get all blocks from the server without notifying the UI layer.
+        Return a dictionary index -> block"""
+        notify, searchTable = self.notify, getattr(self, 'searchTable', [])
+        self.notify = False
+        try:
+            yield from self._execute('32R', None, search=True)  # Export
+            return {index: self.table[index] for index in self.searchTable}
+        finally:
+            self.notify, self.searchTable = notify, searchTable
+
+    @staticmethod
+    def _same_block(sib1, sib2):
+        """Test if two blocks have the same encrypted information"""
+        if sib1.nbInfo != sib2.nbInfo:
+            return False
+        for number in range(1, sib1.nbInfo + 1):
+            try:
+                if sib1.get_info(number) != sib2.get_info(number):
+                    return False
+            except KeyError:
+                return False
+        return True
+
+    @asyncio.coroutine
+    def _added(self, sib):
+        """Test if an interrupted addition was executed by the server (its
+        index is then the last index)"""
+        blocks = yield from self._resync()
+        for index, block in blocks.items():
+            if self._same_block(block, sib):
+                self.last_index = index
+                return True
+        return False
+
+    @asyncio.coroutine
+    def _deleted(self, idblock):
+        """Test if an interrupted deletion was executed by the server"""
+        blocks = yield from self._resync()
+        return idblock not in blocks
+
     @asyncio.coroutine
     def _task_set_credentials(self, login, password):
         """Store credentials, start S1 then wait for the end of the task"""
@@ -216,16 +323,22 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_close(self):
         """Close the connection with the server"""
+        yield from self._wait_resumption()
+        self.vault = None  # Lock the vault
         yield from self.loop.run_in_executor(
             None, self.update, 'connection.state.logout', 'Connection closed')
         self.taskInProgress = False
         self.task = None
-        self.transport.close()
-        self.transport = None
+        if self.transport is not None:
+            self.context.store(self.transport.get_extra_info('ssl_object'))
+            self.transport.close()
+            self.transport = None
 
     @asyncio.coroutine
     def _task_deletion(self):
         """User account deletion request"""
+        yield from self._wait_resumption()
+        self.vault = None  # A deletion is never replayed
         self.protocol.state = self.protocol.states['33R']  # Deletion
         # Execute protocol state
         self.taskInProgress = True
@@ -237,20 +350,13 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_add_data(self, sib, notify=True):
         """Add a new block"""
-        self.protocol.state = self.protocol.states['35R']  # Add a new block
-
         # Remember the block
         self.last_block = sib
 
         # Execute protocol state
         self.notify = notify
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, sib)
-
-        # Waiting for the end of the task
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('35R', sib,  # Add a new block
+                                 committed=lambda: self._added(sib))
         self.notify = True
 
         # Assign new block
@@ -259,20 +365,12 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_update_data(self, idblock, sib, notify=True):
         """Update an existing block"""
-        self.protocol.state = self.protocol.states['37R']  # Update a block
-
         # Remember the block
         self.last_block = sib
 
         # Execute protocol state
         self.notify = notify
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, (idblock, sib))
-
-        # Waiting for the end of the task
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('37R', (idblock, sib))  # Update a block
         self.notify = True
 
         # Assign updated block
@@ -281,14 +379,9 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_delete_data(self, idblock):
         """Delete an existing block"""
-        self.protocol.state = self.protocol.states['36R']  # Delete
         # Execute protocol state
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, idblock)
-        # Waiting for the end of the task
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('36R', idblock,  # Delete
+                                 committed=lambda: self._deleted(idblock))
         # Remove block
         del self.table[idblock]
         # Notify the result to UI layer
@@ -298,14 +391,8 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_search_data(self, pattern):
         """Search blocks matching a pattern"""
-        self.protocol.state = self.protocol.states['34R']  # Search
-        self.searchTable = list()  # Reset search table
         # Execute protocol state
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, pattern)
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('34R', pattern, search=True)  # Search
         # Notify the result to the UI layer
         if len(self.searchTable) > 0:
             yield from self.loop.run_in_executor(
@@ -315,15 +402,9 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_export_data(self, notify=True):
         """Get all blocks"""
-        self.protocol.state = self.protocol.states['32R']  # Export
-        self.searchTable = list()  # Reset search table
         # Execute protocol state
         self.notify = notify
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, None)
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('32R', None, search=True)  # Export
         self.notify = True
         # Notify the result to UI layer
         if len(self.searchTable) > 0 and notify:
@@ -334,17 +415,10 @@ class ClientCore(Subject):
     @asyncio.coroutine
     def _task_import_data(self, sib, notify=False):
         """Add some SIBs"""
-        self.protocol.state = self.protocol.states['35R']  # Add a new block
-
         # Execute protocol state
         self.notify = notify
-        self.taskInProgress = True
-        yield from self.loop.run_in_executor(
-            None, self.protocol.data_received, sib)
-
-        # Waiting for the end of the task
-        while self.taskInProgress:
-            yield from asyncio.sleep(0.01, loop=self.loop)
+        yield from self._execute('35R', sib,  # Add a new block
+                                 committed=lambda: self._added(sib))
         self.notify = True
 
         # Assign new block
@@ -521,6 +595,7 @@ class ClientCore(Subject):
     def close(self):
         """Cancel the actual task, empty the queue and close the connection"""
         self.taskInProgress = False
+        self.vault = None  # Lock the vault
 
         # Cancel the actual task if it exists
         if self.task is not None:
@@ -532,9 +607,90 @@ class ClientCore(Subject):
 
         # Close the transport if not already closed
         if self.transport is not None:
+            self.context.store(self.transport.get_extra_info('ssl_object'))
             self.transport.close()
             self.transport = None
 
+    def is_resuming(self, protocol):
+        """Test if protocol handles a resumption attempt (in the loop)"""
+        return self.resumption is not None and protocol is self.protocol
+
+    def resume(self, protocol):
+        """Start the resumption of the session after the loss of the
+        connection of protocol (in the loop). Return False if the session
+        can not be resumed"""
+        if self.is_resuming(protocol):
+            # A resumption attempt failed
+            self.transport = None
+            self.taskInProgress = False
+            return True
+
+        if protocol is not self.protocol or self.transport is None or \
+                self.vault is None or Configuration.sessionresume != 1:
+            return False  # Closed on purpose or vault locked
+
+        # Release the interrupted task then resume in background
+        self.transport = None
+        self.interrupted = True
+        self.taskInProgress = False
+        self.resumption = asyncio.Future(loop=self.loop)
+        asyncio.ensure_future(self._resume(), loop=self.loop)
+        return True
+
+    @asyncio.coroutine
+    def _resume(self):
+        """Reconnect with an exponential backoff then replay the handshake
+        with the master secret and the key handler kept in the vault"""
+        login, ms, keyH = self.vault
+        delay = Configuration.resume_delay
+        for attempt in range(1, Configuration.resume_attempts + 1):
+            yield from self.loop.run_in_executor(
+                None, self.update, 'connection.state',
+                'Connection lost: reconnection in {:.0f}s ({}/{})'.format(
+                    delay, attempt, Configuration.resume_attempts))
+            yield from asyncio.sleep(delay, loop=self.loop)
+            delay = min(delay * 2, Configuration.resume_maxdelay)
+
+            # Try to open a new SSL socket
+            coro = self.loop.create_connection(
+                lambda: ProtocolHandler(self), Configuration.server,
+                Configuration.port, family=socket.AF_INET, ssl=self.context)
+            try:
+                self.transport, self.protocol = yield from asyncio.wait_for(
+                    coro, Configuration.timeout, loop=self.loop)
+            except (OSError, asyncio.TimeoutError):
+                continue
+
+            # Replay the handshake (S0 to S31) without the KDF
+            self.protocol.login, self.protocol.ms = login, ms
+            self.protocol.keyH = keyH
+            self.taskInProgress = True
+            while self.protocol.state != self.protocol.states['1S'] \
+                    and self.taskInProgress:
+                yield from asyncio.sleep(0.01, loop=self.loop)
+            if self.taskInProgress:
+                yield from self.loop.run_in_executor(
+                    None, self.protocol.data_received, None)
+                deadline = self.loop.time() + Configuration.timeout_task
+                while self.taskInProgress and self.loop.time() < deadline:
+                    yield from asyncio.sleep(0.01, loop=self.loop)
+                if self.taskInProgress:
+                    self.transport.close()  # The handshake is too long
+                    self.taskInProgress = False
+
+            if self.transport is not None and not self.transport.is_closing():
+                # Session resumed: replay the interrupted task
+                self.resumption.set_result(True)
+                self.resumption = None
+                return
+
+        # Give up: close the session
+        resumption, self.resumption = self.resumption, None
+        yield from self.loop.run_in_executor(
+            None, self.update, 'connection.state.error', 'Connection lost')
+        yield from self.close()
+        resumption.set_result(False)
+
     def start(self):
         """Start the main loop"""
         # Command loop
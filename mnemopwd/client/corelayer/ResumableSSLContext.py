@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+SSL context able to resume the last TLS session
+"""
+
+import ssl
+
+
+class ResumableSSLContext(ssl.SSLContext):
+    """
+    A client SSL context which offers the last TLS session to the server
+    so a reconnection avoids a full handshake (Python 3.6 or later).
+
+    Attribute(s):
+    - tls_session: the last TLS session stored (or None)
+    - resume: flag to offer the stored session or not
+
+    Method(s):
+    - store: store the TLS session of a SSL object
+    - wrap_bio: see mother class
+    """
+
+    tls_session = None
+    resume = True
+
+    def store(self, ssl_object):
+        """Store the TLS session of a SSL object (if any)"""
+        session = getattr(ssl_object, 'session', None)
+        if self.resume and session is not None:
+            self.tls_session = session
+
+    def wrap_bio(self, incoming, outgoing, server_side=False,
+                 server_hostname=None, session=None):
+        """See mother class"""
+        if session is None and not server_side:
+            session = self.tls_session
+        if session is None:
+            return super().wrap_bio(incoming, outgoing, server_side,
+                                    server_hostname)
+        return super().wrap_bio(incoming, outgoing, server_side,
+                                server_hostname, session=session)
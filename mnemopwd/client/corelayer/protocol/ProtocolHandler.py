@@ -27,6 +27,7 @@
 
 import asyncio
 import threading
+import logging
 
 from . import *
 from ...util.Configuration import Configuration
@@ -54,15 +55,16 @@ class ProtocolHandler(asyncio.Protocol):
     - password: the client password (set by the UI)
     - login: the client login (set by the UI)
     - ephecc: the ephemeral server public key (set by S0 state)
-    - ms: the client master secret (set by S1S state)
+    - ms: the client master secret (set by S1S state or kept by ClientCore)
     - session: the client session number (set by S1CR state)
-    - keyH: the client key handler (set by S31A state)
+    - keyH: the client key handler (set by S31A state or kept by ClientCore)
 
     Method(s):
     - connection_made: method called when the connection with the server is made
     - data_received: method called each time a new data is received
     - connection_lost: method called when the connection is lost or closed
     - exception_handler: method called when an exception is raised by a state
+    - execute: execute a state
     - notify: notify ClientCore a property has changed
     """
 
@@ -71,6 +73,7 @@ class ProtocolHandler(asyncio.Protocol):
         self.core = core
         self.loop = core.loop
         self.password = self.login = 'None'
+        self.ms = self.keyH = None  # Set by ClientCore on a resumption
         # The protocol states
         self.states = {'0': StateS0(),
                        '1S': StateS1S(), '1CR': StateS1CR(), '1CA': StateS1CA(),
@@ -97,16 +100,32 @@ class ProtocolHandler(asyncio.Protocol):
         self.transport = transport
         self.peername = transport.get_extra_info('peername')
         self.state = self.states['0']  # State 0 at the beginning
+        # Store the TLS session for a future resumption
+        ssl_object = transport.get_extra_info('ssl_object')
+        if ssl_object is not None:
+            self.core.context.store(ssl_object)
+            logging.debug('TLS session reused: {}'.format(
+                getattr(ssl_object, 'session_reused', None)))
 
     def data_received(self, data):
         """See mother class"""
         # Wait for actual execution before scheduling a new execution
         with self.lock:
-            self.loop.run_in_executor(None, self.state.do, self,
+            self.loop.run_in_executor(None, self.execute, self.state,
                                       data)  # Future execution
 
+    def execute(self, state, data):
+        """Execute a state (under the profiler if enabled)"""
+        if self.core.profiler is not None:
+            self.core.profiler.run(type(state).__name__, state.do, self, data,
+                                   account=self.login)
+        else:
+            state.do(self, data)
+
     def connection_lost(self, exc):
         """See mother class"""
+        if self.core.resume(self):
+            return  # The session is resumed on a new connection
         if exc:
             self.loop.run_in_executor(None, self.notify,
                                       'connection.state.error',
@@ -119,6 +138,12 @@ class ProtocolHandler(asyncio.Protocol):
 
     def exception_handler(self, exc):
         """Exception handler for actions executed by the executor"""
+        if self is not self.core.protocol:
+            return  # Error of a connection already replaced
+        if self.core.is_resuming(self):
+            # A resumption attempt failed: the next one uses a new connection
+            self.transport.close()
+            return
         self.loop.run_in_executor(None, self.notify, 'connection.state.error',
                                   str(exc).capitalize()[:50] + '...')
         asyncio.run_coroutine_threadsafe(self.core.close(), self.loop)
@@ -42,6 +42,11 @@ class StateS0:
         """Action of the state S0: get the ephemeral server public key"""
         with handler.lock:
             try:
+                # Test if the server refuses the connection
+                is_KO = data[:5] == b"ERROR"
+                if is_KO:
+                    raise Exception(data[6:].decode())
+
                 # Test for S1C command
                 is_cd_S0C = data[:10] == b"KEYSHARING"
                 if not is_cd_S0C:
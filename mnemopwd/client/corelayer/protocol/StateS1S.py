@@ -45,8 +45,11 @@ class StateS1S:
         """Action of the state S1S: send the master secret"""
         with handler.lock:
             try:
-                # Compute the master secret
-                salt, ms = pbkdf2(handler.password, salt=handler.login, hfunc='SHA1')
+                # Compute the master secret (kept on a session resumption)
+                ms = handler.ms
+                if ms is None:
+                    salt, ms = pbkdf2(handler.password, salt=handler.login,
+                                      hfunc='SHA1')
                 ems = handler.ephecc.encrypt(ms, pubkey=handler.ephecc.get_pubkey())
 
                 # Compute the session number
@@ -58,12 +58,19 @@ class StateS31A(StateSCC):
                     else:
                         raise Exception("S31 protocol error")
 
-                    # Create the client KeyHandler
-                    cypher_suite = handler.config.split(';')
-                    handler.keyH = KeyHandler(
-                        handler.ms, cur1=cypher_suite[0], cip1=cypher_suite[1],
-                        cur2=cypher_suite[2], cip2=cypher_suite[3],
-                        cur3=cypher_suite[4], cip3=cypher_suite[5])
+                    # Create the client KeyHandler (kept on a session
+                    # resumption because the configuration is unchanged)
+                    if handler.keyH is None:
+                        cypher_suite = handler.config.split(';')
+                        handler.keyH = KeyHandler(
+                            handler.ms, cur1=cypher_suite[0],
+                            cip1=cypher_suite[1], cur2=cypher_suite[2],
+                            cip2=cypher_suite[3], cur3=cypher_suite[4],
+                            cip3=cypher_suite[5])
+
+                    # Keep the secrets while the vault is unlocked
+                    handler.core.vault = (handler.login, handler.ms,
+                                          handler.keyH)
 
                     # Task is ended
                     handler.core.taskInProgress = False
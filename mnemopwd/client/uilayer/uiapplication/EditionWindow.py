@@ -202,24 +202,18 @@ class EditionWindow(TitledOnBorderWindow):
 
     def _try_create_sib(self):
         """Try to create or update an information block"""
-        complete = True
-        sib = SecretInfoBlock(self.keyH)
-        # Add number_type for restoring purpose
-        sib['info1'] = (str(self.number_type)).encode()
-        # Add the block type name
-        sib.nbInfo += 1
-        sib['info2'] = self.cpb[self.number_type][1]["c_object"].label
+        # Add number_type for restoring purpose and the block type name
+        values = [(str(self.number_type)).encode(),
+                  self.cpb[self.number_type][1]["c_object"].label]
         for index, item in enumerate(self.items):
             if item.is_editable():
                 if not item.option and item.value is None:
                     self.index = index
-                    complete = False
-                    sib = None
-                    break
+                    return False, None
                 if item.value is not None:
-                    sib.nbInfo += 1
-                    sib['info' + str(sib.nbInfo)] = item.value.encode()
-        return complete, sib
+                    values.append(item.value.encode())
+        # Encrypt all the fields at once
+        return True, SecretInfoBlock.from_values(self.keyH, values)
 
     def start(self, timeout=-1):
         """See mother class"""
@@ -87,14 +87,25 @@ class Configuration:
     loglevel = None          # Logging level: None or 'DEBUG'
     poolsize = 1             # Pool executor size
     queuesize = 25           # Queue size: up to 25 commands can be scheduled
+    cryptopoolsize = 4       # Threads sharing the fields of a block (0: none)
     curve1 = 'sect571r1'     # Curve name for the first stage
     cipher1 = 'aes-256-cbc'  # Cipher name for the first stage
     curve2 = 'None'          # Curve name for the second stage
     cipher2 = 'None'         # Cipher name for the second stage
     curve3 = 'None'          # Curve name for the third stage
     cipher3 = 'None'         # Cipher name for the third stage
+    looppolicy = 'default'   # Event loop policy: 'default' or 'uvloop'
+    profile = 0              # Profile protocol states (0: disabled)
+    profile_threshold = 1.0  # Duration of a slow operation (seconds)
+    profile_sample = 0       # cProfile sampling (one state every N; 0: none)
+    profile_memory = 0       # Measure memory allocations (0: disabled)
     action = 'start'         # Default action if not given
     timeout = 5              # Timeout on connection request
+    tlsresume = 1            # Resume the last TLS session on reconnection
+    sessionresume = 1        # Resume the session after a disconnection
+    resume_delay = 1.0       # First delay before a reconnection (seconds)
+    resume_maxdelay = 30.0   # Maximum delay between two reconnections
+    resume_attempts = 8      # Reconnections before closing the session
     timeout_task = 300       # Timeout on task execution
     lock = 1                 # Time before lock screen (1 minute)
     colour = 0               # Not use colors by default (ANSI/VT100 colours)
@@ -153,6 +164,31 @@ class Configuration:
             except KeyError:
                 is_incomplete = True
 
+            try:
+                Configuration.tlsresume = int(fileparser['server']['tlsresume'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.sessionresume = int(fileparser['server']['sessionresume'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.resume_delay = float(fileparser['server']['resume_delay'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.resume_maxdelay = float(fileparser['server']['resume_maxdelay'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.resume_attempts = int(fileparser['server']['resume_attempts'])
+            except KeyError:
+                is_incomplete = True
+
             try:
                 Configuration.curve1 = is_none(fileparser['client']['curve1'])
             except KeyError:
@@ -183,6 +219,36 @@ class Configuration:
             except KeyError:
                 is_incomplete = True
 
+            try:
+                Configuration.cryptopoolsize = int(fileparser['client']['cryptopoolsize'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.looppolicy = fileparser['client']['looppolicy']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile = int(fileparser['client']['profile'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_threshold = float(fileparser['client']['profile_threshold'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_sample = int(fileparser['client']['profile_sample'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_memory = int(fileparser['client']['profile_memory'])
+            except KeyError:
+                is_incomplete = True
+
             try:
                 Configuration.lock = int(fileparser['ui']['lock'])
             except KeyError:
@@ -238,21 +304,43 @@ class Configuration:
             'certfile': Configuration.certfile +
                         " # Use an absolute path",
             'timeout': str(Configuration.timeout) +
-                       " # Timeout of the connection request"
+                       " # Timeout of the connection request",
+            'tlsresume': str(Configuration.tlsresume) +
+                         " # Resume the last TLS session (1) or not (0)",
+            'sessionresume': str(Configuration.sessionresume) +
+                             " # Reconnect and resume the session after a disconnection (1) or not (0)",
+            'resume_delay': str(Configuration.resume_delay) +
+                            " # Delay before the first reconnection (doubled on each attempt)",
+            'resume_maxdelay': str(Configuration.resume_maxdelay) +
+                               " # Maximum delay between two reconnections",
+            'resume_attempts': str(Configuration.resume_attempts) +
+                               " # Reconnections before closing the session"
         }
         fileparser['client'] = {
             'curve1': Configuration.curve1 +
                       " # Values allowed: secp521r1, sect571r1, secp384r1, etc.",
             'cipher1': Configuration.cipher1 +
-                       " # Values allowed: aes-128-cbc, aes-256-cbc, etc.",
+                       " # Values allowed: aes-128-cbc, aes-256-cbc, aes-256-gcm, etc.",
             'curve2': Configuration.curve2 +
                       " # Values allowed: None, secp521r1, sect571r1, secp384r1, etc.",
             'cipher2': Configuration.cipher2 +
-                       " # Values allowed: None, aes-128-cbc, aes-256-cbc, etc.",
+                       " # Values allowed: None, aes-128-cbc, aes-256-cbc, aes-256-gcm, etc.",
             'curve3': Configuration.curve3 +
                       " # Values allowed: None, secp521r1, sect571r1, secp384r1, etc.",
             'cipher3': Configuration.cipher3 +
-                       " # Values allowed: None, aes-128-cbc, aes-256-cbc, etc."
+                       " # Values allowed: None, aes-128-cbc, aes-256-cbc, aes-256-gcm, etc.",
+            'cryptopoolsize': str(Configuration.cryptopoolsize) +
+                              " # Threads encrypting the fields of a block (0 for none)",
+            'looppolicy': Configuration.looppolicy +
+                          " # Values allowed: default, uvloop",
+            'profile': str(Configuration.profile) +
+                       " # Profile protocol states (1) or not (0)",
+            'profile_threshold': str(Configuration.profile_threshold) +
+                                 " # Log operations longer than this number of seconds",
+            'profile_sample': str(Configuration.profile_sample) +
+                              " # Run one state every N under cProfile (0 for never)",
+            'profile_memory': str(Configuration.profile_memory) +
+                              " # Measure memory allocations (1) or not (0)"
         }
         fileparser['ui'] = {
             'lock': str(Configuration.lock) +
@@ -27,11 +27,43 @@
 
 """
 The class InfoBlock stores information.
+
+The information are stored in a list (the information 'infoX' is at the
+position X - 1). The dictionary of the first versions ({'infoX': value})
+is still used by the pickle format and by the 'infos' property.
 """
 
 import logging
 import re
 
+from collections.abc import MutableMapping
+
+
+class _Infos(MutableMapping):
+    """Dictionary view {"infoX": value} of the information of an InfoBlock"""
+
+    __slots__ = ('_block',)
+
+    def __init__(self, block):
+        self._block = block
+
+    def __getitem__(self, index):
+        return self._block.get_info(self._block._verify_index_(index))
+
+    def __setitem__(self, index, value):
+        self._block.set_info(self._block._verify_index_(index), value)
+
+    def __delitem__(self, index):
+        self._block.del_info(self._block._verify_index_(index))
+
+    def __iter__(self):
+        for number, value in enumerate(self._block._fields, start=1):
+            if value is not None:
+                yield 'info' + str(number)
+
+    def __len__(self):
+        return len(self._block)
+
 
 class InfoBlock:
     """
@@ -43,18 +75,23 @@ class InfoBlock:
     - nbInfo : integer indicating the maximum of secret information stored
     
     Attribute(s):
-    - _infos : do not directly access to this attribute but use infos property
-    - _nbInfo : do not directly access to this attribute but use nbInfo property
+    - _fields : do not directly access to this attribute but use infos
+                property or get_info, set_info and del_info methods
+                (None for an information not stored)
     
-    Method(s): none
+    Method(s):
+    - get_info: return the information X (an integer)
+    - set_info: store the information X (an integer)
+    - del_info: delete the information X (an integer)
     
     """
 
+    __slots__ = ('_fields',)
+
     def __init__(self, nbInfo=1):
         """Object initialization.
         By default, the number of secret information is set to one."""
-        self._infos = {}        # Empty dict
-        self._nbInfo = nbInfo   # Number of secret information
+        self._fields = [None] * nbInfo  # No information stored
 
     # Properties
     # ----------
@@ -64,7 +101,7 @@ class InfoBlock:
     @property
     def infos(self):
         """Return the dictionary"""
-        return self._infos
+        return _Infos(self)
     
     @infos.setter
     def infos(self, value):
@@ -81,7 +118,7 @@ class InfoBlock:
     @property
     def nbInfo(self):
         """Getter method of the nbInfo property"""
-        return self._nbInfo
+        return len(self._fields)
 
     @nbInfo.setter
     def nbInfo(self, nbInfo):
@@ -92,16 +129,18 @@ class InfoBlock:
         if not it raises AssertionError exception"""
         # Verify the validity of the parameter
         assert isinstance(nbInfo, int) and nbInfo > 0
-        if nbInfo < self._nbInfo:
+        if nbInfo != len(self._fields):
+            self._modified_()
+        if nbInfo < len(self._fields):
             logging.critical(
                 "InfoBlock: size decreased (%s/%s). Next information deleted :",
-                nbInfo, self._nbInfo)
-        while nbInfo < self._nbInfo:
-            infoX = "info" + str(self._nbInfo) 
-            logging.critical("%s : %s", infoX, self._infos[infoX])
-            del self._infos[infoX]  # Delete entry with key > nbInfo
-            self._nbInfo -= 1
-        self._nbInfo = nbInfo   # Change the number of information
+                nbInfo, len(self._fields))
+            for number in range(nbInfo + 1, len(self._fields) + 1):
+                logging.critical("%s : %s", "info" + str(number),
+                                 self._fields[number - 1])
+            del self._fields[nbInfo:]  # Delete entries with key > nbInfo
+        else:
+            self._fields.extend([None] * (nbInfo - len(self._fields)))
         
     @nbInfo.deleter
     def nbInfo(self):
@@ -112,41 +151,79 @@ class InfoBlock:
     # --------------
     
     def __getstate__(self):
-        """Returns the object's state"""
-        return self.__dict__
+        """Returns the object's state (with the dictionary of the first
+        versions)"""
+        return {'_infos': dict(self.infos), '_nbInfo': self.nbInfo}
     
     def __setstate__(self, state):
         """Restores the object's state"""
-        self.__dict__.update(state)
+        self._fields = [None] * state['_nbInfo']
+        for index, value in state['_infos'].items():
+            self._fields[self._verify_index_(index) - 1] = value
 
     def _verify_index_(self, index):
-        """Verifies if the index parameter is a valid index format"""
+        """Verifies if the index parameter is a valid index format.
+        Returns the number of the information"""
         if not isinstance(index, str):
             logging.error("InfoBlock: index parameter %s must be a string",
                           str(index))
             raise TypeError("index parameter must be a string")
-        index_regex = "^info[1-" + str(self.nbInfo) + "]$"
-        if re.search(index_regex, index) is None:
+        number = index[4:]
+        # ASCII digits only (isdecimal accepts other scripts)
+        if index[:4] != 'info' or \
+                re.fullmatch('[1-9][0-9]*', number) is None or \
+                int(number) > len(self._fields):
             logging.error("InfoBlock: index parameter %s is not correct", index)
             raise KeyError("index parameter is not correct")
+        return int(number)
+
+    def _modified_(self):
+        """Method called when the information are modified"""
+        pass
+
+    def _verify_number_(self, number):
+        """Verifies if the number of an information is valid"""
+        if not 0 < number <= len(self._fields):
+            logging.error("InfoBlock: number %s is not correct", number)
+            raise KeyError("number of information is not correct")
+
+    def get_info(self, number):
+        """Returns the information number if it exists and it is valid
+        otherwise raises a KeyError exception"""
+        self._verify_number_(number)
+        value = self._fields[number - 1]
+        if value is None:
+            raise KeyError("info" + str(number))
+        return value
+
+    def set_info(self, number, value):
+        """Stores the information number if it is valid otherwise
+        raises a KeyError exception"""
+        self._verify_number_(number)
+        self._fields[number - 1] = value
+        self._modified_()
+
+    def del_info(self, number):
+        """Deletes the information number if it exists otherwise
+        raises a KeyError exception"""
+        self.get_info(number)  # Verify if the information exists
+        self._fields[number - 1] = None
+        self._modified_()
     
     def __getitem__(self, index):
         """Returns the value corresponding to the index if it exists and
         it is valid otherwise raises a KeyError exception"""
-        self._verify_index_(index)  # Verify if the index parameter is valid
-        return self.infos[index]
+        return self.get_info(self._verify_index_(index))
     
     def __setitem__(self, index, value):
         """Stores the value at the index given if the index is valid otherwise
         raises a KeyError exception"""
-        self._verify_index_(index)  # Verify if the index parameter is valid
-        self.infos[index] = value
+        self.set_info(self._verify_index_(index), value)
 
     def __delitem__(self, index):
         """Deletes the entry corresponding to the index if it exists otherwise
         raises a KeyError exception"""
-        self._verify_index_(index)  # Verify if the index parameter is valid
-        del self.infos[index]
+        self.del_info(self._verify_index_(index))
 
     def __contains__(self, value):
         """Tests if the value exists at least in one entry.
@@ -158,24 +235,10 @@ class InfoBlock:
         return False
     
     def __len__(self):
-        """Returns the number of entries. It is always >= 0 and <= nbInfo.
-        It raises an AssertionError exception if it is not the case"""
-        size = len(self.infos)
-        condition = 0 <= size <= self.nbInfo
-        if not condition:
-            logging.critical("InfoBlock: size is not correct : %s / %s",
-                             str(size), self.nbInfo)
-        assert condition 
-        return size
+        """Returns the number of entries. It is always >= 0 and <= nbInfo"""
+        return len(self._fields) - self._fields.count(None)
 
     def __iter__(self):
         """Return an iterator"""
-        self._iter_counter = 0
-        return self
-
-    def __next__(self):
-        """Returns the next element or raises StopIteration"""
-        if self._iter_counter == self.nbInfo:
-            raise StopIteration
-        self._iter_counter += 1
-        return self['info' + str(self._iter_counter)]
+        for number in range(1, len(self._fields) + 1):
+            yield self['info' + str(number)]
@@ -43,7 +43,12 @@ class KeyHandler:
     - eccs : list of dictionaries of ECC object and cipher name
       For example, for stage one :
             eccs[0] == {'ecc':ECC_object, 'cipher':'cipher_name'}
+
+    Class attribute(s) :
+    - executor : pool of threads used by the batch methods (None for none)
     """
+
+    executor = None  # Pool of threads for encrypt_many and decrypt_many
     
     # Intern methods
     # --------------
@@ -115,3 +120,47 @@ class KeyHandler:
             return ecc.decrypt(cyphertext, ciphername=ciphername)
         else:
             return cyphertext
+
+    def encrypt_many(self, cleartexts, executor=None):
+        """Encryption of several texts through all the stages.
+        The texts are shared between the threads of the executor (by
+        default the one of the class) since OpenSSL releases the GIL"""
+        stages = []
+        for stage in range(3):
+            ecc, ciphername = self._get_ecc_(stage)
+            if ecc is not None:  # Curve id: no lookup by name for each text
+                stages.append((ecc, ecc.get_curve_id(), ciphername))
+
+        def encrypt(text):
+            for ecc, curve, ciphername in stages:
+                text = ECC.raw_encrypt(text, ecc.pubkey_x, ecc.pubkey_y,
+                                       ephemcurve=curve, ciphername=ciphername)
+            return text
+
+        return self._map_(encrypt, cleartexts, executor)
+
+    def decrypt_many(self, cyphertexts, executor=None):
+        """Decryption of several texts through all the stages (see
+        encrypt_many)"""
+        stages = []
+        for stage in (2, 1, 0):
+            ecc, ciphername = self._get_ecc_(stage)
+            if ecc is not None:
+                stages.append((ecc, ciphername))
+
+        def decrypt(text):
+            for ecc, ciphername in stages:
+                text = ecc.decrypt(text, ciphername=ciphername)
+            return text
+
+        return self._map_(decrypt, cyphertexts, executor)
+
+    @staticmethod
+    def _map_(function, texts, executor):
+        """Apply the function to the texts, in parallel if possible.
+        Return the list of the results in the same order"""
+        texts = list(texts)
+        executor = executor or KeyHandler.executor
+        if executor is None or len(texts) < 2:
+            return [function(text) for text in texts]
+        return list(executor.map(function, texts))
@@ -37,9 +37,17 @@ depends on the maximum number of secret information stored by the object.
 Global integrity is controlled by a hmac (512 bits) performed before storing and
 controlled after loading. This treatment is done by server part of
 the application.
+
+The hmac is computed on a canonical binary encoding (version 2): a header
+with the number of information then each information and the configuration
+prefixed by their length. The fingerprint is the version byte followed by
+the hmac. It is kept until the information are modified, so an unmodified
+block is pickled again without computing the hmac. The fingerprints of the
+first versions (hmac of the repr of the sorted state) are still controlled.
 """
 
 import logging
+import struct
 
 from base64 import b32decode, b32encode
 
@@ -48,6 +56,9 @@ from .KeyHandler import KeyHandler
 from ..pyelliptic import pbkdf2
 from ..pyelliptic import hash
 
+_VERSION2 = b'\x02'  # Version of the canonical binary encoding
+_MISSING = b'\xff\xff\xff\xff'  # Length prefix of a missing information
+
 
 class SecretInfoBlock(InfoBlock):
     """
@@ -58,12 +69,21 @@ class SecretInfoBlock(InfoBlock):
     
     Attribute(s):
     - keyH: a KeyHandler object (never saved)
+    - fingerprint: the integrity value restored or computed (None when
+                   the information have been modified since)
     
     Method(s):
     - control_integrity: a method used to control fingerprint value
+    - get_secret: a method to decrypt the information X (an integer)
+    - set_secret: a method to encrypt the information X (an integer)
+    - decrypt_all: a method to decrypt all the information at once
+    - set_many: a method to encrypt several information at once
+    - from_values: a class method to build a SIB from a list of information
     
     """
     
+    __slots__ = ('keyH', 'fingerprint')
+
     # Intern methods
     # --------------
 
@@ -72,7 +92,27 @@ class SecretInfoBlock(InfoBlock):
         By default, the number of secret information is set to one."""
         InfoBlock.__init__(self, nbInfo)
         self.keyH = keyH
+        self.fingerprint = None
     
+    def __canonical_parts__(self, config):
+        """Yield the canonical binary encoding of the information and of
+        the configuration (version 2)"""
+        yield b'SIB' + _VERSION2 + struct.pack('>I', self.nbInfo)
+        for value in self._fields:
+            if value is None:
+                yield _MISSING
+            else:
+                yield struct.pack('>I', len(value))
+                yield value
+        config = config.encode()
+        yield struct.pack('>I', len(config))
+        yield config
+
+    def __compute_fingerprint__(self, keyH):
+        """Return the fingerprint of the information (version 2)"""
+        return _VERSION2 + hash.hmac_sha512_parts(
+            keyH.ikey, self.__canonical_parts__(keyH.config))
+
     def __sorted_state__(self, state):
         """Return a bytes string from a sorted list of the state"""
         # Get the secret information
@@ -84,63 +124,97 @@ class SecretInfoBlock(InfoBlock):
 
     def __getstate__(self):
         """Returns the object's state after computing the integrity value"""
-        state = self.__dict__.copy()
-        del state["keyH"]  # Delete KeyHandler object reference
-        try:
-            del state["fingerprint"]  # Delete old fingerprint entry
-        except KeyError:
-            pass
-        # Compute hmac with the key handler
-        message = self.__sorted_state__(state) + self.keyH.config.encode()
-        state["fingerprint"] = hash.hmac_sha512(self.keyH.ikey, message)
+        state = InfoBlock.__getstate__(self)  # Without the KeyHandler
+        # Compute hmac with the key handler if information have been modified
+        if self.fingerprint is None:
+            self.fingerprint = self.__compute_fingerprint__(self.keyH)
+        state["fingerprint"] = self.fingerprint
         return state
     
     def __setstate__(self, state):
         """Restores the objet's state"""
-        self.__dict__.update(state)
+        InfoBlock.__setstate__(self, state)
+        self.fingerprint = state.get("fingerprint")
         
     def __getitem__(self, index):
         """Decrypt value after being restored from a block"""
-        self._verify_index_(index)  # Verify if the index parameter is valid
-        cleartext1 = self.keyH.decrypt(2, self.infos[index])
-        cleartext2 = self.keyH.decrypt(1, cleartext1)
-        cleartext = self.keyH.decrypt(0, cleartext2)
-        return cleartext
+        return self.get_secret(self._verify_index_(index))
     
     def __setitem__(self, index, value):
         """Encrypt value before being stored in a block"""
-        self._verify_index_(index)  # Verify if the index parameter is valid
-        ciphertext1 = self.keyH.encrypt(0, value)
-        ciphertext2 = self.keyH.encrypt(1, ciphertext1)
-        ciphertext = self.keyH.encrypt(2, ciphertext2)
-        self.infos[index] = ciphertext
+        self.set_secret(self._verify_index_(index), value)
+
+    def _modified_(self):
+        """The fingerprint must be computed again"""
+        self.fingerprint = None
         
     # Extern methods
     # --------------
     
     def control_integrity(self, keyH):
         """Control integrity. Must be call only once after __setstate__
-        If integrity control fails, an AssertionError is raised."""
-        state = self.__dict__
-        
-        # Store the fingerprint
-        fingerprint = state["fingerprint"]
-        
-        # Delete the fingerprint entry
-        del state["fingerprint"]
+        If integrity control fails, an AssertionError is raised.
+        The fingerprint is kept for the next pickling."""
+        fingerprint = self.fingerprint
         
         # Compute the hmac
-        message = self.__sorted_state__(state) + keyH.config.encode()
-        hmac = hash.hmac_sha512(keyH.ikey, message)
+        if fingerprint is not None and len(fingerprint) == 65 and \
+                fingerprint[:1] == _VERSION2:
+            hmac = self.__compute_fingerprint__(keyH)
+        else:
+            # Fingerprint of the first versions
+            message = self.__sorted_state__(InfoBlock.__getstate__(self)) + \
+                keyH.config.encode()
+            hmac = hash.hmac_sha512(keyH.ikey, message)
         
         # The hmac must be equal to the fingerprint 
-        condition = hash.equals(fingerprint, hmac)
+        condition = fingerprint is not None and hash.equals(fingerprint, hmac)
         if not condition:
+            self.fingerprint = None  # Never reused
             logging.critical("Intergrity checking fails on a SecretInfoBlock object")
         assert condition
         
         self.keyH = keyH  # Store the key handler
 
+    def get_secret(self, number):
+        """Decrypt the information number"""
+        cleartext1 = self.keyH.decrypt(2, self.get_info(number))
+        cleartext2 = self.keyH.decrypt(1, cleartext1)
+        cleartext = self.keyH.decrypt(0, cleartext2)
+        return cleartext
+
+    def set_secret(self, number, value):
+        """Encrypt then store the information number"""
+        self._verify_number_(number)
+        ciphertext1 = self.keyH.encrypt(0, value)
+        ciphertext2 = self.keyH.encrypt(1, ciphertext1)
+        ciphertext = self.keyH.encrypt(2, ciphertext2)
+        self.set_info(number, ciphertext)
+
+    def decrypt_all(self, executor=None):
+        """Return the list of all the information in clear text
+        ('info1' first). See KeyHandler.decrypt_many for the executor"""
+        return self.keyH.decrypt_many(
+            [self.get_info(j) for j in range(1, self.nbInfo + 1)], executor)
+
+    def set_many(self, values, executor=None):
+        """Encrypt and store several information given as a dictionary
+        {index: value}. See KeyHandler.encrypt_many for the executor"""
+        # Verify if the index parameters are valid
+        numbers = [self._verify_index_(index) for index in values]
+        ciphertexts = self.keyH.encrypt_many(list(values.values()), executor)
+        for number, ciphertext in zip(numbers, ciphertexts):
+            self.set_info(number, ciphertext)
+
+    @classmethod
+    def from_values(cls, keyH, values, executor=None):
+        """Return a new SIB storing the list of information ('info1' first).
+        The information are encrypted at once (see set_many)"""
+        values = list(values)
+        sib = cls(keyH, max(len(values), 1))
+        sib._fields[:len(values)] = keyH.encrypt_many(values, executor)
+        return sib
+
     def exportation(self, secure, ms=None):
         """Export information in clear text or cypher text"""
 
@@ -152,13 +226,13 @@ class SecretInfoBlock(InfoBlock):
             exp_sib = SecretInfoBlock(keyH=KeyHandler(ms), nbInfo=self.nbInfo)
 
         j = 1
-        for info in self:  # For all info
+        for info in self.decrypt_all():  # For all info
 
             info = info.decode()  # Info in clear
 
             if secure:            # Encrypt then encode
-                exp_sib['info' + str(j)] = info.encode()
-                info = b32encode(exp_sib.infos['info' + str(j)]).decode()
+                exp_sib.set_secret(j, info.encode())
+                info = b32encode(exp_sib.get_info(j)).decode()
 
             sib_to_export[str(j)] = info
 
@@ -180,6 +254,7 @@ class SecretInfoBlock(InfoBlock):
             tmp_keyH = KeyHandler(ms)
             tmp_sib = SecretInfoBlock(keyH=tmp_keyH)  # For integrity checking
 
+        values = {}  # Information in clear text to encrypt
         try:
             j = 1
             while True:
@@ -189,15 +264,17 @@ class SecretInfoBlock(InfoBlock):
                     if secure:
                         tmp_sib.nbInfo += 1
                 if not secure:
-                    self['info' + str(j)] = info.encode()  # Encrypt
+                    values['info' + str(j)] = info.encode()
                 else:
                     info = b32decode(info)                 # Decode
-                    tmp_sib.infos['info' + str(j)] = info  # Save in tmp_sib
-                    self['info' + str(j)] = tmp_keyH.decrypt(0, info)  # Encrypt
+                    tmp_sib.set_info(j, info)              # Save in tmp_sib
+                    values['info' + str(j)] = tmp_keyH.decrypt(0, info)
                 j += 1
         except KeyError:
             pass
 
+        self.set_many(values)  # Encrypt
+
         # Check integrity in case of a secure importation
         if secure:
             tmp_sib.fingerprint = b32decode(infos['fingerprint'])
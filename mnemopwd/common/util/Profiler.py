@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Profiling hooks around the execution of protocol states.
+
+For each execution the wall time and the CPU time of the thread are
+measured. Optionally:
+- one execution every N is run under cProfile and the most expensive
+  functions are logged (one profiled execution at a time: the sample is
+  skipped if another execution is profiled or if another profiling tool
+  is active, and a profiler failure never fails the execution);
+- the memory allocation delta is measured with tracemalloc (the tracing is
+  process-wide so concurrent executions are included in the delta).
+Executions longer than a threshold are logged as slow operations with an
+anonymized account context (a short hash, never a login or a filename).
+
+Used by the server ClientHandler and by the client ProtocolHandler.
+"""
+
+import time
+import logging
+import hashlib
+import threading
+import cProfile
+import pstats
+import io
+
+try:
+    import tracemalloc
+except ImportError:  # Not available on this Python implementation
+    tracemalloc = None
+
+# CPU time of the calling thread (Python 3.7) or of the process
+cpu_time = getattr(time, 'thread_time', time.process_time)
+
+
+def anonymize(account):
+    """Return a short non-reversible tag of an account identifier"""
+    if account is None:
+        return '-'
+    if isinstance(account, str):
+        account = account.encode()
+    return hashlib.sha256(account).hexdigest()[:12]
+
+
+class Profiler:
+    """
+    Profiler of operations
+
+    Attribute(s):
+    - threshold: duration (seconds) above which an operation is slow
+    - sample: profile one operation every 'sample' (0 for never)
+    - memory: flag to measure memory allocation deltas
+    - stats: dictionary of operation name -> [count, wall time, cpu time]
+
+    Method(s):
+    - run: execute and measure an operation
+    - summary: return a string summary of the statistics
+    """
+
+    def __init__(self, threshold=1.0, sample=0, memory=False):
+        """Object initialization"""
+        self.threshold = threshold
+        self.sample = sample
+        self.memory = memory and tracemalloc is not None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.stats = dict()
+        self.counter = 0  # Number of operations (for sampling)
+        self.lock = threading.Lock()
+        self.sampling = threading.Lock()  # Held by the profiled operation
+
+    def _must_sample(self):
+        """Return True if the next operation must be profiled"""
+        if self.sample <= 0:
+            return False
+        with self.lock:
+            self.counter += 1
+            return self.counter % self.sample == 0
+
+    def _start_profile(self):
+        """Start a profiler if the operation is sampled and no other
+        operation is profiled. Return the profiler or None"""
+        if not self._must_sample() or not self.sampling.acquire(False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception as exc:  # Another profiling tool is active
+            self.sampling.release()
+            logging.debug('Profiling sample skipped: %s', exc)
+            return None
+        return profile
+
+    def _stop_profile(self, profile, name, account):
+        """Stop a profiler and log the most expensive functions"""
+        try:
+            profile.disable()
+            output = io.StringIO()
+            pstats.Stats(profile, stream=output) \
+                .sort_stats('cumulative').print_stats(15)
+            logging.info('Profile of %s (account=%s):\n%s',
+                         name, anonymize(account), output.getvalue())
+        except Exception as exc:
+            logging.debug('Profiling sample of %s lost: %s', name, exc)
+        finally:
+            self.sampling.release()
+
+    def run(self, name, function, *args, account=None):
+        """Execute function(*args) and measure it"""
+        profile = self._start_profile()
+        memory = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        wall, cpu = time.perf_counter(), cpu_time()
+        try:
+            return function(*args)
+        finally:
+            wall, cpu = time.perf_counter() - wall, cpu_time() - cpu
+            if self.memory:
+                memory = tracemalloc.get_traced_memory()[0] - memory
+            with self.lock:
+                stat = self.stats.setdefault(name, [0, 0.0, 0.0])
+                stat[0] += 1
+                stat[1] += wall
+                stat[2] += cpu
+
+            if wall >= self.threshold:
+                logging.warning(
+                    'Slow operation %s: wall=%.3fs cpu=%.3fs memory=%s account=%s',
+                    name, wall, cpu, memory if self.memory else '-',
+                    anonymize(account))
+            if profile is not None:
+                self._stop_profile(profile, name, account)
+
+    def summary(self):
+        """Return a summary of the statistics per operation"""
+        with self.lock:
+            return ', '.join(
+                '{}: {} x {:.1f}ms (cpu {:.1f}ms)'.format(
+                    name, count, wall / count * 1000, cpu / count * 1000)
+                for name, (count, wall, cpu) in sorted(self.stats.items()))
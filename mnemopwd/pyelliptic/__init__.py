@@ -38,6 +38,7 @@ __all__ = [
     'ecc',
     'cipher',
     'hash',
+    'provider',
 ]
 
 from .openssl import OpenSSL
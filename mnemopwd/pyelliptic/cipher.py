@@ -29,7 +29,70 @@
 # OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
 # IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import threading
+
 from .openssl import OpenSSL
+from . import provider
+
+_CTRL_AEAD_GET_TAG = 0x10  # EVP_CTRL_GCM_GET_TAG (EVP_CTRL_AEAD_GET_TAG)
+_CTRL_AEAD_SET_TAG = 0x11  # EVP_CTRL_GCM_SET_TAG (EVP_CTRL_AEAD_SET_TAG)
+
+
+class _ContextPool:
+    """
+    Pool of EVP_CIPHER_CTX reused by Cipher instances
+
+    A context is cleaned up (key material erased) when it is released
+    and initialized again by EVP_CipherInit_ex when it is acquired.
+    """
+    def __init__(self, size=64):
+        self.size = size  # Maximum number of idle contexts kept
+        self.contexts = []
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Output buffer of each thread
+
+    def acquire(self):
+        with self.lock:
+            if self.contexts:
+                return self.contexts.pop()
+        ctx = OpenSSL.EVP_CIPHER_CTX_new()
+        if ctx is None:
+            raise Exception("[OpenSSL] EVP_CIPHER_CTX_new FAIL ...")
+        return ctx
+
+    def release(self, ctx):
+        OpenSSL.EVP_CIPHER_CTX_cleanup(ctx)
+        with self.lock:
+            if len(self.contexts) < self.size:
+                self.contexts.append(ctx)
+                return
+        OpenSSL.EVP_CIPHER_CTX_free(ctx)
+
+    def buffer(self, size):
+        """
+        Return the output buffer of the current thread, grown to size
+        """
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = OpenSSL.create_string_buffer(max(size, 1024))
+            self.local.buffer = buffer
+        return buffer
+
+
+def _input(data):
+    """
+    Return a pointer on the content of data and its size
+
+    bytes and writable buffers (bytearray, memoryview on a bytearray)
+    are passed without copy; a read-only memoryview is copied.
+    """
+    if isinstance(data, bytes):
+        return data, len(data)
+    view = memoryview(data)
+    if view.readonly:
+        data = view.tobytes()
+        return data, len(data)
+    return (OpenSSL.c_char * view.nbytes).from_buffer(view), view.nbytes
 
 
 class Cipher:
@@ -45,18 +108,31 @@ class Cipher:
 
         ctx2 = pyelliptic.Cipher("secretkey", iv, 0, ciphername='aes-256-cfb')
         print ctx2.ciphering(ciphertext)
+
+    The EVP_CIPHER_CTX comes from a pool and goes back to it when the
+    instance is deleted (or closed). The input may be any bytes-like object.
+
+    With an authenticated cipher (aes-128-gcm, aes-256-gcm) the
+    additional data is given to update_aad before update, the tag is read
+    by get_tag after the final encryption and given to set_tag before the
+    final decryption (which fails if the data are not authentic).
     """
+    pool = _ContextPool()
+    tagsize = 16  # Size of the tag of an authenticated cipher
+
     def __init__(self, key, iv, do, ciphername='aes-256-cbc'):
         """
         do == 1 => Encrypt; do == 0 => Decrypt
         """
+        self.ctx = None
         self.cipher = OpenSSL.get_cipher(ciphername)
-        self.ctx = OpenSSL.EVP_CIPHER_CTX_new()
+        self.blocksize = self.cipher.get_blocksize()
         if do == 1 or do == 0:
-            k = OpenSSL.malloc(key, len(key))
-            IV = OpenSSL.malloc(iv, len(iv))
-            OpenSSL.EVP_CipherInit_ex(
-                self.ctx, self.cipher.get_pointer(), 0, k, IV, do)
+            self.ctx = Cipher.pool.acquire()
+            if OpenSSL.EVP_CipherInit_ex(self.ctx, self.cipher.get_pointer(),
+                                         None, bytes(key), bytes(iv),
+                                         do) == 0:
+                raise Exception("[OpenSSL] EVP_CipherInit_ex FAIL ...")
         else:
             raise Exception("RTFM ...")
 
@@ -72,27 +148,62 @@ class Cipher:
         cipher = OpenSSL.get_cipher(ciphername)
         return cipher.get_blocksize()
 
+    @staticmethod
+    def is_aead(ciphername):
+        """
+        static method, returns True for an authenticated cipher
+        """
+        return OpenSSL.get_cipher(ciphername).is_aead()
+
     @staticmethod
     def gen_IV(ciphername):
         cipher = OpenSSL.get_cipher(ciphername)
-        return OpenSSL.rand(cipher.get_blocksize())
+        return provider.active.rand(cipher.get_blocksize())
 
     def update(self, input):
         i = OpenSSL.c_int(0)
-        buffer = OpenSSL.malloc(b"", len(input) + self.cipher.get_blocksize())
-        inp = OpenSSL.malloc(input, len(input))
-        if OpenSSL.EVP_CipherUpdate(self.ctx, OpenSSL.byref(buffer),
-                                    OpenSSL.byref(i), inp, len(input)) == 0:
+        inp, size = _input(input)
+        buffer = Cipher.pool.buffer(size + self.blocksize)
+        if OpenSSL.EVP_CipherUpdate(self.ctx, buffer,
+                                    OpenSSL.byref(i), inp, size) == 0:
+            raise Exception("[OpenSSL] EVP_CipherUpdate FAIL ...")
+        return OpenSSL.string_at(buffer, i.value)
+
+    def update_aad(self, input):
+        """
+        Authenticate additional data (authenticated cipher only)
+        """
+        i = OpenSSL.c_int(0)
+        inp, size = _input(input)
+        if OpenSSL.EVP_CipherUpdate(self.ctx, None,
+                                    OpenSSL.byref(i), inp, size) == 0:
             raise Exception("[OpenSSL] EVP_CipherUpdate FAIL ...")
-        return buffer.raw[0:i.value]
+
+    def get_tag(self):
+        """
+        Return the tag computed by the final encryption
+        """
+        tag = OpenSSL.create_string_buffer(Cipher.tagsize)
+        if OpenSSL.EVP_CIPHER_CTX_ctrl(self.ctx, _CTRL_AEAD_GET_TAG,
+                                       Cipher.tagsize, tag) == 0:
+            raise Exception("[OpenSSL] EVP_CIPHER_CTX_ctrl FAIL ...")
+        return tag.raw
+
+    def set_tag(self, tag):
+        """
+        Set the expected tag before the final decryption
+        """
+        if OpenSSL.EVP_CIPHER_CTX_ctrl(self.ctx, _CTRL_AEAD_SET_TAG,
+                                       len(tag), bytes(tag)) == 0:
+            raise Exception("[OpenSSL] EVP_CIPHER_CTX_ctrl FAIL ...")
 
     def final(self):
         i = OpenSSL.c_int(0)
-        buffer = OpenSSL.malloc(b"", self.cipher.get_blocksize())
-        if (OpenSSL.EVP_CipherFinal_ex(self.ctx, OpenSSL.byref(buffer),
+        buffer = Cipher.pool.buffer(self.blocksize)
+        if (OpenSSL.EVP_CipherFinal_ex(self.ctx, buffer,
                                        OpenSSL.byref(i))) == 0:
             raise Exception("[OpenSSL] EVP_CipherFinal_ex FAIL ...")
-        return buffer.raw[0:i.value]
+        return OpenSSL.string_at(buffer, i.value)
 
     def ciphering(self, input):
         """
@@ -101,6 +212,13 @@ class Cipher:
         buff = self.update(input)
         return buff + self.final()
 
+    def close(self):
+        """
+        Give back the context to the pool
+        """
+        if self.ctx is not None:
+            ctx, self.ctx = self.ctx, None
+            Cipher.pool.release(ctx)
+
     def __del__(self):
-        OpenSSL.EVP_CIPHER_CTX_cleanup(self.ctx)
-        OpenSSL.EVP_CIPHER_CTX_free(self.ctx)
+        self.close()
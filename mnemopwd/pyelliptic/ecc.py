@@ -29,6 +29,7 @@
 # OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
 # IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import threading
 from hashlib import sha512
 from binascii import hexlify, unhexlify
 from .openssl import OpenSSL
@@ -36,6 +37,192 @@ from .cipher import Cipher
 from .hash import hmac_sha256, equals
 from struct import pack, unpack
 
+_NID_PRIME_FIELD = 406  # NID_X9_62_prime_field
+
+
+class _BNContext:
+    """
+    BN_CTX of the current thread (a BN_CTX can not be shared between
+    threads), freed when the thread ends
+    """
+    local = threading.local()
+
+    def __init__(self):
+        self.ctx = OpenSSL.BN_CTX_new()
+
+    def __del__(self):
+        OpenSSL.BN_CTX_free(self.ctx)
+
+    @staticmethod
+    def get():
+        context = getattr(_BNContext.local, 'context', None)
+        if context is None:
+            context = _BNContext.local.context = _BNContext()
+        return context.ctx
+
+
+def _check_point(group, order, point, bn_ctx):
+    """
+    Check a peer public key like EC_KEY_check_key does. The order is
+    given only for curves with a cofactor (subgroup membership)
+    """
+    if OpenSSL.EC_POINT_is_at_infinity(group, point) == 1 or \
+            OpenSSL.EC_POINT_is_on_curve(group, point, bn_ctx) != 1:
+        raise Exception("[OpenSSL] EC_POINT_is_on_curve FAIL ... " + OpenSSL.get_error())
+    if order is not None:
+        try:
+            tmp = None
+            tmp = OpenSSL.EC_POINT_new(group)
+            if OpenSSL.EC_POINT_mul(group, tmp, None, point, order,
+                                    bn_ctx) == 0 or \
+                    OpenSSL.EC_POINT_is_at_infinity(group, tmp) != 1:
+                raise Exception("[OpenSSL] EC_POINT_mul FAIL ... " + OpenSSL.get_error())
+        finally:
+            OpenSSL.EC_POINT_free(tmp)
+
+
+def _bn2bin(bn, size):
+    """
+    Return a BIGNUM as bytes left padded to size
+    """
+    buffer = OpenSSL.malloc(0, OpenSSL.BN_num_bytes(bn))
+    OpenSSL.BN_bn2bin(bn, buffer)
+    return buffer.raw.rjust(size, b'\0')
+
+
+class _Point:
+    """
+    A checked public key of a curve, freed when no more used
+    """
+    def __init__(self, curve, pubkey_x, pubkey_y):
+        self.point = None
+        try:
+            x = y = None
+            bn_ctx = _BNContext.get()
+            x = OpenSSL.BN_bin2bn(pubkey_x, len(pubkey_x), 0)
+            y = OpenSSL.BN_bin2bn(pubkey_y, len(pubkey_y), 0)
+            self.point = OpenSSL.EC_POINT_new(curve.group)
+            if (OpenSSL.EC_POINT_set_affine_coordinates_GFp(curve.group,
+                                                            self.point, x, y,
+                                                            bn_ctx)) == 0:
+                raise Exception(
+                    "[OpenSSL] EC_POINT_set_affine_coordinates_GFp FAIL ..." + OpenSSL.get_error())
+            _check_point(curve.group, curve.cofactor_order, self.point,
+                         bn_ctx)
+        finally:
+            OpenSSL.BN_free(x)
+            OpenSSL.BN_free(y)
+
+    def __del__(self):
+        OpenSSL.EC_POINT_free(self.point)
+
+
+class _Curve:
+    """
+    Group of a curve with the precomputed multiples of its generator.
+    ECIES encryption draws ephemeral keys on it instead of building and
+    checking a full ECC keypair for each message.
+    """
+    curves = {}  # Curve id -> _Curve
+    lock = threading.Lock()
+    maxpoints = 256  # Maximum number of public keys kept
+
+    def __init__(self, curve):
+        bn_ctx = _BNContext.get()
+        self.group = OpenSSL.EC_GROUP_new_by_curve_name(curve)
+        if not self.group:
+            raise Exception("[OpenSSL] EC_GROUP_new_by_curve_name FAIL ... " + OpenSSL.get_error())
+        # Binary curves use a Montgomery ladder, faster than the wNAF
+        # method chosen by OpenSSL when a precomputation exists
+        method = OpenSSL.EC_GROUP_method_of(self.group)
+        if OpenSSL.EC_METHOD_get_field_type(method) == _NID_PRIME_FIELD and \
+                OpenSSL.EC_GROUP_precompute_mult(self.group, bn_ctx) == 0:
+            raise Exception("[OpenSSL] EC_GROUP_precompute_mult FAIL ... " + OpenSSL.get_error())
+        field_size = OpenSSL.EC_GROUP_get_degree(self.group)
+        self.secret_len = int((field_size + 7) / 8)
+        self.order = OpenSSL.BN_new()
+        OpenSSL.EC_GROUP_get_order(self.group, self.order, bn_ctx)
+        cofactor = OpenSSL.BN_new()
+        try:
+            OpenSSL.EC_GROUP_get_cofactor(self.group, cofactor, bn_ctx)
+            has_cofactor = OpenSSL.BN_num_bits(cofactor) > 1
+        finally:
+            OpenSSL.BN_free(cofactor)
+        self.cofactor_order = self.order if has_cofactor else None
+        self.points = {}  # Checked public keys
+
+    @staticmethod
+    def get(curve):
+        """
+        Return the shared object of a curve (id or name)
+        """
+        if type(curve) == str:
+            curve = OpenSSL.get_curve(curve)
+        result = _Curve.curves.get(curve)
+        if result is None:
+            with _Curve.lock:
+                result = _Curve.curves.get(curve)
+                if result is None:
+                    result = _Curve.curves[curve] = _Curve(curve)
+        return result
+
+    def point(self, pubkey_x, pubkey_y):
+        """
+        Return the checked point of a public key
+        """
+        point = self.points.get((pubkey_x, pubkey_y))
+        if point is None:
+            point = _Point(self, pubkey_x, pubkey_y)
+            if len(self.points) >= _Curve.maxpoints:
+                self.points.clear()
+            self.points[(pubkey_x, pubkey_y)] = point
+        return point
+
+    def ephemeral(self, point):
+        """
+        Draw an ephemeral keypair. Return its public key (binary format)
+        and the ECDH key shared with point
+        """
+        try:
+            k = pub_key = shared = x = y = None
+            bn_ctx = _BNContext.get()
+            k = OpenSSL.BN_new()
+            while OpenSSL.BN_num_bits(k) == 0:  # 0 < k < order
+                if OpenSSL.BN_rand_range(k, self.order) == 0:
+                    raise Exception("[OpenSSL] BN_rand_range FAIL ... " + OpenSSL.get_error())
+
+            pub_key = OpenSSL.EC_POINT_new(self.group)
+            shared = OpenSSL.EC_POINT_new(self.group)
+            if OpenSSL.EC_POINT_mul(self.group, pub_key, k, None, None,
+                                    bn_ctx) == 0 or \
+                    OpenSSL.EC_POINT_mul(self.group, shared, None,
+                                         point.point, k, bn_ctx) == 0:
+                raise Exception("[OpenSSL] EC_POINT_mul FAIL ... " + OpenSSL.get_error())
+
+            x, y = OpenSSL.BN_new(), OpenSSL.BN_new()
+            if (OpenSSL.EC_POINT_get_affine_coordinates_GFp(self.group,
+                                                            pub_key, x, y,
+                                                            bn_ctx)) == 0:
+                raise Exception(
+                    "[OpenSSL] EC_POINT_get_affine_coordinates_GFp FAIL ... " + OpenSSL.get_error())
+            pubkey = b'\x04' + _bn2bin(x, self.secret_len) + \
+                _bn2bin(y, self.secret_len)
+
+            # The ECDH key is the x coordinate as ECDH_compute_key does
+            if (OpenSSL.EC_POINT_get_affine_coordinates_GFp(self.group,
+                                                            shared, x, y,
+                                                            bn_ctx)) == 0:
+                raise Exception(
+                    "[OpenSSL] EC_POINT_get_affine_coordinates_GFp FAIL ... " + OpenSSL.get_error())
+            return pubkey, _bn2bin(x, self.secret_len)
+
+        finally:
+            OpenSSL.BN_clear_free(k)
+            OpenSSL.EC_POINT_free(pub_key)
+            OpenSSL.EC_POINT_free(shared)
+            OpenSSL.BN_free(x)
+            OpenSSL.BN_free(y)
+
 
 class ECC:
     """
@@ -65,14 +252,20 @@ class ECC:
         print alice.get_ecdh_key(bob.get_pubkey()).encode('hex')
         print bob.get_ecdh_key(alice.get_pubkey()).encode('hex')
 
+    The native EC_KEY of the keypair is built on first use by ECDH or
+    decrypt and kept until the instance is deleted.
     """
 
+    lock = threading.Lock()  # Protect the building of native keys
+
     def __init__(self, pubkey=None, privkey=None, pubkey_x=None,
                  pubkey_y=None, raw_privkey=None, curve='sect283r1'):
         """
         For a normal and High level use, specifie pubkey,
         privkey (if you need) and the curve
         """
+        self._key = None  # Native EC_KEY
+        self._order = None  # Group order if the cofactor is not 1
         if type(curve) == str:
             self.curve = OpenSSL.get_curve(curve)
         else:
@@ -343,6 +536,70 @@ class ECC:
             OpenSSL.BN_free(pub_key_x)
             OpenSSL.BN_free(pub_key_y)
 
+    def _native_key(self):
+        """
+        Return the native EC_KEY of the keypair, built on first use
+        """
+        if self._key is None:
+            with ECC.lock:
+                if self._key is None:
+                    self._key = self._build_key()
+        return self._key
+
+    def _build_key(self):
+        try:
+            key = priv_key = pub_key_x = pub_key_y = pub_key = cofactor = None
+            bn_ctx = _BNContext.get()
+
+            key = OpenSSL.EC_KEY_new_by_curve_name(self.curve)
+            if not key:
+                raise Exception("[OpenSSL] EC_KEY_new_by_curve_name FAIL ... " + OpenSSL.get_error())
+            group = OpenSSL.EC_KEY_get0_group(key)
+
+            if self.privkey is not None:
+                priv_key = OpenSSL.BN_bin2bn(self.privkey, len(self.privkey), 0)
+                if (OpenSSL.EC_KEY_set_private_key(key, priv_key)) == 0:
+                    raise Exception("[OpenSSL] EC_KEY_set_private_key FAIL ... " + OpenSSL.get_error())
+
+            pub_key_x = OpenSSL.BN_bin2bn(self.pubkey_x, len(self.pubkey_x), 0)
+            pub_key_y = OpenSSL.BN_bin2bn(self.pubkey_y, len(self.pubkey_y), 0)
+            pub_key = OpenSSL.EC_POINT_new(group)
+            if (OpenSSL.EC_POINT_set_affine_coordinates_GFp(group, pub_key,
+                                                            pub_key_x,
+                                                            pub_key_y,
+                                                            bn_ctx)) == 0:
+                raise Exception(
+                    "[OpenSSL] EC_POINT_set_affine_coordinates_GFp FAIL ... " + OpenSSL.get_error())
+            if (OpenSSL.EC_KEY_set_public_key(key, pub_key)) == 0:
+                raise Exception("[OpenSSL] EC_KEY_set_public_key FAIL ... " + OpenSSL.get_error())
+
+            OpenSSL.ECDH_set_method(key, OpenSSL.ECDH_OpenSSL())
+
+            self._group = group
+            field_size = OpenSSL.EC_GROUP_get_degree(group)
+            self._secret_len = int((field_size + 7) / 8)
+
+            # With a cofactor, a point on the curve may be outside of
+            # the subgroup: the order is kept to check peer keys
+            cofactor = OpenSSL.BN_new()
+            OpenSSL.EC_GROUP_get_cofactor(group, cofactor, bn_ctx)
+            if OpenSSL.BN_num_bits(cofactor) > 1:
+                self._order = OpenSSL.BN_new()
+                OpenSSL.EC_GROUP_get_order(group, self._order, bn_ctx)
+
+            return key
+
+        except Exception:
+            OpenSSL.EC_KEY_free(key)
+            raise
+
+        finally:
+            OpenSSL.BN_free(priv_key)
+            OpenSSL.BN_free(pub_key_x)
+            OpenSSL.BN_free(pub_key_y)
+            OpenSSL.EC_POINT_free(pub_key)
+            OpenSSL.BN_free(cofactor)
+
     def get_ecdh_key(self, pubkey, format='binary'):
         """
         High level function. Compute public key with the local private key
@@ -352,44 +609,27 @@ class ECC:
         return self.raw_get_ecdh_key(pubkey_x, pubkey_y)
 
     def raw_get_ecdh_key(self, pubkey_x, pubkey_y):
+        own_key = self._native_key()
         try:
-            other_key = OpenSSL.EC_KEY_new_by_curve_name(self.curve)
-            if other_key == 0:
-                raise Exception("[OpenSSL] EC_KEY_new_by_curve_name FAIL ... " + OpenSSL.get_error())
-
+            other_pub_key_x = other_pub_key_y = other_pub_key = None
+            bn_ctx = _BNContext.get()
             other_pub_key_x = OpenSSL.BN_bin2bn(pubkey_x, len(pubkey_x), 0)
             other_pub_key_y = OpenSSL.BN_bin2bn(pubkey_y, len(pubkey_y), 0)
 
-            other_group = OpenSSL.EC_KEY_get0_group(other_key)
-            other_pub_key = OpenSSL.EC_POINT_new(other_group)
+            other_pub_key = OpenSSL.EC_POINT_new(self._group)
             if (other_pub_key == None):
                 raise Exception("[OpenSSl] EC_POINT_new FAIL ... " + OpenSSL.get_error())
 
-            if (OpenSSL.EC_POINT_set_affine_coordinates_GFp(other_group,
+            if (OpenSSL.EC_POINT_set_affine_coordinates_GFp(self._group,
                                                             other_pub_key,
                                                             other_pub_key_x,
                                                             other_pub_key_y,
-                                                            0)) == 0:
+                                                            bn_ctx)) == 0:
                 raise Exception(
                     "[OpenSSL] EC_POINT_set_affine_coordinates_GFp FAIL ..." + OpenSSL.get_error())
-            if (OpenSSL.EC_KEY_set_public_key(other_key, other_pub_key)) == 0:
-                raise Exception("[OpenSSL] EC_KEY_set_public_key FAIL ... " + OpenSSL.get_error())
-            if (OpenSSL.EC_KEY_check_key(other_key)) == 0:
-                raise Exception("[OpenSSL] EC_KEY_check_key FAIL ... " + OpenSSL.get_error())
-
-            own_key = OpenSSL.EC_KEY_new_by_curve_name(self.curve)
-            if own_key == 0:
-                raise Exception("[OpenSSL] EC_KEY_new_by_curve_name FAIL ... " + OpenSSL.get_error())
-            own_priv_key = OpenSSL.BN_bin2bn(
-                self.privkey, len(self.privkey), 0)
+            _check_point(self._group, self._order, other_pub_key, bn_ctx)
 
-            if (OpenSSL.EC_KEY_set_private_key(own_key, own_priv_key)) == 0:
-                raise Exception("[OpenSSL] EC_KEY_set_private_key FAIL ... " + OpenSSL.get_error())
-
-            OpenSSL.ECDH_set_method(own_key, OpenSSL.ECDH_OpenSSL())
-
-            field_size = OpenSSL.EC_GROUP_get_degree(OpenSSL.EC_KEY_get0_group(own_key))
-            secret_len = int((field_size + 7) / 8)
+            secret_len = self._secret_len
             ecdh_keybuffer = OpenSSL.malloc(0, secret_len)
 
             ecdh_keylen = OpenSSL.ECDH_compute_key(
@@ -401,12 +641,9 @@ class ECC:
             return ecdh_keybuffer.raw
 
         finally:
-            OpenSSL.EC_KEY_free(other_key)
             OpenSSL.BN_free(other_pub_key_x)
             OpenSSL.BN_free(other_pub_key_y)
             OpenSSL.EC_POINT_free(other_pub_key)
-            OpenSSL.EC_KEY_free(own_key)
-            OpenSSL.BN_free(own_priv_key)
 
     def check_key(self, privkey, pubkey):
         """
@@ -590,12 +827,17 @@ class ECC:
                     ephemcurve=None, ciphername='aes-256-cbc'):
         if ephemcurve is None:
             ephemcurve = curve
-        ephem = ECC(curve=ephemcurve)
-        key = sha512(ephem.raw_get_ecdh_key(pubkey_x, pubkey_y)).digest()
+        ephem = _Curve.get(ephemcurve)
+        pubkey, ecdh_key = ephem.ephemeral(ephem.point(pubkey_x, pubkey_y))
+        key = sha512(ecdh_key).digest()
         key_e, key_m = key[:32], key[32:]
-        pubkey = ephem.get_pubkey()
         iv = Cipher.gen_IV(ciphername)
         ctx = Cipher(key_e, iv, 1, ciphername)
+        if Cipher.is_aead(ciphername):
+            # One pass: the tag authenticates the ciphertext and the key
+            ctx.update_aad(pubkey)
+            ciphertext = ctx.ciphering(data)
+            return iv + pubkey + ciphertext + ctx.get_tag()
         ciphertext = iv + pubkey + ctx.ciphering(data)
         mac = hmac_sha256(key_m, ciphertext)
         return ciphertext + mac
@@ -604,23 +846,36 @@ class ECC:
         """
         Decrypt data with ECIES method using the local private key
         """
-        blocksize = OpenSSL.get_cipher(ciphername).get_blocksize()
+        cipher = OpenSSL.get_cipher(ciphername)
+        blocksize = cipher.get_blocksize()
         iv = data[:blocksize]
         i = blocksize
-        own_key = OpenSSL.EC_KEY_new_by_curve_name(self.curve)
-        if own_key == 0:
-            raise Exception("[OpenSSL] EC_KEY_new_by_curve_name FAIL ... " + OpenSSL.get_error())
-        field_size = OpenSSL.EC_GROUP_get_degree(OpenSSL.EC_KEY_get0_group(own_key))
-        secret_len = int((field_size + 7) / 8)
-        coord_len = secret_len * 2 + 1
-        pubkey_x, pubkey_y = ECC._decode_pubkey(data[i:i + coord_len])
+        self._native_key()
+        coord_len = self._secret_len * 2 + 1
+        pubkey = data[i:i + coord_len]
+        pubkey_x, pubkey_y = ECC._decode_pubkey(pubkey)
         i += coord_len
-        ciphertext = data[i:len(data) - 32]
-        i = len(data) - 32
+        macsize = Cipher.tagsize if cipher.is_aead() else 32
+        ciphertext = data[i:len(data) - macsize]
+        i = len(data) - macsize
         mac = data[i:]
         key = sha512(self.raw_get_ecdh_key(pubkey_x, pubkey_y)).digest()
         key_e, key_m = key[:32], key[32:]
+        if cipher.is_aead():
+            ctx = Cipher(key_e, iv, 0, ciphername)
+            ctx.update_aad(pubkey)
+            ctx.set_tag(mac)
+            try:
+                return ctx.ciphering(ciphertext)
+            except Exception:
+                raise RuntimeError("Fail to verify data")
         if not equals(hmac_sha256(key_m, data[:i]), mac):
             raise RuntimeError("Fail to verify data")
         ctx = Cipher(key_e, iv, 0, ciphername)
         return ctx.ciphering(ciphertext)
+
+    def __del__(self):
+        if self._key is not None:
+            OpenSSL.EC_KEY_free(self._key)
+        if self._order is not None:
+            OpenSSL.BN_free(self._order)
@@ -29,70 +29,39 @@
 # OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN
 # IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from .openssl import OpenSSL
-
-
-# For python3
-def _equals_bytes(a, b):
-    if len(a) != len(b):
-        return False
-    result = 0
-    for x, y in zip(a, b):
-        result |= x ^ y
-    return result == 0
-
-
-def _equals_str(a, b):
-    if len(a) != len(b):
-        return False
-    result = 0
-    for x, y in zip(a, b):
-        result |= ord(x) ^ ord(y)
-    return result == 0
+from . import provider
 
 
 def equals(a, b):
-    if isinstance(a, str):
-        return _equals_str(a, b)
-    else:
-        return _equals_bytes(a, b)
+    """
+    Compare two strings or bytes in a constant time
+    """
+    return provider.active.equals(a, b)
 
 
 def hmac_sha256(k, m):
     """
     Compute the key and the message with HMAC SHA5256
     """
-    key = OpenSSL.malloc(k, len(k))
-    d = OpenSSL.malloc(m, len(m))
-    md = OpenSSL.malloc(0, 32)
-    i = OpenSSL.pointer(OpenSSL.c_int(0))
-    OpenSSL.HMAC(OpenSSL.EVP_sha256(), key, len(k), d, len(m), md, i)
-    return md.raw
+    return provider.active.hmac_sha256(k, m)
 
 
 def hmac_sha512(k, m):
     """
     Compute the key and the message with HMAC SHA512
     """
-    key = OpenSSL.malloc(k, len(k))
-    d = OpenSSL.malloc(m, len(m))
-    md = OpenSSL.malloc(0, 64)
-    i = OpenSSL.pointer(OpenSSL.c_int(0))
-    OpenSSL.HMAC(OpenSSL.EVP_sha512(), key, len(k), d, len(m), md, i)
-    return md.raw
+    return provider.active.hmac_sha512(k, m)
+
+
+def hmac_sha512_parts(k, parts):
+    """
+    Compute the key and the concatenation of the parts (an iterable of
+    bytes fed one by one) with HMAC SHA512
+    """
+    return provider.active.hmac_sha512_parts(k, parts)
 
 
 def pbkdf2(password, salt=None, i=10000, keylen=64, hfunc='SHA256'):
     if salt is None:
-        salt = OpenSSL.rand(8)
-    p_password = OpenSSL.malloc(password, len(password))
-    p_salt = OpenSSL.malloc(salt, len(salt))
-    output = OpenSSL.malloc(0, keylen)
-    if hfunc == 'SHA256':
-        OpenSSL.PKCS5_PBKDF2_HMAC(p_password, len(password), p_salt,
-                                  len(p_salt), i, OpenSSL.EVP_sha256(),
-                                  keylen, output)
-    else:
-        OpenSSL.PKCS5_PBKDF2_HMAC_SHA1(p_password, len(password), p_salt,
-                                       len(p_salt), i, keylen, output)
-    return salt, output.raw
+        salt = provider.active.rand(8)
+    return salt, provider.active.pbkdf2(password, salt, i, keylen, hfunc)
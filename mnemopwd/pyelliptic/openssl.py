@@ -31,16 +31,142 @@
 
 import sys
 import ctypes
-import ctypes.util
 
 OpenSSL = None
 
 
+# Prototypes of the OpenSSL functions: name -> (restype, argtypes)
+_PROTOTYPES = {
+    'ERR_error_string': (ctypes.c_char_p, [ctypes.c_ulong, ctypes.c_char_p]),
+    'ERR_get_error': (ctypes.c_ulong, []),
+    'BN_new': (ctypes.c_void_p, []),
+    'BN_free': (None, [ctypes.c_void_p]),
+    'BN_clear_free': (None, [ctypes.c_void_p]),
+    'BN_rand_range': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'BN_num_bits': (ctypes.c_int, [ctypes.c_void_p]),
+    'BN_bn2bin': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'BN_bin2bn': (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_int,
+                                    ctypes.c_void_p]),
+    'BN_cmp': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'BN_rshift': (ctypes.c_int,
+                  [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int]),
+    'EC_GROUP_get_order': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                          ctypes.c_void_p]),
+    'EC_GROUP_new_by_curve_name': (ctypes.c_void_p, [ctypes.c_int]),
+    'EC_GROUP_free': (None, [ctypes.c_void_p]),
+    'EC_GROUP_precompute_mult': (ctypes.c_int, [ctypes.c_void_p,
+                                                ctypes.c_void_p]),
+    'EC_GROUP_method_of': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'EC_METHOD_get_field_type': (ctypes.c_int, [ctypes.c_void_p]),
+    'EC_GROUP_get_degree': (ctypes.c_int, [ctypes.c_void_p]),
+    'EC_KEY_free': (None, [ctypes.c_void_p]),
+    'EC_KEY_new_by_curve_name': (ctypes.c_void_p, [ctypes.c_int]),
+    'EC_KEY_generate_key': (ctypes.c_int, [ctypes.c_void_p]),
+    'EC_KEY_check_key': (ctypes.c_int, [ctypes.c_void_p]),
+    'EC_KEY_get0_private_key': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'EC_KEY_get0_public_key': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'EC_KEY_get0_group': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'EC_POINT_get_affine_coordinates_GFp': (ctypes.c_int, [ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p]),
+    'EC_KEY_set_private_key': (ctypes.c_int,
+                               [ctypes.c_void_p, ctypes.c_void_p]),
+    'EC_KEY_set_public_key': (ctypes.c_int,
+                              [ctypes.c_void_p, ctypes.c_void_p]),
+    'EC_KEY_set_group': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'EC_POINT_set_affine_coordinates_GFp': (ctypes.c_int, [ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p,
+                                                           ctypes.c_void_p]),
+    'EC_POINT_new': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'EC_POINT_free': (None, [ctypes.c_void_p]),
+    'BN_CTX_free': (None, [ctypes.c_void_p]),
+    'EC_POINT_mul': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                    ctypes.c_void_p, ctypes.c_void_p,
+                                    ctypes.c_void_p, ctypes.c_void_p]),
+    'EC_POINT_is_on_curve': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                            ctypes.c_void_p]),
+    'EC_POINT_is_at_infinity': (ctypes.c_int,
+                                [ctypes.c_void_p, ctypes.c_void_p]),
+    'EC_GROUP_get_cofactor': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                             ctypes.c_void_p]),
+    'ECDH_OpenSSL': (ctypes.c_void_p, []),
+    'BN_CTX_new': (ctypes.c_void_p, []),
+    'ECDH_set_method': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'ECDH_compute_key': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int,
+                                        ctypes.c_void_p, ctypes.c_void_p]),
+    'EVP_CipherInit_ex': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                         ctypes.c_void_p, ctypes.c_void_p,
+                                         ctypes.c_void_p, ctypes.c_int]),
+    'EVP_CIPHER_CTX_new': (ctypes.c_void_p, []),
+    'EVP_aes_128_cfb128': (ctypes.c_void_p, []),
+    'EVP_aes_256_cfb128': (ctypes.c_void_p, []),
+    'EVP_aes_128_cbc': (ctypes.c_void_p, []),
+    'EVP_aes_256_cbc': (ctypes.c_void_p, []),
+    'EVP_aes_128_ctr': (ctypes.c_void_p, []),
+    'EVP_aes_256_ctr': (ctypes.c_void_p, []),
+    'EVP_aes_128_ofb': (ctypes.c_void_p, []),
+    'EVP_aes_256_ofb': (ctypes.c_void_p, []),
+    'EVP_bf_cbc': (ctypes.c_void_p, []),
+    'EVP_bf_cfb64': (ctypes.c_void_p, []),
+    'EVP_rc4': (ctypes.c_void_p, []),
+    'EVP_aes_128_gcm': (ctypes.c_void_p, []),
+    'EVP_aes_256_gcm': (ctypes.c_void_p, []),
+    'EVP_CIPHER_CTX_ctrl': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int,
+                                           ctypes.c_int, ctypes.c_void_p]),
+    'EVP_CIPHER_CTX_cleanup': (ctypes.c_int, [ctypes.c_void_p]),
+    'EVP_CIPHER_CTX_free': (None, [ctypes.c_void_p]),
+    'EVP_CipherUpdate': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                        ctypes.c_void_p, ctypes.c_void_p,
+                                        ctypes.c_int]),
+    'EVP_CipherFinal_ex': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                          ctypes.c_void_p]),
+    'EVP_DigestInit': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'EVP_DigestInit_ex': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                         ctypes.c_void_p]),
+    'EVP_DigestUpdate': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                        ctypes.c_int]),
+    'EVP_DigestFinal': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                       ctypes.c_void_p]),
+    'EVP_DigestFinal_ex': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p,
+                                          ctypes.c_void_p]),
+    'EVP_ecdsa': (ctypes.c_void_p, []),
+    'ECDSA_sign': (ctypes.c_int, [ctypes.c_int, ctypes.c_void_p, ctypes.c_int,
+                                  ctypes.c_void_p, ctypes.c_void_p,
+                                  ctypes.c_void_p]),
+    'ECDSA_verify': (ctypes.c_int, [ctypes.c_int, ctypes.c_void_p,
+                                    ctypes.c_int, ctypes.c_void_p,
+                                    ctypes.c_int, ctypes.c_void_p]),
+    'EVP_MD_CTX_create': (ctypes.c_void_p, []),
+    'EVP_MD_CTX_init': (None, [ctypes.c_void_p]),
+    'EVP_MD_CTX_destroy': (None, [ctypes.c_void_p]),
+    'RAND_bytes': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    'EVP_sha256': (ctypes.c_void_p, []),
+    'i2o_ECPublicKey': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'EVP_sha512': (ctypes.c_void_p, []),
+    'HMAC': (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int,
+                               ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p,
+                               ctypes.c_void_p]),
+    'PKCS5_PBKDF2_HMAC': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int,
+                                         ctypes.c_void_p, ctypes.c_int,
+                                         ctypes.c_int, ctypes.c_void_p,
+                                         ctypes.c_int, ctypes.c_void_p]),
+    'PKCS5_PBKDF2_HMAC_SHA1': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int,
+                                              ctypes.c_void_p, ctypes.c_int,
+                                              ctypes.c_int, ctypes.c_int,
+                                              ctypes.c_void_p]),
+}
+
+
 class CipherName:
-    def __init__(self, name, pointer, blocksize):
+    def __init__(self, name, pointer, blocksize, aead=False):
         self._name = name
         self._pointer = pointer
-        self._blocksize = blocksize
+        self._blocksize = blocksize  # Size of the IV for an AEAD cipher
+        self._aead = aead
 
     def __str__(self):
         return ("Cipher : %s | Blocksize : %s | Fonction pointer : %s" %
@@ -55,342 +181,49 @@ class CipherName:
     def get_blocksize(self):
         return self._blocksize
 
+    def is_aead(self):
+        return self._aead
+
 
 class _OpenSSL:
     """
     Wrapper for OpenSSL using ctypes
     """
-    def __init__(self, library):
+    def __init__(self, library=None):
         """
-        Build the wrapper
+        Build the wrapper. The library (found if not given) is loaded,
+        the functions are bound and the tables are built on first use
         """
-        self._lib = ctypes.CDLL(library)
+        self._library = library
 
         self.pointer = ctypes.pointer
         self.c_int = ctypes.c_int
         self.byref = ctypes.byref
         self.create_string_buffer = ctypes.create_string_buffer
+        self.string_at = ctypes.string_at
+        self.c_char = ctypes.c_char
 
-        self.ERR_error_string = self._lib.ERR_error_string
-        self.ERR_error_string.restype = ctypes.c_char_p
-        self.ERR_error_string.argtypes = [ctypes.c_ulong, ctypes.c_char_p]
-
-        self.ERR_get_error = self._lib.ERR_get_error
-        self.ERR_get_error.restype = ctypes.c_ulong
-        self.ERR_get_error.argtypes = []
-
-        self.BN_new = self._lib.BN_new
-        self.BN_new.restype = ctypes.c_void_p
-        self.BN_new.argtypes = []
-
-        self.BN_free = self._lib.BN_free
-        self.BN_free.restype = None
-        self.BN_free.argtypes = [ctypes.c_void_p]
-
-        self.BN_num_bits = self._lib.BN_num_bits
-        self.BN_num_bits.restype = ctypes.c_int
-        self.BN_num_bits.argtypes = [ctypes.c_void_p]
-
-        self.BN_bn2bin = self._lib.BN_bn2bin
-        self.BN_bn2bin.restype = ctypes.c_int
-        self.BN_bn2bin.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-
-        self.BN_bin2bn = self._lib.BN_bin2bn
-        self.BN_bin2bn.restype = ctypes.c_void_p
-        self.BN_bin2bn.argtypes = [ctypes.c_void_p, ctypes.c_int,
-                                   ctypes.c_void_p]
-
-        self.BN_cmp = self._lib.BN_cmp
-        self.BN_cmp.restype = ctypes.c_int
-        self.BN_cmp.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-
-        self.BN_rshift = self._lib.BN_rshift
-        self.BN_rshift.restype = ctypes.c_int
-        self.BN_rshift.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int]
-
-        self.EC_GROUP_get_order = self._lib.EC_GROUP_get_order
-        self.EC_GROUP_get_order.restype = ctypes.c_int
-        self.EC_GROUP_get_order.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
-                                            ctypes.c_void_p]
-
-        self.EC_GROUP_get_degree = self._lib.EC_GROUP_get_degree
-        self.EC_GROUP_get_degree.restype = ctypes.c_int
-        self.EC_GROUP_get_degree.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_free = self._lib.EC_KEY_free
-        self.EC_KEY_free.restype = None
-        self.EC_KEY_free.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_new_by_curve_name = self._lib.EC_KEY_new_by_curve_name
-        self.EC_KEY_new_by_curve_name.restype = ctypes.c_void_p
-        self.EC_KEY_new_by_curve_name.argtypes = [ctypes.c_int]
-
-        self.EC_KEY_generate_key = self._lib.EC_KEY_generate_key
-        self.EC_KEY_generate_key.restype = ctypes.c_int
-        self.EC_KEY_generate_key.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_check_key = self._lib.EC_KEY_check_key
-        self.EC_KEY_check_key.restype = ctypes.c_int
-        self.EC_KEY_check_key.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_get0_private_key = self._lib.EC_KEY_get0_private_key
-        self.EC_KEY_get0_private_key.restype = ctypes.c_void_p
-        self.EC_KEY_get0_private_key.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_get0_public_key = self._lib.EC_KEY_get0_public_key
-        self.EC_KEY_get0_public_key.restype = ctypes.c_void_p
-        self.EC_KEY_get0_public_key.argtypes = [ctypes.c_void_p]
-
-        self.EC_KEY_get0_group = self._lib.EC_KEY_get0_group
-        self.EC_KEY_get0_group.restype = ctypes.c_void_p
-        self.EC_KEY_get0_group.argtypes = [ctypes.c_void_p]
-
-        self.EC_POINT_get_affine_coordinates_GFp = self._lib.EC_POINT_get_affine_coordinates_GFp
-        self.EC_POINT_get_affine_coordinates_GFp.restype = ctypes.c_int
-        self.EC_POINT_get_affine_coordinates_GFp.argtypes = 5 * [ctypes.c_void_p]
-
-        self.EC_KEY_set_private_key = self._lib.EC_KEY_set_private_key
-        self.EC_KEY_set_private_key.restype = ctypes.c_int
-        self.EC_KEY_set_private_key.argtypes = [ctypes.c_void_p,
-                                                ctypes.c_void_p]
-
-        self.EC_KEY_set_public_key = self._lib.EC_KEY_set_public_key
-        self.EC_KEY_set_public_key.restype = ctypes.c_int
-        self.EC_KEY_set_public_key.argtypes = [ctypes.c_void_p,
-                                               ctypes.c_void_p]
-
-        self.EC_KEY_set_group = self._lib.EC_KEY_set_group
-        self.EC_KEY_set_group.restype = ctypes.c_int
-        self.EC_KEY_set_group.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EC_POINT_set_affine_coordinates_GFp = self._lib.EC_POINT_set_affine_coordinates_GFp
-        self.EC_POINT_set_affine_coordinates_GFp.restype = ctypes.c_int
-        self.EC_POINT_set_affine_coordinates_GFp.argtypes = 5 * [ctypes.c_void_p]
-
-        self.EC_POINT_new = self._lib.EC_POINT_new
-        self.EC_POINT_new.restype = ctypes.c_void_p
-        self.EC_POINT_new.argtypes = [ctypes.c_void_p]
-
-        self.EC_POINT_free = self._lib.EC_POINT_free
-        self.EC_POINT_free.restype = None
-        self.EC_POINT_free.argtypes = [ctypes.c_void_p]
-
-        self.BN_CTX_free = self._lib.BN_CTX_free
-        self.BN_CTX_free.restype = None
-        self.BN_CTX_free.argtypes = [ctypes.c_void_p]
-
-        self.EC_POINT_mul = self._lib.EC_POINT_mul
-        self.EC_POINT_mul.restype = ctypes.c_int
-        self.EC_POINT_mul.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
-                                      ctypes.c_void_p, ctypes.c_void_p,
-                                      ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EC_KEY_set_private_key = self._lib.EC_KEY_set_private_key
-        self.EC_KEY_set_private_key.restype = ctypes.c_int
-        self.EC_KEY_set_private_key.argtypes = [ctypes.c_void_p,
-                                                ctypes.c_void_p]
-
-        self.ECDH_OpenSSL = self._lib.ECDH_OpenSSL
-        self._lib.ECDH_OpenSSL.restype = ctypes.c_void_p
-        self._lib.ECDH_OpenSSL.argtypes = []
-
-        self.BN_CTX_new = self._lib.BN_CTX_new
-        self._lib.BN_CTX_new.restype = ctypes.c_void_p
-        self._lib.BN_CTX_new.argtypes = []
-
-        self.ECDH_set_method = self._lib.ECDH_set_method
-        self._lib.ECDH_set_method.restype = ctypes.c_int
-        self._lib.ECDH_set_method.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-
-        self.ECDH_compute_key = self._lib.ECDH_compute_key
-        self.ECDH_compute_key.restype = ctypes.c_int
-        self.ECDH_compute_key.argtypes = [ctypes.c_void_p,
-                                          ctypes.c_int,
-                                          ctypes.c_void_p,
-                                          ctypes.c_void_p]
-
-        self.EVP_CipherInit_ex = self._lib.EVP_CipherInit_ex
-        self.EVP_CipherInit_ex.restype = ctypes.c_int
-        self.EVP_CipherInit_ex.argtypes = [ctypes.c_void_p,
-                                           ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EVP_CIPHER_CTX_new = self._lib.EVP_CIPHER_CTX_new
-        self.EVP_CIPHER_CTX_new.restype = ctypes.c_void_p
-        self.EVP_CIPHER_CTX_new.argtypes = []
-
-        # Cipher
-        self.EVP_aes_128_cfb128 = self._lib.EVP_aes_128_cfb128
-        self.EVP_aes_128_cfb128.restype = ctypes.c_void_p
-        self.EVP_aes_128_cfb128.argtypes = []
-
-        self.EVP_aes_256_cfb128 = self._lib.EVP_aes_256_cfb128
-        self.EVP_aes_256_cfb128.restype = ctypes.c_void_p
-        self.EVP_aes_256_cfb128.argtypes = []
-
-        self.EVP_aes_128_cbc = self._lib.EVP_aes_128_cbc
-        self.EVP_aes_128_cbc.restype = ctypes.c_void_p
-        self.EVP_aes_128_cbc.argtypes = []
-
-        self.EVP_aes_256_cbc = self._lib.EVP_aes_256_cbc
-        self.EVP_aes_256_cbc.restype = ctypes.c_void_p
-        self.EVP_aes_256_cbc.argtypes = []
-
-        try:
-            self.EVP_aes_128_ctr = self._lib.EVP_aes_128_ctr
-        except AttributeError:
-            pass
-        else:
-            self.EVP_aes_128_ctr.restype = ctypes.c_void_p
-            self.EVP_aes_128_ctr.argtypes = []
-
-        try:
-            self.EVP_aes_256_ctr = self._lib.EVP_aes_256_ctr
-        except AttributeError:
-            pass
-        else:
-            self.EVP_aes_256_ctr.restype = ctypes.c_void_p
-            self.EVP_aes_256_ctr.argtypes = []
-
-        self.EVP_aes_128_ofb = self._lib.EVP_aes_128_ofb
-        self.EVP_aes_128_ofb.restype = ctypes.c_void_p
-        self.EVP_aes_128_ofb.argtypes = []
-
-        self.EVP_aes_256_ofb = self._lib.EVP_aes_256_ofb
-        self.EVP_aes_256_ofb.restype = ctypes.c_void_p
-        self.EVP_aes_256_ofb.argtypes = []
-
-        self.EVP_bf_cbc = self._lib.EVP_bf_cbc
-        self.EVP_bf_cbc.restype = ctypes.c_void_p
-        self.EVP_bf_cbc.argtypes = []
-
-        self.EVP_bf_cfb64 = self._lib.EVP_bf_cfb64
-        self.EVP_bf_cfb64.restype = ctypes.c_void_p
-        self.EVP_bf_cfb64.argtypes = []
-
-        self.EVP_rc4 = self._lib.EVP_rc4
-        self.EVP_rc4.restype = ctypes.c_void_p
-        self.EVP_rc4.argtypes = []
-
-        self.EVP_CIPHER_CTX_cleanup = self._lib.EVP_CIPHER_CTX_cleanup
-        self.EVP_CIPHER_CTX_cleanup.restype = ctypes.c_int
-        self.EVP_CIPHER_CTX_cleanup.argtypes = [ctypes.c_void_p]
-
-        self.EVP_CIPHER_CTX_free = self._lib.EVP_CIPHER_CTX_free
-        self.EVP_CIPHER_CTX_free.restype = None
-        self.EVP_CIPHER_CTX_free.argtypes = [ctypes.c_void_p]
-
-        self.EVP_CipherUpdate = self._lib.EVP_CipherUpdate
-        self.EVP_CipherUpdate.restype = ctypes.c_int
-        self.EVP_CipherUpdate.argtypes = [ctypes.c_void_p,
-                                          ctypes.c_void_p,
-                                          ctypes.c_void_p,
-                                          ctypes.c_void_p,
-                                          ctypes.c_int]
-
-        self.EVP_CipherFinal_ex = self._lib.EVP_CipherFinal_ex
-        self.EVP_CipherFinal_ex.restype = ctypes.c_int
-        self.EVP_CipherFinal_ex.argtypes = 3 * [ctypes.c_void_p]
-
-        self.EVP_DigestInit = self._lib.EVP_DigestInit
-        self.EVP_DigestInit.restype = ctypes.c_int
-        self._lib.EVP_DigestInit.argtypes = 2 * [ctypes.c_void_p]
-
-        self.EVP_DigestInit_ex = self._lib.EVP_DigestInit_ex
-        self.EVP_DigestInit_ex.restype = ctypes.c_int
-        self._lib.EVP_DigestInit_ex.argtypes = 3 * [ctypes.c_void_p]
-
-        self.EVP_DigestUpdate = self._lib.EVP_DigestUpdate
-        self.EVP_DigestUpdate.restype = ctypes.c_int
-        self.EVP_DigestUpdate.argtypes = [ctypes.c_void_p,
-                                          ctypes.c_void_p,
-                                          ctypes.c_int]
-
-        self.EVP_DigestFinal = self._lib.EVP_DigestFinal
-        self.EVP_DigestFinal.restype = ctypes.c_int
-        self.EVP_DigestFinal.argtypes = [ctypes.c_void_p,
-                                         ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EVP_DigestFinal_ex = self._lib.EVP_DigestFinal_ex
-        self.EVP_DigestFinal_ex.restype = ctypes.c_int
-        self.EVP_DigestFinal_ex.argtypes = [ctypes.c_void_p,
-                                            ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EVP_ecdsa = self._lib.EVP_ecdsa
-        self._lib.EVP_ecdsa.restype = ctypes.c_void_p
-        self._lib.EVP_ecdsa.argtypes = []
-
-        self.ECDSA_sign = self._lib.ECDSA_sign
-        self.ECDSA_sign.restype = ctypes.c_int
-        self.ECDSA_sign.argtypes = [ctypes.c_int,
-                                    ctypes.c_void_p,
-                                    ctypes.c_int,
-                                    ctypes.c_void_p,
-                                    ctypes.c_void_p,
-                                    ctypes.c_void_p]
-
-        self.ECDSA_verify = self._lib.ECDSA_verify
-        self.ECDSA_verify.restype = ctypes.c_int
-        self.ECDSA_verify.argtypes = [ctypes.c_int,
-                                      ctypes.c_void_p,
-                                      ctypes.c_int,
-                                      ctypes.c_void_p,
-                                      ctypes.c_int,
-                                      ctypes.c_void_p]
-
-        self.EVP_MD_CTX_create = self._lib.EVP_MD_CTX_create
-        self.EVP_MD_CTX_create.restype = ctypes.c_void_p
-        self.EVP_MD_CTX_create.argtypes = []
-
-        self.EVP_MD_CTX_init = self._lib.EVP_MD_CTX_init
-        self.EVP_MD_CTX_init.restype = None
-        self.EVP_MD_CTX_init.argtypes = [ctypes.c_void_p]
-
-        self.EVP_MD_CTX_destroy = self._lib.EVP_MD_CTX_destroy
-        self.EVP_MD_CTX_destroy.restype = None
-        self.EVP_MD_CTX_destroy.argtypes = [ctypes.c_void_p]
-
-        self.RAND_bytes = self._lib.RAND_bytes
-        self.RAND_bytes.restype = ctypes.c_int
-        self.RAND_bytes.argtypes = [ctypes.c_void_p, ctypes.c_int]
-
-        self.EVP_sha256 = self._lib.EVP_sha256
-        self.EVP_sha256.restype = ctypes.c_void_p
-        self.EVP_sha256.argtypes = []
-
-        self.i2o_ECPublicKey = self._lib.i2o_ECPublicKey
-        self.i2o_ECPublicKey.restype = ctypes.c_int
-        self.i2o_ECPublicKey.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-
-        self.EVP_sha512 = self._lib.EVP_sha512
-        self.EVP_sha512.restype = ctypes.c_void_p
-        self.EVP_sha512.argtypes = []
-
-        self.HMAC = self._lib.HMAC
-        self.HMAC.restype = ctypes.c_void_p
-        self.HMAC.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int,
-                              ctypes.c_void_p, ctypes.c_int,
-                              ctypes.c_void_p, ctypes.c_void_p]
-
-        try:
-            self.PKCS5_PBKDF2_HMAC = self._lib.PKCS5_PBKDF2_HMAC
-            self.PKCS5_PBKDF2_HMAC.restype = ctypes.c_int
-            self.PKCS5_PBKDF2_HMAC.argtypes = [ctypes.c_void_p, ctypes.c_int,
-                                               ctypes.c_void_p, ctypes.c_int,
-                                               ctypes.c_int, ctypes.c_void_p,
-                                               ctypes.c_int, ctypes.c_void_p]
-        except AttributeError:
-            pass
-
-        # The above is not compatible with all versions of OSX.
-        self.PKCS5_PBKDF2_HMAC_SHA1 = self._lib.PKCS5_PBKDF2_HMAC_SHA1
-        self.PKCS5_PBKDF2_HMAC_SHA1.restype = ctypes.c_int
-        self.PKCS5_PBKDF2_HMAC_SHA1.argtypes = [ctypes.c_void_p, ctypes.c_int,
-                                                ctypes.c_void_p, ctypes.c_int,
-                                                ctypes.c_int, ctypes.c_int,
-                                                ctypes.c_void_p]
-
-        self._set_ciphers()
-        self._set_curves()
+    def __getattr__(self, name):
+        """
+        Load the library, bind a function or build a table on first use
+        """
+        if name == '_lib':
+            self._lib = ctypes.CDLL(self._library or _find_library())
+            return self._lib
+        if name == 'cipher_algo':
+            self._set_ciphers()
+            return self.cipher_algo
+        if name == 'curves':
+            self._set_curves()
+            return self.curves
+        if name not in _PROTOTYPES:
+            raise AttributeError(name)
+        function = getattr(self._lib, name)  # AttributeError if not exported
+        function.restype, argtypes = _PROTOTYPES[name]
+        if argtypes is not None:
+            function.argtypes = argtypes
+        setattr(self, name, function)
+        return function
 
     def _set_ciphers(self):
         self.cipher_algo = {
@@ -407,16 +240,16 @@ class _OpenSSL:
                                       self.EVP_aes_256_cfb128,
                                       16),
             'aes-128-ofb': CipherName('aes-128-ofb',
-                                      self._lib.EVP_aes_128_ofb,
+                                      self.EVP_aes_128_ofb,
                                       16),
             'aes-256-ofb': CipherName('aes-256-ofb',
-                                      self._lib.EVP_aes_256_ofb,
+                                      self.EVP_aes_256_ofb,
                                       16),
             # 'aes-128-ctr': CipherName('aes-128-ctr',
-            #                           self._lib.EVP_aes_128_ctr,
+            #                           self.EVP_aes_128_ctr,
             #                           16),
             # 'aes-256-ctr': CipherName('aes-256-ctr',
-            #                           self._lib.EVP_aes_256_ctr,
+            #                           self.EVP_aes_256_ctr,
             #                           16),
             'bf-cfb': CipherName('bf-cfb',
                                  self.EVP_bf_cfb64,
@@ -433,15 +266,28 @@ class _OpenSSL:
         if hasattr(self, 'EVP_aes_128_ctr'):
             self.cipher_algo['aes-128-ctr'] = CipherName(
                 'aes-128-ctr',
-                self._lib.EVP_aes_128_ctr,
+                self.EVP_aes_128_ctr,
                 16
             )
         if hasattr(self, 'EVP_aes_256_ctr'):
             self.cipher_algo['aes-256-ctr'] = CipherName(
                 'aes-256-ctr',
-                self._lib.EVP_aes_256_ctr,
+                self.EVP_aes_256_ctr,
                 16
             )
+        # Authenticated ciphers (the "block size" is the size of the nonce)
+        if hasattr(self, 'EVP_aes_128_gcm'):
+            self.cipher_algo['aes-128-gcm'] = CipherName(
+                'aes-128-gcm',
+                self.EVP_aes_128_gcm,
+                12, aead=True
+            )
+        if hasattr(self, 'EVP_aes_256_gcm'):
+            self.cipher_algo['aes-256-gcm'] = CipherName(
+                'aes-256-gcm',
+                self.EVP_aes_256_gcm,
+                12, aead=True
+            )
 
     def _set_curves(self):
         self.curves = {
@@ -539,10 +385,16 @@ class _OpenSSL:
     def get_error(self):
         return str(OpenSSL.ERR_error_string(OpenSSL.ERR_get_error(), None))
 
-libname = ctypes.util.find_library('crypto')
-if libname is None:
-    # For Windows ...
-    libname = ctypes.util.find_library('libeay32.dll')
-if libname is None:
-    raise Exception("Couldn't load OpenSSL lib ...")
-OpenSSL = _OpenSSL(libname)
+
+def _find_library():
+    import ctypes.util  # Slow to import (subprocess, shutil...): on first use
+    libname = ctypes.util.find_library('crypto')
+    if libname is None:
+        # For Windows ...
+        libname = ctypes.util.find_library('libeay32.dll')
+    if libname is None:
+        raise Exception("Couldn't load OpenSSL lib ...")
+    return libname
+
+
+OpenSSL = _OpenSSL()
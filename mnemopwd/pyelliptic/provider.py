@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Providers of the hash, HMAC, key derivation and random primitives
+
+The 'stdlib' provider uses the C implementations of the standard library
+(hashlib, hmac, os.urandom), the 'openssl' provider calls OpenSSL through
+ctypes. The stdlib one is used when available; use() selects another one.
+
+    from pyelliptic import provider
+    provider.use('openssl')
+"""
+
+import os
+import hmac
+import hashlib
+
+from .openssl import OpenSSL
+
+
+class OpenSSLProvider:
+    """
+    Primitives called through ctypes (fallback)
+    """
+    name = 'openssl'
+
+    @staticmethod
+    def hmac_sha256(k, m):
+        key = OpenSSL.malloc(k, len(k))
+        d = OpenSSL.malloc(m, len(m))
+        md = OpenSSL.malloc(0, 32)
+        i = OpenSSL.pointer(OpenSSL.c_int(0))
+        OpenSSL.HMAC(OpenSSL.EVP_sha256(), key, len(k), d, len(m), md, i)
+        return md.raw
+
+    @staticmethod
+    def hmac_sha512(k, m):
+        key = OpenSSL.malloc(k, len(k))
+        d = OpenSSL.malloc(m, len(m))
+        md = OpenSSL.malloc(0, 64)
+        i = OpenSSL.pointer(OpenSSL.c_int(0))
+        OpenSSL.HMAC(OpenSSL.EVP_sha512(), key, len(k), d, len(m), md, i)
+        return md.raw
+
+    @staticmethod
+    def hmac_sha512_parts(k, parts):
+        return OpenSSLProvider.hmac_sha512(k, b''.join(parts))
+
+    @staticmethod
+    def pbkdf2(password, salt, i, keylen, hfunc):
+        p_password = OpenSSL.malloc(password, len(password))
+        p_salt = OpenSSL.malloc(salt, len(salt))
+        output = OpenSSL.malloc(0, keylen)
+        if hfunc == 'SHA256':
+            OpenSSL.PKCS5_PBKDF2_HMAC(p_password, len(password), p_salt,
+                                      len(p_salt), i, OpenSSL.EVP_sha256(),
+                                      keylen, output)
+        else:
+            OpenSSL.PKCS5_PBKDF2_HMAC_SHA1(p_password, len(password), p_salt,
+                                           len(p_salt), i, keylen, output)
+        return output.raw
+
+    @staticmethod
+    def equals(a, b):
+        if len(a) != len(b):
+            return False
+        result = 0
+        if isinstance(a, str):
+            for x, y in zip(a, b):
+                result |= ord(x) ^ ord(y)
+        else:
+            for x, y in zip(a, b):
+                result |= x ^ y
+        return result == 0
+
+    @staticmethod
+    def rand(size):
+        return OpenSSL.rand(size)
+
+
+class StdlibProvider:
+    """
+    Primitives of the standard library (C implementations, no copies)
+    """
+    name = 'stdlib'
+
+    @staticmethod
+    def available():
+        return hasattr(hashlib, 'pbkdf2_hmac') and \
+            hasattr(hmac, 'compare_digest')
+
+    if hasattr(hmac, 'digest'):  # Python >= 3.7: one-shot HMAC
+        @staticmethod
+        def hmac_sha256(k, m):
+            return hmac.digest(k, m, 'sha256')
+
+        @staticmethod
+        def hmac_sha512(k, m):
+            return hmac.digest(k, m, 'sha512')
+    else:
+        @staticmethod
+        def hmac_sha256(k, m):
+            return hmac.new(k, m, hashlib.sha256).digest()
+
+        @staticmethod
+        def hmac_sha512(k, m):
+            return hmac.new(k, m, hashlib.sha512).digest()
+
+    @staticmethod
+    def hmac_sha512_parts(k, parts):
+        h = hmac.new(k, digestmod=hashlib.sha512)
+        for part in parts:  # No concatenation
+            h.update(part)
+        return h.digest()
+
+    @staticmethod
+    def pbkdf2(password, salt, i, keylen, hfunc):
+        name = 'sha256' if hfunc == 'SHA256' else 'sha1'
+        return hashlib.pbkdf2_hmac(name, password, salt, i, keylen)
+
+    @staticmethod
+    def equals(a, b):
+        if isinstance(a, str):  # compare_digest accepts only ASCII str
+            a, b = a.encode(), b.encode()
+        return hmac.compare_digest(a, b)
+
+    @staticmethod
+    def rand(size):
+        return os.urandom(size)
+
+
+providers = {OpenSSLProvider.name: OpenSSLProvider,
+             StdlibProvider.name: StdlibProvider}
+
+active = StdlibProvider if StdlibProvider.available() else OpenSSLProvider
+
+
+def use(name):
+    """
+    Select the provider of the primitives. Return the previous one
+    """
+    global active
+    if name not in providers:
+        raise Exception("Unknown provider " + name)
+    if name == StdlibProvider.name and not StdlibProvider.available():
+        raise Exception("Provider " + name + " not available")
+    previous, active = active, providers[name]
+    return previous.name
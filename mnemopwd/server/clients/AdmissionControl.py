@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Admission control of incoming connections.
+
+A connection burst must not starve active sessions: each new connection
+asks for an ephemeral ECC key generation on the shared pool of execution.
+So a new connection is refused with a busy reply if:
+- the number of concurrent sessions reaches a global maximum;
+- the number of concurrent sessions from the same IP reaches a maximum;
+- the number of tasks waiting in the pool of execution reaches a maximum.
+
+All methods are called by the i/o asynchronous loop (no lock needed).
+"""
+
+import logging
+
+from ..util.Configuration import Configuration
+
+
+class AdmissionControl:
+    """Admission controller of new connections"""
+
+    def __init__(self, executor):
+        """Object initialization"""
+        self.executor = executor  # The pool of execution
+        self.sessions = 0  # Number of sessions admitted
+        self.ip_sessions = dict()  # Number of sessions admitted per IP
+        # Counters of rejected connections
+        self.rejected = {'sessions': 0, 'ip': 0, 'busy': 0}
+
+    def queue_depth(self):
+        """Return the number of tasks waiting in the pool of execution"""
+        work_queue = getattr(self.executor, '_work_queue', None)
+        if work_queue is None:
+            return 0
+        return work_queue.qsize()
+
+    def admit(self, ip):
+        """Try to admit a new connection from an IP.
+        Return None if admitted, otherwise the reason of rejection"""
+        reason = None
+        if 0 < Configuration.max_sessions <= self.sessions:
+            reason = 'sessions'
+        elif 0 < Configuration.max_ip_sessions <= self.ip_sessions.get(ip, 0):
+            reason = 'ip'
+        elif 0 < Configuration.max_queue <= self.queue_depth():
+            reason = 'busy'
+
+        if reason is None:
+            self.sessions += 1
+            self.ip_sessions[ip] = self.ip_sessions.get(ip, 0) + 1
+        else:
+            self.rejected[reason] += 1
+            logging.warning('Connection from %s rejected (%s) [%s]',
+                            ip, reason, self.statistics())
+        return reason
+
+    def release(self, ip):
+        """Release a session previously admitted"""
+        self.sessions -= 1
+        counter = self.ip_sessions[ip] - 1
+        if counter == 0:
+            del self.ip_sessions[ip]
+        else:
+            self.ip_sessions[ip] = counter
+
+    def statistics(self):
+        """Return a string summary of sessions and rejections"""
+        return 'sessions: {}, queue: {}, rejected: {}'.format(
+            self.sessions, self.queue_depth(),
+            ', '.join('{}={}'.format(k, v)
+                      for k, v in sorted(self.rejected.items())))
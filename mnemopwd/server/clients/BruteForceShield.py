@@ -32,69 +32,198 @@ Protection against brute force attack attempts via "login" functionality and
 It consists on client IP filtering after a maximum of attempts. For example,
 after 3 login attempts from a same client IP, this IP is temporarily banished
 during one hour.
+
+Suspect IPs are kept in a hashtable and in a min-heap ordered by the
+beginning of their suspicion period, so rehabilitations only look at the
+oldest entries. IPv4 addresses can be aggregated by network (CIDR prefix)
+and the table can be saved in a compact snapshot file to survive restarts.
+When the prefix changes (snapshot loaded or configuration reloaded), the
+entries are re-keyed: an entry of a smaller network joins its network with
+the new prefix, an entry of a larger network is kept and still covers all
+its addresses.
 """
 
 import time
 import logging
+import heapq
+import threading
+import ipaddress
+import struct
+import os
 
 from ..util.Configuration import Configuration
+from ..util.Metrics import Metrics
 
 
 class BruteForceShield:
     """Brute-force attack shield"""
 
     banishment_period = 3600  # One hour of banishment
+    snapshot_magic = b'MBFS1'  # Snapshot file format identifier
+    snapshot_record = struct.Struct('!B16sBId')  # Version, address, prefix...
 
-    def __init__(self):
+    def __init__(self, prefix=32):
         """Object initialization"""
-        self.shield = dict()  # IP hashtable
-
-    def _close_banishment(self, ip):
-        """Rehabilitate an IP banished"""
-        del self.shield[ip]  # Banishment is finished
-        logging.critical('IP {} is now rehabilitated'.format(ip))
-
-    def _ip_rehabilitation(self):
-        """IP hashtable update"""
-        to_rehabilitate = list()
-        for key in self.shield.keys():
-            counter, start_time = self.shield[key]
-            duration = time.time() - start_time
-            if duration > BruteForceShield.banishment_period:
-                to_rehabilitate.append(key)
-        for ip in to_rehabilitate:
-            self._close_banishment(ip)
+        self.shield = dict()  # IP hashtable: key -> (counter, start_time)
+        self.heap = list()  # Min-heap of (start_time, key)
+        self.lock = threading.Lock()
+        self.prefix = prefix  # IPv4 aggregation prefix (32: no aggregation)
+        self.networks = dict()  # Keys of entries larger than the prefix
+
+    def _key(self, ip):
+        """Return the hashtable key of an IP (the IP or its network)"""
+        if self.prefix >= 32:
+            return ip
+        try:
+            network = ipaddress.ip_network(
+                '{}/{}'.format(ip, self.prefix), strict=False)
+        except ValueError:
+            return ip  # Not an IPv4 address
+        return str(network)
+
+    def _lookup(self, ip):
+        """Return the hashtable key of an IP: the key of an entry of a
+        larger network containing the IP if any (lock acquired)"""
+        if self.networks:
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                return ip
+            for key, network in self.networks.items():
+                if address in network:
+                    return key
+        return self._key(ip)
+
+    def _insert(self, key, counter, start_time):
+        """Add an entry with a key built with any prefix, re-keyed with
+        the actual prefix (lock acquired)"""
+        try:
+            network = ipaddress.ip_network(key, strict=False)
+        except ValueError:
+            network = None  # Not an IP address: kept as is
+        newkey = key
+        if network is not None:
+            newkey = self._key(str(network.network_address))
+            if network.prefixlen < \
+                    ipaddress.ip_network(newkey, strict=False).prefixlen:
+                self.networks[key] = network  # Larger network: kept as is
+                newkey = key
+        entry = self.shield.get(newkey)
+        # Several entries in the same network: keep the most severe one
+        if entry is None or (counter, start_time) > entry:
+            self._add(newkey, counter, start_time)
+
+    def set_prefix(self, prefix):
+        """Change the aggregation prefix and re-key the table"""
+        with self.lock:
+            self.prefix = prefix
+            entries = self.shield
+            self.shield, self.heap, self.networks = dict(), list(), dict()
+            for key, (counter, start_time) in entries.items():
+                self._insert(key, counter, start_time)
+
+    def _close_banishment(self, key):
+        """Rehabilitate an IP banished (lock acquired)"""
+        del self.shield[key]  # Banishment is finished
+        self.networks.pop(key, None)
+        logging.critical('IP %s is now rehabilitated', key)
+
+    def _ip_rehabilitation(self, now):
+        """IP hashtable update: pop the oldest entries (lock acquired)"""
+        limit = now - BruteForceShield.banishment_period
+        while self.heap and self.heap[0][0] < limit:
+            start_time, key = heapq.heappop(self.heap)
+            entry = self.shield.get(key)
+            if entry is not None and entry[1] == start_time:
+                self._close_banishment(key)
+
+    def _add(self, key, counter, start_time):
+        """Add a new suspect key (lock acquired)"""
+        self.shield[key] = (counter, start_time)
+        heapq.heappush(self.heap, (start_time, key))
 
     def add_suspect_ip(self, ip):
         """Try do add a suspect IP"""
-        try:
-            counter, start_time = self.shield[ip]  # Try to get the suspect IP
+        with self.lock:
+            key = self._lookup(ip)
+            try:
+                counter, start_time = self.shield[key]  # Try to get the suspect IP
 
-            self.shield[ip] = (1 + counter, start_time)
-            if (1 + counter) == (1 + Configuration.max_login):
-                logging.critical('IP {} is now temporarily banished'.format(ip))
+                self.shield[key] = (1 + counter, start_time)
+                if (1 + counter) == (1 + Configuration.max_login):
+                    Metrics.inc('mnemopwd_shield_bans_total')
+                    logging.critical('IP %s is now temporarily banished', key)
 
-        except KeyError:
-            self.shield[ip] = (1, time.time())  # IP does not exist
-            logging.critical('IP {} is now considered as suspect'.format(ip))
+            except KeyError:
+                self._add(key, 1, time.time())  # IP does not exist
+                logging.critical('IP %s is now considered as suspect', key)
 
-    def is_suspect_ip(self, ip, loop):
+    def is_suspect_ip(self, ip, loop=None):
         """Test if the given argument is a suspect IP.
         Return False if not, otherwise return True"""
-        try:
-            counter, start_time = self.shield[ip]  # This IP already exists ?
-
-            # This IP is suspect. Check if banishment period is over
-            duration = time.time() - start_time
-            if duration > BruteForceShield.banishment_period:
-                self._close_banishment(ip)
-                return False
-            else:
+        with self.lock:
+            self._ip_rehabilitation(time.time())  # Table update
+            try:
+                counter, start_time = self.shield[self._lookup(ip)]
                 return counter > Configuration.max_login  # Check max attempts
 
-        except KeyError:
-            return False  # Not a suspect IP
-
-        finally:
-            # Schedule a table update
-            loop.run_in_executor(None, self._ip_rehabilitation)
+            except KeyError:
+                return False  # Not a suspect IP
+
+    def statistics(self):
+        """Return the number of suspect and of banished IPs"""
+        with self.lock:
+            banished = sum(1 for counter, start_time in self.shield.values()
+                           if counter > Configuration.max_login)
+            return len(self.shield), banished
+
+    def save(self, filename):
+        """Save the table in a snapshot file (written atomically and only
+        readable by the user)"""
+        with self.lock:
+            self._ip_rehabilitation(time.time())
+            records = list(self.shield.items())
+        tmpname = filename + '.tmp'
+        fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as file:
+            file.write(BruteForceShield.snapshot_magic)
+            for key, (counter, start_time) in records:
+                network = ipaddress.ip_network(key, strict=False)
+                file.write(BruteForceShield.snapshot_record.pack(
+                    network.version, network.network_address.packed,
+                    network.prefixlen, counter, start_time))
+        os.replace(tmpname, filename)
+        logging.info('%s suspect IPs saved in %s', len(records), filename)
+
+    def load(self, filename):
+        """Load the table from a snapshot file (if it exists)"""
+        try:
+            with open(filename, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        magic = BruteForceShield.snapshot_magic
+        if data[:len(magic)] != magic:
+            logging.error('Invalid snapshot file %s', filename)
+            return
+        data = data[len(magic):]
+        record = BruteForceShield.snapshot_record
+        if len(data) % record.size != 0:
+            logging.error('Truncated snapshot file %s', filename)
+            data = data[:len(data) - len(data) % record.size]
+        with self.lock:
+            for version, packed, prefixlen, counter, start_time in \
+                    record.iter_unpack(data):
+                size = 4 if version == 4 else 16
+                address = ipaddress.ip_address(packed[:size])
+                if prefixlen == address.max_prefixlen:
+                    key = str(address)
+                else:
+                    key = '{}/{}'.format(address, prefixlen)
+                self._insert(key, counter, start_time)  # Actual prefix
+            self._ip_rehabilitation(time.time())
+        logging.info('%s suspect IPs loaded from %s',
+                     len(self.shield), filename)
+
+    def __len__(self):
+        return len(self.shield)
@@ -28,14 +28,17 @@
 
 import asyncio
 import logging
-import os
+import threading
+import time
 
 from ...pyelliptic import OpenSSL
 from .protocol import *
-from ...common.KeyHandler import KeyHandler
 from ...common.SecretInfoBlock import SecretInfoBlock
 from .DBHandler import DBHandler
 from .DBAccess import DBAccess
+from .KeyHandlerCache import KeyHandlerCache
+from ..util.Configuration import Configuration
+from ..util.Metrics import Metrics
 
 """
 The client connection handler
@@ -45,11 +48,25 @@ The client connection handler
 class ClientHandler(asyncio.Protocol):
     """The client connection handler"""
     
-    def __init__(self, loop, path, shield):
+    def __init__(self, loop, path, shield, admission=None, timers=None,
+                 keypool=None, keycache=None, profiler=None):
         """Initialize the handler"""
         self.dbpath = path  # The path to the database
         self.loop = loop  # The i/o asynchronous loop
         self.shield = shield  # The brute-force shield
+        self.admission = admission  # The admission controller (optional)
+        self.admitted = False  # Flag set if the connection is admitted
+        self.timers = timers  # The timer wheel for session timeouts (optional)
+        self.keypool = keypool  # The ephemeral keypair pool (optional)
+        self.keycache = keycache  # The KeyHandler cache (optional)
+        self.profiler = profiler  # The profiler of states (optional)
+        self.started = self.last_activity = loop.time()  # Session times
+        self.running = 0  # Number of state executions in progress
+        self.lock = threading.Lock()  # Lock for the running counter
+        self.established = False  # Flag set if the session is started
+        self.closed = False  # Flag set when the connection is lost
+        self.ms = self.session = self.ephecc = None  # Session secrets
+        self.dbH = self.keyH = None  # Database and key handlers
         # The protocol states
         self.states = {
             '0': StateS0(), '1S': StateS1S(), '1C': StateS1C(),
@@ -66,35 +83,131 @@ class ClientHandler(asyncio.Protocol):
 
         ip, port = self.peername
         if self.shield.is_suspect_ip(ip, self.loop):
-            logging.critical('Connection attempt from a banished IP ({})'.format(ip))
+            logging.critical('Connection attempt from a banished IP (%s)', ip)
             self.transport.close()  # IP is banished
+        elif self.admission is not None and self.admission.admit(ip):
+            self.write(b'ERROR;server busy')
+            self.transport.close()  # Load shedding
         else:
+            self.admitted = self.admission is not None
+            self.established = True
+            Metrics.inc('mnemopwd_sessions_active')
             cipher = transport.get_extra_info('cipher')
-            logging.info('Connection from {} with {}'.format(self.peername, cipher))
+            logging.info('Connection from %s with %s', self.peername, cipher)
                 
             # Set the default state and schedule its execution
             self.state = self.states['0']  # State 0 at the beginning
-            self.loop.run_in_executor(None, self.state.do, self, None)
+            self.execute(None)
+
+            # Watch the session deadlines
+            if self.timers is not None:
+                self.timers.add(self)
 
     def connection_lost(self, exc):
         """Connection finishing"""
         if exc is None:
-            logging.info('Disconnection from {}'.format(self.peername))
+            logging.info('Disconnection from %s', self.peername)
         else:
-            logging.warning('Lost connection from {}'.format(self.peername))
+            logging.warning('Lost connection from %s', self.peername)
+        if self.admitted:
+            self.admitted = False
+            self.admission.release(self.peername[0])
+        if self.timers is not None:
+            self.timers.remove(self)
+        if self.established:
+            self.established = False
+            Metrics.dec('mnemopwd_sessions_active')
         self.transport.close()
 
+        # Release session resources (at the end of the running states)
+        with self.lock:
+            self.closed = True
+            release = self.running == 0
+        if release:
+            self._release()
+
+    def _release(self):
+        """Release the session resources"""
+        self.ms = self.session = self.ephecc = None
+        self.dbH = self.keyH = None
+
     def data_received(self, data):
         """Data received"""
-        # Future execution
-        self.loop.run_in_executor(None, self.state.do, self, data)
+        Metrics.inc('mnemopwd_bytes_received_total', len(data))
+        self.last_activity = self.loop.time()
+        self.execute(data)
+
+    def write(self, data):
+        """Send data to the client (called by the loop)"""
+        Metrics.inc('mnemopwd_bytes_sent_total', len(data))
+        self.transport.write(data)
+
+    def execute(self, data):
+        """Schedule the execution of the actual state (this method can be
+        called by a state to execute a substate)"""
+        with self.lock:
+            self.running += 1
+        self.loop.run_in_executor(None, self._execute, self.state, data)
+
+    def _execute(self, state, data):
+        """Execute a state in the pool executor and measure its duration"""
+        name = type(state).__name__
+        Metrics.inc('mnemopwd_executor_busy')
+        begin = time.perf_counter()
+        try:
+            if self.profiler is not None:
+                account = self.dbH.filename if self.dbH is not None else None
+                self.profiler.run(name, state.do, self, data, account=account)
+            else:
+                state.do(self, data)
+        finally:
+            duration = time.perf_counter() - begin
+            Metrics.dec('mnemopwd_executor_busy')
+            Metrics.inc('mnemopwd_state_requests_total', labels={'state': name})
+            Metrics.observe('mnemopwd_state_seconds', duration,
+                            labels={'state': name})
+            with self.lock:
+                self.running -= 1
+                release = self.closed and self.running == 0
+            self.last_activity = self.loop.time()
+            if release:
+                self._release()  # The connection was lost meanwhile
+
+    @property
+    def deadline(self):
+        """The session deadline: key sharing and login must be done in
+        'handshake_timeout' seconds then the session can stay idle
+        'idle_timeout' seconds (no limit if 0)"""
+        if self.dbH is None:
+            timeout, start = Configuration.handshake_timeout, self.started
+        else:
+            timeout, start = Configuration.idle_timeout, self.last_activity
+        if timeout <= 0:
+            return float('inf')
+        return start + timeout
+
+    def expire(self):
+        """Called by the timer wheel when the deadline is over.
+        Return True if the session is closed"""
+        if self.running > 0:
+            return False  # Wait for the end of the execution
+        logging.warning('Session timeout from %s (%s)', self.peername,
+                        'idle' if self.dbH is not None else 'handshake')
+        self.transport.abort()
+        return True
 
     def exception_handler(self, exc):
         """Exception handler for actions executed by the executor"""
-        logging.critical('Closing connection with {} because server detects an error : {}'
-                         .format(self.peername, exc))
+        logging.critical('Closing connection with %s because server detects an error : %s',
+                         self.peername, exc)
         self.transport.close()
 
+    def get_keyhandler(self, config):
+        """Return the KeyHandler of a configuration (from the cache if any)"""
+        if self.keycache is not None:
+            return self.keycache.get(self.ms, config, self.dbH.filename)
+        return KeyHandlerCache.new_keyhandler(self.ms, config)
+
     def configure_crypto(self, config_demand):
         """Configure cryptographic handler"""
         
@@ -116,19 +229,19 @@ class ClientHandler(asyncio.Protocol):
                 if self.dbH['config'] != config_demand:
                     # Case 2 : new configuration demand
                     self.dbH['config_tmp'] = config_demand
-                    logging.warning('New configuration {} from {}'
-                                    .format(config_demand, self.peername))
+                    logging.warning('New configuration %s from %s',
+                                    config_demand, self.peername)
                     result = 2
                 else:
                     # Case 1 : same configuration
-                    logging.info('Same configuration {} from {}'
-                                 .format(config_demand, self.peername))
+                    logging.info('Same configuration %s from %s',
+                                 config_demand, self.peername)
         
             except KeyError:
                 # Case 1 : no configuration exist 
                 self.dbH['config'] = config_demand
-                logging.info('First configuration {} from {}'
-                             .format(config_demand, self.peername))
+                logging.info('First configuration %s from %s',
+                             config_demand, self.peername)
         
             except:
                 # Unexpected error
@@ -136,11 +249,7 @@ class ClientHandler(asyncio.Protocol):
 
             finally:
                 # Configure client with actual cryptographic suite
-                config_actual = (self.dbH['config']).split(';')
-                self.keyH = KeyHandler(
-                    self.ms, cur1=config_actual[0], cip1=config_actual[1],
-                    cur2=config_actual[2], cip2=config_actual[3],
-                    cur3=config_actual[4], cip3=config_actual[5])
+                self.keyH = self.get_keyhandler(self.dbH['config'])
         
         # Return False (wrong configuration) or 1 (same or first) or 2 (new)
         return result
@@ -160,11 +269,7 @@ class ClientHandler(asyncio.Protocol):
                         self.dbH.path, self.dbH.filename + '_tmp')
                     config_tmp = self.dbH['config_tmp']
                     dbH_tmp['config'] = config_tmp
-                    config = config_tmp.split(';')
-                    keyH_tmp = KeyHandler(
-                        self.ms, cur1=config[0], cip1=config[1],
-                        cur2=config[2], cip2=config[3],
-                        cur3=config[4], cip3=config[5])
+                    keyH_tmp = KeyHandlerCache.new_keyhandler(self.ms, config_tmp)
                 
                     # Data exchange
                     nbsibs = self.dbH['nbsibs']
@@ -186,22 +291,24 @@ class ClientHandler(asyncio.Protocol):
                             if sib.nbInfo > 0:
                                 # New sib with new KeyHandler
                                 sib_tmp = SecretInfoBlock(keyH_tmp, sib.nbInfo)
-                                # For all secret information
-                                for j in range(1, sib.nbInfo + 1):
-                                    # Exchange
-                                    sib_tmp['info' + str(j)] = sib['info' + str(j)]
-                                    # Verification
-                                    assert sib_tmp['info' + str(j)] == sib['info' + str(j)]
+                                # Exchange all secret information
+                                infos = sib.decrypt_all()
+                                sib_tmp.set_many({'info' + str(j): info
+                                                  for j, info in enumerate(infos, 1)})
+                                # Verification
+                                assert sib_tmp.decrypt_all() == infos
                                 # Save sib in the new database with same index
                                 dbH_tmp[str(i)] = sib_tmp
                                 
-                    # Delete original database
-                    os.unlink(self.dbH.path + '/' + self.dbH.filename + '.db')
-                    # Rename temporary database
-                    os.rename(self.dbH.path + '/' + self.dbH.filename + '_tmp.db',
-                              self.dbH.path + '/' + self.dbH.filename + '.db')
-                    # Update handlers of the client handler
-                    self.dbH = dbH_tmp
+                    # Replace original database by temporary database
+                    DBHandler.rename(self.dbH.path,
+                                     self.dbH.filename + '_tmp',
+                                     self.dbH.filename)
+                    # Forget KeyHandler objects of the old configuration
+                    if self.keycache is not None:
+                        self.keycache.invalidate(self.dbH.filename)
+                    # Update KeyHandler of the client handler (the database
+                    # handler still designates the database)
                     self.keyH = keyH_tmp
                 
                 else:
@@ -210,7 +317,8 @@ class ClientHandler(asyncio.Protocol):
             
             except:
                 # Delete temporary database
-                os.unlink(self.dbH.path + '/' + self.dbH.filename + '_tmp.db')
+                if DBHandler.exist(self.dbH.path, self.dbH.filename + '_tmp'):
+                    DBHandler.delete(self.dbH.path, self.dbH.filename + '_tmp')
                 # Delete new configuration string
                 del self.dbH['config_tmp']
                 return False
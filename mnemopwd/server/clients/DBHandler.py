@@ -53,7 +53,9 @@ import stat
 import shelve
 import re
 from ..util.Configuration import Configuration
+from ..util.Metrics import Metrics
 from .DBAccess import DBAccess
+from ..replication.ChangeLog import ChangeLog
 
 
 class DBHandler:
@@ -64,11 +66,13 @@ class DBHandler:
     - path: a string for the database directory (instance attribute)
     - filename: a string for the database file name (instance attribute)
     - database: a string for the path + database file (instance attribute)
+    - changelog: the log of the changes to replicate (class attribute)
     
     Method(s):
     - new: a static method for database file creation
     - exist: a static method for testing if a database file already exist
     - delete: a static method for deleting a database file
+    - rename: a static method for replacing a database file by another one
     - add_data: a method for adding a secret information block in database
     - search_data: search secret information blocks matching a pattern
     - get_data: a method for getting all secret information blocks
@@ -76,6 +80,9 @@ class DBHandler:
     - delete_data: a method for deleting a secret information block in database
     """
     
+    changelog = None  # Change log for the replication (None: no replication)
+    batch_size = 64  # Number of sibs decrypted together by a search
+
     # Intern methods
     
     def __init__(self, path, filename):
@@ -96,16 +103,24 @@ class DBHandler:
         with DBAccess.getLock(self.database):
             with shelve.open(self.database, flag='w') as db:
                 db[index] = value
+                if DBHandler.changelog is not None:
+                    DBHandler.changelog.append(
+                        ChangeLog.SET, self.filename, index,
+                        db.dict[index.encode()])  # Value as stored
                 
     def __delitem__(self, index):
         """Delete an item. Raise KeyError exception if index does not exist"""
         with DBAccess.getLock(self.database):
             with shelve.open(self.database, flag='w') as db:
                 del db[index]
+            if DBHandler.changelog is not None:
+                DBHandler.changelog.append(ChangeLog.DEL, self.filename,
+                                           index)
 
     # Extern methods
     
     @staticmethod
+    @Metrics.timed('mnemopwd_db_seconds', operation='new')
     def new(path, filename):
         """Try to create a new db. Return a boolean."""
         if DBHandler.exist(path, filename):
@@ -118,14 +133,18 @@ class DBHandler:
                 db['index'] = 0   # Last entry index
             os.chmod(dbfile + '.db',
                      stat.S_IRUSR | stat.S_IWUSR | stat.S_IREAD | stat.S_IWRITE)
+            if DBHandler.changelog is not None:
+                DBHandler.changelog.append(ChangeLog.NEW, filename)
             return True
     
     @staticmethod
+    @Metrics.timed('mnemopwd_db_seconds', operation='exist')
     def exist(path, filename):
         """Test if the database file exist"""
         return os.path.exists(path + '/' + filename + '.db')
     
     @staticmethod
+    @Metrics.timed('mnemopwd_db_seconds', operation='delete')
     def delete(path, filename):
         """Try to delete database file"""
         result = False
@@ -135,8 +154,24 @@ class DBHandler:
             result = not os.path.exists(dbfile + '.db')
             if result:
                 DBAccess.delLock(dbfile)
+                if DBHandler.changelog is not None:
+                    DBHandler.changelog.append(ChangeLog.DROP, filename)
         return result
+
+    @staticmethod
+    @Metrics.timed('mnemopwd_db_seconds', operation='rename')
+    def rename(path, filename, newname):
+        """Replace the database file newname by the database file
+        filename"""
+        dbfile = path + '/' + filename
+        with DBAccess.getLock(dbfile):
+            os.replace(dbfile + '.db', path + '/' + newname + '.db')
+            DBAccess.delLock(dbfile)
+            if DBHandler.changelog is not None:
+                DBHandler.changelog.append(ChangeLog.RENAME, filename,
+                                           newname)
         
+    @Metrics.timed('mnemopwd_db_seconds', operation='add_data')
     def add_data(self, sib):
         """Add a secret information block and return his index (a string)"""
         nbsibs = self['nbsibs'] + 1   # Increment the number of block
@@ -147,12 +182,15 @@ class DBHandler:
         self[index] = sib             # Store the block
         return index                  # Return the index of the block
         
+    @Metrics.timed('mnemopwd_db_seconds', operation='search_data')
     def search_data(self, keyH, pattern):
         """Search secret information matching the pattern.
         Return a list of found sibs."""
         tabsibs = []             # Table of sibs
         nbsibs = self['nbsibs']  # Number of sibs
         if nbsibs > 0:
+            regex = re.compile(pattern, re.IGNORECASE)
+            batch = []  # Sibs decrypted together
             for i in range(1, self['index'] + 1):  # For all sibs
                 try:
                     sib = self[str(i)]  # Get sib
@@ -160,16 +198,34 @@ class DBHandler:
                     continue  # Try next key
                 if sib.nbInfo > 0:
                     sib.keyH = keyH  # Set actual KeyHandler
-                    if Configuration.search_mode == 'first':
-                        if re.search(pattern.upper(), sib['info1'].decode().upper()) is not None:
-                            tabsibs.append((i, sib))  # Matching so add sib
-                    else:
-                        for j in range(1, sib.nbInfo + 1):  # For all info
-                            if re.search(pattern.upper(), sib['info' + str(j)].decode().upper()) is not None:
-                                tabsibs.append((i, sib))  # Matching so add sib
-                                break  # One info match so stop loop now
+                    batch.append((i, sib))
+                    if len(batch) == DBHandler.batch_size:
+                        self._search_batch(keyH, regex, batch, tabsibs)
+                        batch = []
+            self._search_batch(keyH, regex, batch, tabsibs)
         return tabsibs
+
+    @staticmethod
+    def _search_batch(keyH, regex, batch, tabsibs):
+        """Add the sibs of a batch matching the regex to tabsibs. The
+        information number j of the sibs not yet matching is decrypted in
+        one call so a sib is not decrypted beyond its first matching
+        information"""
+        last = 1 if Configuration.search_mode == 'first' else \
+            max((sib.nbInfo for i, sib in batch), default=0)
+        remaining = batch  # Sibs not yet matching
+        found = set()  # Index of the sibs matching
+        for j in range(1, last + 1):
+            remaining = [(i, sib) for i, sib in remaining if sib.nbInfo >= j]
+            cleartexts = keyH.decrypt_many(
+                [sib.get_info(j) for i, sib in remaining])
+            for (i, sib), cleartext in zip(remaining, cleartexts):
+                if regex.search(cleartext.decode()) is not None:
+                    found.add(i)  # One info match so stop decryption now
+            remaining = [(i, sib) for i, sib in remaining if i not in found]
+        tabsibs.extend((i, sib) for i, sib in batch if i in found)
     
+    @Metrics.timed('mnemopwd_db_seconds', operation='get_data')
     def get_data(self, keyH):
         """Return a list of all sibs"""
         tabsibs = []             # Table of sibs
@@ -185,6 +241,7 @@ class DBHandler:
                     tabsibs.append((i, sib))
         return tabsibs
     
+    @Metrics.timed('mnemopwd_db_seconds', operation='update_data')
     def update_data(self, index, sib):
         """Update a secret information block. Return a boolean."""
         try:
@@ -198,6 +255,7 @@ class DBHandler:
         except KeyError:
             return False
             
+    @Metrics.timed('mnemopwd_db_seconds', operation='delete_data')
     def delete_data(self, index):
         """Delete a secret information block. Return a boolean."""
         try:
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Pool of pre-generated ephemeral keypairs.
+
+The key sharing (state S0) needs a fresh ephemeral keypair for each new
+connection. The keypairs are generated in advance by a background thread
+so the connection setup does not wait for a key generation. The thread
+refills the pool to its size each time the number of keys falls below the
+low-water mark. Each keypair is handed out exactly once.
+"""
+
+import threading
+import collections
+import logging
+
+from ...pyelliptic import ECC
+
+
+class EphemeralKeyPool:
+    """
+    Pool of ephemeral keypairs
+
+    Attribute(s):
+    - size: maximum number of keypairs in the pool
+    - low: the low-water mark which triggers a refill
+    - keys: the keypairs available
+    - misses: number of keypairs generated on demand (empty pool)
+
+    Method(s):
+    - start: start the refill thread
+    - stop: stop the refill thread
+    - get: return a new ephemeral keypair
+    """
+
+    def __init__(self, size, low):
+        """Object initialization"""
+        self.size = size
+        self.low = min(low, size)
+        self.keys = collections.deque()
+        self.misses = 0
+        self.running = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def _refill(self):
+        """Refill thread: wait for the low-water mark then fill the pool"""
+        while True:
+            with self.condition:
+                while self.running and len(self.keys) > self.low:
+                    self.condition.wait()
+                if not self.running:
+                    return
+            while self.running and len(self.keys) < self.size:
+                self.keys.append(ECC())
+
+    def start(self):
+        """Start the refill thread"""
+        if self.size > 0 and self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._refill,
+                                           name='EphemeralKeyPool',
+                                           daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the refill thread"""
+        if self.thread is not None:
+            with self.condition:
+                self.running = False
+                self.condition.notify()
+            self.thread.join()
+            self.thread = None
+            logging.info('Ephemeral key pool: %s keys generated on demand',
+                         self.misses)
+
+    def get(self):
+        """Return an ephemeral keypair never used before"""
+        try:
+            key = self.keys.popleft()  # Atomic operation
+        except IndexError:
+            self.misses += 1
+            key = ECC()  # Empty pool: generate a keypair on demand
+        if len(self.keys) <= self.low:
+            with self.condition:
+                self.condition.notify()
+        return key
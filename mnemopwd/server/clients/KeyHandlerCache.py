@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Memory-only cache of KeyHandler objects.
+
+Building a KeyHandler computes a keypair for each stage of the
+cryptographic suite. A user connecting often (several devices, frequent
+reconnections) builds again and again the same KeyHandler. The cache keeps
+the last KeyHandler objects built:
+- an entry is identified by a hash of the master secret and of the
+  configuration string (the master secret is never stored as a key);
+- the number of entries is bounded (least recently used entries are
+  evicted first) and an entry expires after a time to live;
+- all entries of a user account can be removed (account deletion or new
+  cryptographic configuration).
+"""
+
+import collections
+import hashlib
+import threading
+import time
+
+from ...common.KeyHandler import KeyHandler
+
+
+class KeyHandlerCache:
+    """
+    LRU cache of KeyHandler objects
+
+    Attribute(s):
+    - size: the maximum number of entries (0 disables the cache)
+    - ttl: the time to live of an entry in seconds
+    - hits, misses: statistics counters
+
+    Method(s):
+    - get: return the KeyHandler of a master secret and a configuration
+    - invalidate: remove all entries of a user account
+    - clear: remove all entries
+    """
+
+    def __init__(self, size, ttl):
+        """Object initialization"""
+        self.size = size
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()  # key -> (keyH, expiry, account)
+        self.accounts = dict()  # account -> set of keys
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def new_keyhandler(ms, config):
+        """Build a KeyHandler from a master secret and a configuration"""
+        config = config.split(';')
+        return KeyHandler(ms, cur1=config[0], cip1=config[1],
+                          cur2=config[2], cip2=config[3],
+                          cur3=config[4], cip3=config[5])
+
+    def _remove(self, key):
+        """Remove an entry (lock acquired)"""
+        keyH, expiry, account = self.entries.pop(key)
+        keys = self.accounts[account]
+        keys.discard(key)
+        if not keys:
+            del self.accounts[account]
+
+    def get(self, ms, config, account):
+        """Return the KeyHandler of a master secret and a configuration
+        string for a user account (built if not in the cache)"""
+        if self.size <= 0:
+            return KeyHandlerCache.new_keyhandler(ms, config)
+
+        key = hashlib.sha256(ms + config.encode()).digest()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._remove(key)  # Expired entry
+            self.misses += 1
+
+        # Build the KeyHandler without holding the lock
+        keyH = KeyHandlerCache.new_keyhandler(ms, config)
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (keyH, time.monotonic() + self.ttl, account)
+            self.accounts.setdefault(account, set()).add(key)
+            while len(self.entries) > self.size:
+                self._remove(next(iter(self.entries)))  # LRU eviction
+        return keyH
+
+    def invalidate(self, account):
+        """Remove all entries of a user account"""
+        with self.lock:
+            for key in list(self.accounts.get(account, ())):
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries"""
+        with self.lock:
+            self.entries.clear()
+            self.accounts.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -42,10 +42,13 @@ class StateS0:
         """Action of the state S0: send an ephemeral server public key"""
         
         try:
-            ephecc = ECC()  # Create an ephemeral keypair
+            if client.keypool is not None:
+                ephecc = client.keypool.get()  # Take a pre-generated keypair
+            else:
+                ephecc = ECC()  # Create an ephemeral keypair
             # Send the message
             message = b'KEYSHARING;' + ephecc.get_pubkey()
-            client.loop.call_soon_threadsafe(client.transport.write, message)
+            client.loop.call_soon_threadsafe(client.write, message)
         
         except Exception as exc:
             # Schedule a callback to client exception handler
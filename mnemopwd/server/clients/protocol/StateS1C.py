@@ -57,14 +57,14 @@ class StateS1C:
 
             if challenge == challenge_bis:
                 # Send challenge accepted
-                client.loop.call_soon_threadsafe(client.transport.write, b'OK')
+                client.loop.call_soon_threadsafe(client.write, b'OK')
             else:
                 # Send challenge rejected
                 msg = b'ERROR;application protocol error'
-                client.loop.call_soon_threadsafe(client.transport.write, msg)
+                client.loop.call_soon_threadsafe(client.write, msg)
                 raise Exception("challenge rejected")
 
-            logging.info('Session opened with {}'.format(client.peername))
+            logging.info('Session opened with %s', client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
@@ -59,7 +59,7 @@ class StateS1S:
 
             # Send challenge request
             message = b'CHALLENGER'
-            client.loop.call_soon_threadsafe(client.transport.write, message)
+            client.loop.call_soon_threadsafe(client.write, message)
             
         except Exception as exc:
             # Schedule a callback to client exception handler
@@ -51,7 +51,7 @@ class StateS2:
 
         if is_cd_S21 or is_cd_S22:
             # Schedule an execution of the new state
-            client.loop.run_in_executor(None, client.state.do, client, data)
+            client.execute(data)
         else:
             # Schedule a callback to client exception handler
             client.loop.call_soon_threadsafe(
@@ -66,7 +66,7 @@ class StateS21(StateSCC):
                 # If ids are not equal
                 if id != id_from_client:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S21: incorrect id')
 
                 # Test if login exists
@@ -77,7 +77,7 @@ class StateS21(StateSCC):
                 if id == id_from_client and exist:
                     client.dbH = DBHandler(client.dbpath, filename)
                     client.loop.call_soon_threadsafe(
-                        client.transport.write, b'OK')
+                        client.write, b'OK')
                     client.state = client.states['31']
 
                 # If login is unknown
@@ -85,10 +85,10 @@ class StateS21(StateSCC):
                     ip, port = client.peername
                     client.shield.add_suspect_ip(ip)  # Suspect client ?
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S21: user account does not exist')
 
-                logging.info('Login from {}'.format(client.peername))
+                logging.info('Login from %s', client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
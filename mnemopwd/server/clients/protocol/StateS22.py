@@ -66,7 +66,7 @@ class StateS22(StateSCC):
                 # If ids are not equal
                 if id != id_from_client:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S22 incorrect id')
 
                 # Try to create a new database
@@ -76,17 +76,17 @@ class StateS22(StateSCC):
                 if result:
                     client.dbH = DBHandler(client.dbpath, filename)
                     client.loop.call_soon_threadsafe(
-                        client.transport.write, b'OK')
+                        client.write, b'OK')
                     client.state = client.states['31']  # Next state
                 else:
                     ip, port = client.peername
                     client.shield.add_suspect_ip(ip)  # Suspect client ?
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S22: user account already used')
 
-                logging.info('User account creation from {}'
-                             .format(client.peername))
+                logging.info('User account creation from %s',
+                             client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
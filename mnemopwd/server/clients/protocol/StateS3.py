@@ -66,7 +66,7 @@ class StateS3:
         if is_cd_S31 or is_cd_S32 or is_cd_S33 or is_cd_S34 or is_cd_S35 or \
                 is_cd_S36 or is_cd_S37:
             # Schedule an execution of the new state
-            client.loop.run_in_executor(None, client.state.do, client, data)
+            client.execute(data)
         else:
             # Schedule a callback to client exception handler
             client.loop.call_soon_threadsafe(
@@ -60,7 +60,7 @@ class StateS31(StateSCC):
 
                 if result is False:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S31 wrong configuration {}'
                                     .format(config.decode()))
 
@@ -70,24 +70,24 @@ class StateS31(StateSCC):
                         # Send result value
                         msg = b'OK;' + b'1'
                         client.loop.call_soon_threadsafe(
-                            client.transport.write, msg)
+                            client.write, msg)
 
                     if result == 2:
                         if client.update_crypto():  # Re-do encryption
                             # Send result value
                             msg = b'OK;' + b'2'
                             client.loop.call_soon_threadsafe(
-                                client.transport.write, msg)
+                                client.write, msg)
                         else:
                             msg = b'ERROR;application protocol error'
                             client.loop.call_soon_threadsafe(
-                                client.transport.write, msg)
+                                client.write, msg)
                             raise Exception('S31 operation aborted')
 
                     client.state = client.states['3']  # New client state
 
-                    logging.info('Configuration done from {}'
-                                 .format(client.peername))
+                    logging.info('Configuration done from %s',
+                                 client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
@@ -58,7 +58,7 @@ class StateS32(StateSCC):
 
                 # Send number of blocks
                 msg = b'OK;' + str(len(tabsibs)).encode()
-                client.loop.call_soon_threadsafe(client.transport.write, msg)
+                client.loop.call_soon_threadsafe(client.write, msg)
 
                 # Send sib one by one
                 for i, sib in tabsibs:
@@ -67,7 +67,7 @@ class StateS32(StateSCC):
                     lpsib = str(len(psib)).encode()
                     # Send message
                     msg = b';SIB;' + si + b';' + lpsib + b';' + psib
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     # Wait for sending the message
                     coro = asyncio.sleep(0.005, loop=client.loop)
                     future = asyncio.run_coroutine_threadsafe(coro, client.loop)
@@ -75,8 +75,8 @@ class StateS32(StateSCC):
 
                 client.state = client.states['3']  # New client state
 
-                logging.info('Exporting [{} blocks] to {}'
-                             .format(len(tabsibs), client.peername))
+                logging.info('Exporting [%s blocks] to %s',
+                             len(tabsibs), client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
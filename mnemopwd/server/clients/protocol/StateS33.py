@@ -65,7 +65,7 @@ class StateS33(StateSCC):
                 # If ids are not equal
                 if id != id_from_client:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('incorrect id')
 
                 # Test if login exists
@@ -75,27 +75,29 @@ class StateS33(StateSCC):
                 # If login is unknown
                 if not exist:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('user account does not exist')
 
-                logging.info('User account deletion request from {}'
-                             .format(client.peername))
+                logging.info('User account deletion request from %s',
+                             client.peername)
 
                 # If login is OK try to delete database file
                 result = DBHandler.delete(client.dbpath, filename)
 
                 # If database file has been deleted close connection with client
                 if result:
+                    if client.keycache is not None:
+                        client.keycache.invalidate(filename)  # Forget keys
                     client.loop.call_soon_threadsafe(
-                        client.transport.write, b'OK')
+                        client.write, b'OK')
                     client.loop.call_soon_threadsafe(client.transport.close)
-                    logging.warning('User account {} deletion from {}'
-                                    .format(filename, client.peername))
+                    logging.warning('User account %s deletion from %s',
+                                    filename, client.peername)
 
                 # If deletion has failed for some reason
                 else:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('deletion rejected')
 
         except Exception as exc:
@@ -62,7 +62,7 @@ class StateS34(StateSCC):
 
                 # Send number of blocks
                 msg = b'OK;' + str(len(tabsibs)).encode()
-                client.loop.call_soon_threadsafe(client.transport.write, msg)
+                client.loop.call_soon_threadsafe(client.write, msg)
 
                 for i, sib in tabsibs:
                     si = str(i).encode()
@@ -70,7 +70,7 @@ class StateS34(StateSCC):
                     lpsib = str(len(psib)).encode()
                     # Send sib
                     msg = b';SIB;' + si + b';' + lpsib + b';' + psib
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     # Wait for sending the message
                     coro = asyncio.sleep(0.005, loop=client.loop)
                     future = asyncio.run_coroutine_threadsafe(coro, client.loop)
@@ -78,8 +78,8 @@ class StateS34(StateSCC):
 
                 client.state = client.states['3']  # New client state
 
-                logging.info('Searching blocks [{} found] from {}'
-                             .format(len(tabsibs), client.peername))
+                logging.info('Searching blocks [%s found] from %s',
+                             len(tabsibs), client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
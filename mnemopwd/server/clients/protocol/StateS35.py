@@ -61,7 +61,7 @@ class StateS35(StateSCC):
                 except AssertionError:
                     # Send an error message
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S35 data rejected')
 
                 else:
@@ -69,10 +69,10 @@ class StateS35(StateSCC):
                     index = client.dbH.add_data(sib)
                     # Send index value
                     msg = b'OK;' + (str(index)).encode()
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     client.state = client.states['3']  # New client state
 
-                    logging.info('New block from {}'.format(client.peername))
+                    logging.info('New block from %s', client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
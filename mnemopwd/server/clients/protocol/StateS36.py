@@ -59,14 +59,14 @@ class StateS36(StateSCC):
                 if result:
                     # Send 'OK' message
                     client.loop.call_soon_threadsafe(
-                        client.transport.write, b'OK')
+                        client.write, b'OK')
                     client.state = client.states['3']  # New client state
                 else:
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('index rejected')
 
-                logging.info('Delete block from {}'.format(client.peername))
+                logging.info('Delete block from %s', client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
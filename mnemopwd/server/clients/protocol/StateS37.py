@@ -64,7 +64,7 @@ class StateS37(StateSCC):
                 except AssertionError:
                     # Send an error message
                     msg = b'ERROR;application protocol error'
-                    client.loop.call_soon_threadsafe(client.transport.write, msg)
+                    client.loop.call_soon_threadsafe(client.write, msg)
                     raise Exception('S37 data rejected')
 
                 else:
@@ -74,15 +74,15 @@ class StateS37(StateSCC):
                     if result:
                         # Send 'OK' message
                         client.loop.call_soon_threadsafe(
-                            client.transport.write, b'OK')
+                            client.write, b'OK')
                         client.state = client.states['3']  # New client state
                     else:
                         msg = b'ERROR;application protocol error'
                         client.loop.call_soon_threadsafe(
-                            client.transport.write, msg)
+                            client.write, msg)
                         raise Exception('S37 index rejected')
 
-                    logging.info('Update block from {}'.format(client.peername))
+                    logging.info('Update block from %s', client.peername)
 
         except Exception as exc:
             # Schedule a callback to client exception handler
@@ -52,7 +52,7 @@ class StateSCC:
             if challenge != challenge_bis:
                 # Send challenge rejected
                 msg = b'ERROR;application protocol error'
-                client.loop.call_soon_threadsafe(client.transport.write, msg)
+                client.loop.call_soon_threadsafe(client.write, msg)
                 raise Exception(var.decode() + " challenge rejected")
             
         except Exception as exc:
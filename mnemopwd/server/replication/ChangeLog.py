@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Ordered log of the committed database changes.
+
+Each change is a record with a log sequence number (LSN):
+    header (struct '!QBHHI'): lsn, operation, filename size, key size,
+                              value size
+    filename, key (utf-8) and value (bytes)
+
+Operations:
+- NEW: account creation (filename)
+- DROP: account deletion (filename)
+- SET: item stored (filename, key, pickled value as stored in the shelf)
+- DEL: item deleted (filename, key)
+- SNAPSHOT: start of a snapshot (value: the filenames separated by '\n')
+- RENAME: account replaced by another one (filename, key: the account
+  replaced)
+
+The log is stored in a file; when it exceeds its maximum size it becomes
+the previous log (suffix '.1') and a new file is started. A standby behind
+the first available LSN needs a snapshot.
+"""
+
+import os
+import struct
+import threading
+
+
+class ChangeLog:
+    """
+    Change log
+
+    Attribute(s):
+    - filename: the log file
+    - maxsize: maximum size of the log file before rotation
+    - position: the LSN of the last change
+    - listeners: list of callables notified (lsn, record) by each change
+
+    Method(s):
+    - encode: static method returning an encoded record
+    - decode: static method returning the records decoded from a buffer
+    - append: log a new change and return its LSN
+    - available: test if all changes after a LSN are in the log
+    - records: return the encoded records after a LSN and the last LSN
+    - close: close the log file
+    """
+
+    NEW, DROP, SET, DEL, SNAPSHOT, RENAME = range(1, 7)  # Operations
+
+    header = struct.Struct('!QBHHI')
+
+    def __init__(self, filename, maxsize):
+        """Object initialization"""
+        self.filename = filename
+        self.maxsize = maxsize
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.position = 0
+        for name in (filename + '.1', filename):
+            if os.path.exists(name):
+                with open(name, 'rb') as file:
+                    records, rest = ChangeLog.decode(file.read())
+                if records:
+                    self.position = records[-1][0]
+        self.file = open(filename, 'ab')
+        os.chmod(filename, 0o600)
+
+    @staticmethod
+    def encode(lsn, operation, filename, key='', value=b''):
+        """Return an encoded record"""
+        filename, key = filename.encode(), key.encode()
+        return ChangeLog.header.pack(lsn, operation, len(filename), len(key),
+                                     len(value)) + filename + key + value
+
+    @staticmethod
+    def decode(data):
+        """Return the list of the records (lsn, operation, filename, key,
+        value) decoded from data and the remaining incomplete bytes"""
+        records = []
+        start, size = 0, ChangeLog.header.size
+        while len(data) - start >= size:
+            lsn, operation, lfilename, lkey, lvalue = \
+                ChangeLog.header.unpack_from(data, start)
+            end = start + size + lfilename + lkey + lvalue
+            if end > len(data):
+                break
+            i = start + size
+            records.append((lsn, operation,
+                            data[i:i + lfilename].decode(),
+                            data[i + lfilename:i + lfilename + lkey].decode(),
+                            data[i + lfilename + lkey:end]))
+            start = end
+        return records, data[start:]
+
+    def append(self, operation, filename, key='', value=b''):
+        """Log a change and return its LSN"""
+        with self.lock:
+            lsn = self.position + 1
+            record = ChangeLog.encode(lsn, operation, filename, key, value)
+            self.file.write(record)
+            self.file.flush()
+            self.position = lsn
+            if self.file.tell() > self.maxsize:
+                self.file.close()
+                os.replace(self.filename, self.filename + '.1')
+                self.file = open(self.filename, 'ab')
+                os.chmod(self.filename, 0o600)
+            for listener in self.listeners:
+                listener(lsn, record)  # In LSN order
+        return lsn
+
+    def _read(self):
+        """Return the content of the log files and the LSN of the last
+        change"""
+        with self.lock:
+            self.file.flush()
+            data = b''
+            for name in (self.filename + '.1', self.filename):
+                if os.path.exists(name):
+                    with open(name, 'rb') as file:
+                        data += file.read()
+            return data, self.position
+
+    def available(self, lsn):
+        """Return True if all the changes after lsn are in the log"""
+        if lsn == self.position:
+            return True
+        if lsn > self.position:
+            return False  # Log lost or reset
+        data = self._read()[0]
+        if len(data) < ChangeLog.header.size:
+            return False
+        return ChangeLog.header.unpack_from(data)[0] <= lsn + 1
+
+    def records(self, lsn):
+        """Return the encoded records after lsn and the LSN of the last
+        one"""
+        data, position = self._read()
+        start, size = 0, ChangeLog.header.size
+        while len(data) - start >= size:
+            rlsn, _, lfilename, lkey, lvalue = \
+                ChangeLog.header.unpack_from(data, start)
+            if rlsn > lsn:
+                return data[start:], position
+            start += size + lfilename + lkey + lvalue
+        return b'', max(lsn, position)
+
+    def close(self):
+        """Close the log file"""
+        with self.lock:
+            self.file.close()
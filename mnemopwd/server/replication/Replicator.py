@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Primary side of the replication.
+
+The replicator connects to the local socket of the standby which answers
+with the LSN of its last applied change. The replicator sends the missing
+changes (the log tail if the log still has them, a snapshot of all the
+accounts followed by the log tail otherwise) then streams each new change.
+The connection is retried while the standby is unreachable.
+"""
+
+import asyncio
+import dbm
+import logging
+import os
+
+from .ChangeLog import ChangeLog
+from ..clients.DBAccess import DBAccess
+
+
+class Replicator(asyncio.Protocol):
+    """
+    Replicator of the database changes
+
+    Attribute(s):
+    - loop: the i/o asynchronous loop
+    - changelog: the log of the database changes
+    - path: the database directory
+    - socket: the local socket of the standby
+    - retry: delay (seconds) between two connection attempts
+    - transport: the connection with the standby (None if not connected)
+    - sent: the LSN of the last change sent (None before the catch-up)
+    - pending: the new changes waiting for the end of the catch-up
+
+    Method(s):
+    - start: start the replication
+    - stop: stop the replication
+    - lag: return the number of changes not yet sent
+    """
+
+    def __init__(self, loop, changelog, path, socket, retry=5.0):
+        """Object initialization"""
+        self.loop = loop
+        self.changelog = changelog
+        self.path = path
+        self.socket = socket
+        self.retry = retry
+        self.running = False
+        self.handle = None  # The next connection attempt
+        self.transport = None
+        self.sent = None
+        self.pending = None
+        self.buffer = None
+
+    # Connection management
+
+    def _connect(self):
+        """Try to connect to the standby"""
+        self.handle = None
+        if self.running and self.transport is None:
+            task = asyncio.ensure_future(self.loop.create_unix_connection(
+                lambda: self, self.socket), loop=self.loop)
+            task.add_done_callback(self._connected)
+
+    def _connected(self, future):
+        """Retry later if the connection failed"""
+        if future.cancelled() or future.exception() is not None:
+            if self.running:
+                self.handle = self.loop.call_later(self.retry, self._connect)
+
+    def connection_made(self, transport):
+        """Wait for the LSN of the standby"""
+        self.transport = transport
+        self.buffer = b''
+        self.sent = None
+        self.pending = []  # New changes are kept until the catch-up end
+
+    def data_received(self, data):
+        """Start the catch-up when the LSN of the standby is received"""
+        if self.buffer is None:
+            return  # Catch-up started: the standby has nothing more to say
+        self.buffer += data
+        if b'\n' in self.buffer:
+            lsn = int(self.buffer.split(b'\n', 1)[0])
+            self.buffer = None
+            logging.info('Standby connected at LSN %d (primary at LSN %d)',
+                         lsn, self.changelog.position)
+            future = self.loop.run_in_executor(None, self._catch_up, lsn)
+            future.add_done_callback(self._caught_up)
+
+    def connection_lost(self, exc):
+        """Retry the connection later"""
+        if self.transport is not None:
+            logging.warning('Standby disconnected at LSN %s', self.sent)
+        self.transport = None
+        self.sent = None
+        self.pending = None
+        if self.running:
+            self.handle = self.loop.call_later(self.retry, self._connect)
+
+    # Catch-up
+
+    def _snapshot(self):
+        """Return the encoded records of a snapshot of all the accounts
+        and the LSN of the snapshot"""
+        lsn = self.changelog.position  # Later changes are sent again
+        names = sorted(name[:-3] for name in os.listdir(self.path)
+                       if name.endswith('.db'))
+        records = [ChangeLog.encode(lsn, ChangeLog.SNAPSHOT, '', '',
+                                    '\n'.join(names).encode())]
+        for name in names:
+            dbfile = self.path + '/' + name
+            with DBAccess.getLock(dbfile):
+                try:
+                    with dbm.open(dbfile, 'r') as db:
+                        items = [(key, db[key]) for key in db.keys()]
+                except dbm.error:
+                    continue  # Deleted meanwhile
+            records.append(ChangeLog.encode(lsn, ChangeLog.NEW, name))
+            for key, value in items:
+                records.append(ChangeLog.encode(lsn, ChangeLog.SET, name,
+                                                key.decode(), value))
+        logging.info('Snapshot of %d accounts at LSN %d', len(names), lsn)
+        return b''.join(records), lsn
+
+    def _catch_up(self, lsn):
+        """Return the encoded missing changes and the LSN of the last one"""
+        if self.changelog.available(lsn):
+            return self.changelog.records(lsn)
+        snapshot, lsn = self._snapshot()
+        records, lsn = self.changelog.records(lsn)
+        return snapshot + records, lsn
+
+    def _caught_up(self, future):
+        """Send the missing changes then the new ones"""
+        if self.transport is None:
+            return  # Disconnected during the catch-up
+        if future.exception() is not None:
+            logging.error('Replication catch-up failed: %s', future.exception())
+            self.transport.close()
+            return
+        data, self.sent = future.result()
+        self.transport.write(data)
+        for lsn, record in self.pending:
+            self._push(lsn, record)
+        self.pending = None
+
+    # Streaming
+
+    def _listener(self, lsn, record):
+        """Called by the change log (by any thread) for each new change"""
+        self.loop.call_soon_threadsafe(self._push, lsn, record)
+
+    def _push(self, lsn, record):
+        """Send a new change to the standby"""
+        if self.transport is None:
+            return
+        if self.sent is None:
+            if self.pending is not None:
+                self.pending.append((lsn, record))  # Catch-up in progress
+        elif lsn > self.sent:
+            self.transport.write(record)
+            self.sent = lsn
+
+    # Extern methods
+
+    def start(self):
+        """Start the replication"""
+        self.running = True
+        self.changelog.listeners.append(self._listener)
+        self._connect()
+
+    def stop(self):
+        """Stop the replication"""
+        self.running = False
+        if self._listener in self.changelog.listeners:
+            self.changelog.listeners.remove(self._listener)
+        if self.handle is not None:
+            self.handle.cancel()
+        if self.transport is not None:
+            self.transport.close()
+
+    def lag(self):
+        """Return the number of changes not yet sent to the standby"""
+        if self.sent is None:
+            return self.changelog.position
+        return self.changelog.position - self.sent
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Standby side of the replication.
+
+The standby listens on a local socket for the primary server. At each
+connection it sends the LSN of its last applied change then applies the
+changes received to the replica directory. On promotion (SIGUSR1) it stops
+and the process serves the replica directory as the primary server.
+"""
+
+import asyncio
+import dbm
+import logging
+import os
+import signal
+
+from .ChangeLog import ChangeLog
+from ..clients.DBHandler import DBHandler
+from ..util.Configuration import Configuration
+from ...common.util.LoopPolicy import set_loop_policy
+
+
+class StandbyProtocol(asyncio.Protocol):
+    """Connection with the primary server"""
+
+    def __init__(self, standby):
+        """Object initialization"""
+        self.standby = standby
+        self.transport = None
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        """Send the LSN of the last applied change"""
+        self.transport = transport
+        self.standby.connections.add(self)
+        transport.write('{}\n'.format(self.standby.position).encode())
+        logging.info('Primary connected (standby at LSN %d)',
+                     self.standby.position)
+
+    def data_received(self, data):
+        """Apply the complete records received"""
+        records, self.buffer = ChangeLog.decode(self.buffer + data)
+        if records:
+            try:
+                self.standby.apply(records)
+            except Exception as exc:
+                # A snapshot will be asked at the next connection
+                logging.error('Replication failed: %s', exc)
+                self.standby.save_position(0)
+                self.transport.close()
+
+    def connection_lost(self, exc):
+        """Wait for the next connection"""
+        self.standby.connections.discard(self)
+        logging.warning('Primary disconnected (standby at LSN %d)',
+                        self.standby.position)
+
+
+class Standby:
+    """
+    Standby server
+
+    Attribute(s):
+    - loop: the i/o asynchronous loop
+    - path: the replica directory
+    - position: the LSN of the last applied change
+    - connections: the connections with the primary server
+
+    Method(s):
+    - apply: apply a list of changes to the replica directory
+    - save_position: store the LSN of the last applied change
+    - listen: create the local socket of the primary server
+    - start: serve the primary server until the promotion
+    - promote: stop the replication
+    """
+
+    def __init__(self):
+        """Initialization"""
+        policy = set_loop_policy(Configuration.looppolicy)
+        self.loop = asyncio.get_event_loop()
+        logging.info("Event loop policy: {}".format(policy))
+        self.path = Configuration.standby_path
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, mode=0o700)
+        self.connections = set()
+        self.position = 0
+        try:
+            with open(self.path + '/replication.lsn') as file:
+                self.position = int(file.read())
+        except (OSError, ValueError):
+            pass  # A snapshot is needed
+
+    def save_position(self, lsn):
+        """Store the LSN of the last applied change"""
+        self.position = lsn
+        filename = self.path + '/replication.lsn'
+        with open(filename + '.tmp', 'w') as file:
+            file.write(str(lsn))
+        os.replace(filename + '.tmp', filename)
+
+    def apply(self, records):
+        """Apply a list of changes"""
+        databases = dict()  # Opened account databases
+        try:
+            for lsn, operation, filename, key, value in records:
+                if operation in (ChangeLog.SET, ChangeLog.DEL):
+                    db = databases.get(filename)
+                    if db is None:
+                        db = dbm.open(self.path + '/' + filename, 'w')
+                        databases[filename] = db
+                    if operation == ChangeLog.SET:
+                        db[key.encode()] = value
+                    elif key.encode() in db:
+                        del db[key.encode()]
+                else:
+                    for db in databases.values():
+                        db.close()
+                    databases.clear()
+                    if operation == ChangeLog.NEW:
+                        DBHandler.new(self.path, filename)
+                    elif operation == ChangeLog.DROP:
+                        if DBHandler.exist(self.path, filename):
+                            DBHandler.delete(self.path, filename)
+                    elif operation == ChangeLog.RENAME:
+                        if DBHandler.exist(self.path, filename):
+                            DBHandler.rename(self.path, filename, key)
+                    elif operation == ChangeLog.SNAPSHOT:
+                        for name in os.listdir(self.path):
+                            if name.endswith('.db'):
+                                DBHandler.delete(self.path, name[:-3])
+                        logging.info('Snapshot received at LSN %d', lsn)
+                self.position = lsn
+        finally:
+            for db in databases.values():
+                db.close()
+        self.save_position(self.position)
+
+    def listen(self, socket):
+        """Create the local socket of the primary server (only the user
+        can connect to it, even just after its creation)"""
+        if os.path.exists(socket):
+            os.unlink(socket)  # Stale socket
+        umask = os.umask(0o177)  # Socket created with 0600 permissions
+        try:
+            return self.loop.run_until_complete(self.loop.create_unix_server(
+                lambda: StandbyProtocol(self), socket))
+        finally:
+            os.umask(umask)
+
+    def start(self):
+        """Serve the primary server until the promotion"""
+        socket = Configuration.replication_socket
+        server = self.listen(socket)
+        self.loop.add_signal_handler(signal.SIGUSR1, self.promote)
+        logging.info('Standby started in {} at LSN {}'
+                     .format(self.path, self.position))
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.remove_signal_handler(signal.SIGUSR1)
+            server.close()
+            for connection in list(self.connections):
+                connection.transport.close()
+            if os.path.exists(socket):
+                os.unlink(socket)
+
+    def promote(self):
+        """Stop the replication"""
+        logging.warning('Standby promoted at LSN %d', self.position)
+        self.loop.stop()
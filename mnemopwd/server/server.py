@@ -30,9 +30,24 @@ import asyncio
 import socket
 import ssl
 import concurrent.futures
+import sys
+import os
+import signal
 from .util.Configuration import Configuration
+from ..common.util.LoopPolicy import set_loop_policy
 from .clients.BruteForceShield import BruteForceShield
+from .clients.AdmissionControl import AdmissionControl
+from .clients.EphemeralKeyPool import EphemeralKeyPool
+from .clients.KeyHandlerCache import KeyHandlerCache
+from .util.TimerWheel import TimerWheel
+from .util.Metrics import Metrics, MetricsProtocol
+from .util.QueueLogging import dropped_records
+from ..common.util.Profiler import Profiler
+from ..common.KeyHandler import KeyHandler
 from .clients.ClientHandler import ClientHandler
+from .clients.DBHandler import DBHandler
+from .replication.ChangeLog import ChangeLog
+from .replication.Replicator import Replicator
 
 """
 Server part of Mnemopwd application.
@@ -47,9 +62,19 @@ class Server:
     Attribute(s):
     - loop : an i/o asynchronous loop (see the official python asyncio module)
     - server : a SSL/TLS asynchronous socket server (see the python ssl module)
+    - context : the SSL context of the server
+    - shield : the brute-force attack shield
+    - admission : the admission controller of new connections
+    - timers : the timer wheel of session timeouts
+    - keypool : the pool of pre-generated ephemeral keypairs
+    - keycache : the cache of KeyHandler objects
+    - metrics : the servers of the local metrics endpoints
+    - profiler : the profiler of protocol states (None if disabled)
+    - replicator : the replicator of the database changes (None if disabled)
     
     Method(s):
     - start : start the server
+    - reload : reload the configuration file
     - stop : close the server
     """
     
@@ -64,7 +89,9 @@ class Server:
         logging.info("--------------------------------------------------------")
         
         # Create an i/o asynchronous loop
+        policy = set_loop_policy(Configuration.looppolicy)
         self.loop = asyncio.get_event_loop()
+        logging.info("Event loop policy: {}".format(policy))
         self.loop.set_debug(Configuration.loglevel == 'DEBUG')
         
         # Create and set an executor
@@ -72,9 +99,72 @@ class Server:
         self.loop.set_default_executor(executor)
 
         # Create a brute-force shield
-        shield = BruteForceShield()
+        self.shield = BruteForceShield(Configuration.shield_prefix)
+        self.shield.load(Configuration.shieldfile)
 
-        # Create a SSL context
+        # Create an admission controller
+        self.admission = AdmissionControl(executor)
+
+        # Create a timer wheel for session timeouts
+        self.timers = TimerWheel(self.loop)
+
+        # Create a pool of ephemeral keypairs
+        self.keypool = EphemeralKeyPool(Configuration.keypool_size,
+                                        Configuration.keypool_low)
+
+        # Create a profiler of protocol states
+        self.profiler = self._create_profiler()
+
+        # Create a cache of KeyHandler objects
+        self.keycache = KeyHandlerCache(Configuration.keycache_size,
+                                        Configuration.keycache_ttl)
+
+        # Create a pool of threads for the fields of blocks
+        KeyHandler.executor = self._create_cryptoexecutor()
+
+        # Replicate the database changes to a standby (not if promoted)
+        self.replicator = None
+        if Configuration.replication_socket != 'None' and \
+                Configuration.action != 'standby':
+            DBHandler.changelog = ChangeLog(
+                Configuration.dbpath + '/changes.log',
+                Configuration.replication_logmb * 1024 * 1024)
+            self.replicator = Replicator(self.loop, DBHandler.changelog,
+                                         Configuration.dbpath,
+                                         Configuration.replication_socket)
+
+        # Create a SSL context (replaced on reload for new connections)
+        self.context = self._create_context()
+        if hasattr(self.context, 'sni_callback'):
+            self.context.sni_callback = self._select_context
+
+        # Create an asynchronous SSL server
+        kwargs = {}
+        if sys.version_info >= (3, 7) and Configuration.handshake_timeout > 0:
+            kwargs['ssl_handshake_timeout'] = Configuration.handshake_timeout
+        coro = self.loop.create_server(
+            lambda: ClientHandler(self.loop, Configuration.dbpath, self.shield,
+                                  self.admission, self.timers, self.keypool,
+                                  self.keycache, self.profiler),
+            Configuration.host, Configuration.port, family=socket.AF_INET,
+            backlog=100, ssl=self.context, reuse_address=False, **kwargs)
+        self.server = self.loop.run_until_complete(coro)
+
+        # Create the local metrics endpoints
+        self.metrics = []
+        self._start_metrics()
+
+        # Reload the configuration on SIGHUP
+        self.loop.add_signal_handler(signal.SIGHUP, self.reload)
+
+    @staticmethod
+    def _create_context(tlscurve=None, tlstickets=None):
+        """Create a SSL context from the configuration (or from the TLS
+        settings given)"""
+        if tlscurve is None:
+            tlscurve = Configuration.tlscurve
+        if tlstickets is None:
+            tlstickets = Configuration.tlstickets
         context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
         context.options |= ssl.OP_NO_SSLv2  # SSL v2 not allowed
         context.options |= ssl.OP_NO_SSLv3  # SSL v3 not allowed
@@ -82,29 +172,169 @@ class Server:
         context.options |= ssl.OP_CIPHER_SERVER_PREFERENCE  # server order
         context.verify_mode = ssl.CERT_OPTIONAL  # Optional client certificate
         context.check_hostname = False  # Don't check hostname
+        if not tlstickets:
+            context.options |= ssl.OP_NO_TICKET  # Only server session cache
         if ssl.HAS_ECDH: 
             context.options |= ssl.OP_SINGLE_ECDH_USE  # ECDH key per session
-            context.set_ecdh_curve('sect409k1')  # Why not ?
+            if tlscurve != 'auto':
+                context.set_ecdh_curve(tlscurve)
         if Configuration.certfile == 'None' and Configuration.keyfile == 'None':
             context.set_ciphers('AECDH-AES256-SHA')  # Use only ECDH-anon
         elif Configuration.certfile != 'None' and \
                 Configuration.keyfile != 'None':
             context.load_cert_chain(certfile=Configuration.certfile,
                                     keyfile=Configuration.keyfile)
-        
-        # Create an asynchronous SSL server
-        coro = self.loop.create_server(
-            lambda: ClientHandler(self.loop, Configuration.dbpath, shield),
-            Configuration.host, Configuration.port, family=socket.AF_INET,
-            backlog=100, ssl=context, reuse_address=False)
-        self.server = self.loop.run_until_complete(coro)
-        
+        return context
+
+    def _select_context(self, ssl_object, server_name, context):
+        """Switch a new connection to the current SSL context (the
+        listening socket keeps the context given at its creation)"""
+        if context is not self.context:
+            ssl_object.context = self.context
+
+    def _create_profiler(self):
+        """Create the profiler of protocol states (None if disabled)"""
+        if Configuration.profile:
+            return Profiler(Configuration.profile_threshold,
+                            Configuration.profile_sample,
+                            Configuration.profile_memory == 1)
+
+    @staticmethod
+    def _create_cryptoexecutor():
+        """Create the pool of threads used by KeyHandler batch methods
+        (None if disabled). Distinct from the pool executing the states
+        since a state waits for the batches"""
+        if Configuration.cryptopoolsize > 0:
+            return concurrent.futures.ThreadPoolExecutor(
+                Configuration.cryptopoolsize)
+
+    def _start_metrics(self):
+        """Register metrics computed by callbacks and open the endpoints"""
+        Metrics.enabled = Configuration.metrics_socket != 'None' or \
+            Configuration.metrics_port > 0  # Nothing to measure otherwise
+        Metrics.register('mnemopwd_executor_queue', self.admission.queue_depth)
+        Metrics.register('mnemopwd_shield_suspects',
+                         lambda: self.shield.statistics()[0])
+        Metrics.register('mnemopwd_shield_banished',
+                         lambda: self.shield.statistics()[1])
+        Metrics.register('mnemopwd_log_dropped', dropped_records)
+        if self.replicator is not None:
+            Metrics.register('mnemopwd_replication_lag', self.replicator.lag)
+        Metrics.register('mnemopwd_connections_rejected_total', lambda: {
+            (('reason', reason),): number
+            for reason, number in self.admission.rejected.items()})
+
+        if Configuration.metrics_socket != 'None':
+            if os.path.exists(Configuration.metrics_socket):
+                os.unlink(Configuration.metrics_socket)  # Stale socket
+            coro = self.loop.create_unix_server(
+                lambda: MetricsProtocol(self.loop), Configuration.metrics_socket)
+            self.metrics.append(self.loop.run_until_complete(coro))
+            os.chmod(Configuration.metrics_socket, 0o600)
+        if Configuration.metrics_port > 0:
+            coro = self.loop.create_server(
+                lambda: MetricsProtocol(self.loop), '127.0.0.1',
+                Configuration.metrics_port)
+            self.metrics.append(self.loop.run_until_complete(coro))
+
     # Extern methods
+
+    def reload(self):
+        """
+        Reload the configuration file and apply the changes without closing
+        the sessions. Return the list of the settings needing a restart.
+        """
+        try:
+            changes = Configuration.reload()
+        except ValueError as exc:
+            logging.error('Configuration not reloaded: %s', exc)
+            return []
+
+        if 'poolsize' in changes:
+            # New tasks go to the new executor, the old one ends its tasks
+            executor = concurrent.futures.ThreadPoolExecutor(
+                Configuration.poolsize)
+            self.loop.set_default_executor(executor)
+            self.admission.executor, old = executor, self.admission.executor
+            old.shutdown(wait=False)
+
+        if 'loglevel' in changes:
+            logging.getLogger().setLevel(Configuration.loglevel)
+            self.loop.set_debug(Configuration.loglevel == 'DEBUG')
+
+        if 'shield_prefix' in changes:
+            self.shield.set_prefix(Configuration.shield_prefix)
+
+        if 'keypool_size' in changes or 'keypool_low' in changes:
+            with self.keypool.condition:
+                self.keypool.size = Configuration.keypool_size
+                self.keypool.low = min(Configuration.keypool_low,
+                                       Configuration.keypool_size)
+                self.keypool.condition.notify()
+            if Configuration.keypool_size > 0:
+                self.keypool.start()  # If the pool was disabled
+            else:
+                self.keypool.stop()
+
+        if 'keycache_size' in changes or 'keycache_ttl' in changes:
+            self.keycache.clear()
+            self.keycache.size = Configuration.keycache_size
+            self.keycache.ttl = Configuration.keycache_ttl
+
+        if 'cryptopoolsize' in changes:
+            executor, old = self._create_cryptoexecutor(), KeyHandler.executor
+            KeyHandler.executor = executor
+            if old is not None:
+                old.shutdown(wait=False)
+
+        if {'profile', 'profile_threshold', 'profile_sample',
+                'profile_memory'} & set(changes):
+            self.profiler = self._create_profiler()
+
+        restart = ['host', 'port', 'dbpath', 'looppolicy', 'pidfile',
+                   'logfile', 'logmaxmb', 'logbackups', 'logqueue',
+                   'logqueuesize', 'metrics_socket', 'metrics_port',
+                   'tlscurve', 'tlstickets', 'replication_socket',
+                   'replication_logmb', 'standby_path', 'standby_pidfile']
+        if 'certfile' in changes or 'keyfile' in changes:
+            # A switched context only brings its certificate and its key
+            # (not its ciphers) so the anonymous mode needs a restart
+            certfile = changes.get('certfile', (Configuration.certfile,))[0]
+            if certfile == 'None' or Configuration.certfile == 'None' or \
+                    not hasattr(self.context, 'sni_callback'):
+                restart += ['certfile', 'keyfile']
+            else:
+                try:
+                    # New certificate with the TLS settings in use
+                    self.context = self._create_context(
+                        changes.get('tlscurve', (Configuration.tlscurve,))[0],
+                        changes.get('tlstickets',
+                                    (Configuration.tlstickets,))[0])
+                except (ssl.SSLError, OSError) as exc:
+                    logging.error('Certificate not reloaded: %s', exc)
+                    restart += ['certfile', 'keyfile']
+
+        for name, (old, new) in sorted(changes.items()):
+            logging.info('Configuration %s changed: %s -> %s', name, old, new)
+        restart = sorted(name for name in restart if name in changes)
+        for name in restart:
+            # Keep the value in use (e.g. dbpath of a promoted standby)
+            setattr(Configuration, name, changes[name][0])
+        if restart:
+            logging.warning('Configuration reloaded, restart needed for: %s',
+                            ', '.join(restart))
+        else:
+            logging.info('Configuration reloaded')
+        return restart
     
     def start(self):
         """Start the main loop"""
         logging.info("Server started at {}"
                      .format(self.server.sockets[0].getsockname()))
+        self.timers.start()
+        self.keypool.start()
+        if self.replicator is not None:
+            self.replicator.start()
         try:
             self.loop.run_forever()
         except (KeyboardInterrupt, SystemExit):
@@ -113,8 +343,28 @@ class Server:
         
     def stop(self):
         """Close the server and the main loop"""
+        self.timers.stop()
+        self.keypool.stop()
+        if self.replicator is not None:
+            self.replicator.stop()
+        for server in self.metrics:
+            server.close()
+        if Configuration.metrics_socket != 'None' and \
+                os.path.exists(Configuration.metrics_socket):
+            os.unlink(Configuration.metrics_socket)
         self.server.close()
         if self.loop.is_running():
             self.loop.run_until_complete(self.server.wait_closed())
         self.loop.close()
+        if DBHandler.changelog is not None:
+            DBHandler.changelog.close()
+        self.keycache.clear()
+        try:
+            self.shield.save(Configuration.shieldfile)
+        except OSError as exc:
+            logging.error('Brute-force shield not saved: {}'.format(exc))
+        logging.info("TLS sessions: {}".format(self.context.session_stats()))
+        logging.info("Admission control: {}".format(self.admission.statistics()))
+        if self.profiler is not None:
+            logging.info("Profile: {}".format(self.profiler.summary()))
         logging.info("Server closed")
@@ -36,9 +36,11 @@ The priority (from low to high) for loading configuration values is :
 
 import configparser
 import argparse
+import logging
 import os.path
 import os
 import stat
+import ssl
 
 import mnemopwd
 from ...common.util.X509 import X509
@@ -54,24 +56,45 @@ class MyParserAction(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         if option_string in ['-m', '--searchmode']:
             Configuration.search_mode = values
+            Configuration.cmdline.add('search_mode')
+        if option_string in ['--looppolicy']:
+            Configuration.looppolicy = values
+            Configuration.cmdline.add('looppolicy')
+        if option_string in ['--tlscurve']:
+            Configuration.tlscurve = values
+            Configuration.cmdline.add('tlscurve')
         if option_string in ['-s', '--poolsize']:
             Configuration.poolsize = values
+            Configuration.cmdline.add('poolsize')
         if option_string in ['-d', '--dbpath']:
             Configuration.dbpath = values
+            Configuration.cmdline.add('dbpath')
         if option_string in ['-c', '--cert']:
             Configuration.certfile = values
+            Configuration.cmdline.add('certfile')
         if option_string in ['-k', '--key']:
             Configuration.keyfile = values
+            Configuration.cmdline.add('keyfile')
         if option_string in ['-i', '--ip']:
             Configuration.host = values
+            Configuration.cmdline.add('host')
         if option_string in ['-p', '--port']:
             if values in range(Configuration.port_min, Configuration.port_max):
                 Configuration.port = int(values)
+                Configuration.cmdline.add('port')
             else:
                 parser.error("argument -p/--port: invalid choice: {} (choose between {} and {})"
                              .format(values, Configuration.port_min, Configuration.port_max))
 
 
+class ReloadParser:
+    """Parser used when reloading: an error raises a ValueError
+    instead of exiting"""
+
+    def error(self, message):
+        raise ValueError(message)
+
+
 class Configuration:
     """Configuration of the server"""
 
@@ -79,10 +102,13 @@ class Configuration:
     dbpath = os.path.expanduser('~') + '/mnemopwddata'  # Default database path
     pidfile = os.path.expanduser('~') + '/mnemopwddata/mnemopwds.pid'  # Default daemon pid file
     logfile = os.path.expanduser('~') + '/mnemopwddata/mnemopwds.log'  # Default log file
+    shieldfile = os.path.expanduser('~') + '/mnemopwddata/mnemopwds.shield'  # Default brute-force shield snapshot
     certfile = 'None'  # Default certificate X509 file
     keyfile = 'None'  # Default certificate private key file
     logmaxmb = 1  # Default logfile volume (1 => 1 MBytes)
     logbackups = 20  # Default backup logfile
+    logqueue = 1  # Default queued logging by a writer thread (0: synchronous)
+    logqueuesize = 10000  # Default maximum number of queued log records
     loglevel = 'INFO'  # Default logging level
     version = mnemopwd.__version__  # Server version
     host = getIPAddress()  # Default host
@@ -92,7 +118,32 @@ class Configuration:
     poolsize = 10  # Default pool executor size
     search_mode = 'all'  # Default search mode
     max_login = 5  # Default maximum login attempts per hour
+    looppolicy = 'default'  # Default event loop policy
+    tlscurve = 'auto'  # Default TLS key exchange curve (chosen by OpenSSL)
+    tlstickets = 1  # Default TLS session tickets use (resumption)
+    max_sessions = 500  # Default maximum concurrent sessions (0: no limit)
+    max_ip_sessions = 20  # Default maximum concurrent sessions per IP
+    max_queue = 100  # Default maximum tasks waiting in the pool executor
+    handshake_timeout = 30  # Default time to share keys and login (0: no limit)
+    idle_timeout = 600  # Default idle time of a session (0: no limit)
+    keypool_size = 20  # Default number of pre-generated ephemeral keys
+    keypool_low = 5  # Default low-water mark of the ephemeral key pool
+    keycache_size = 100  # Default number of KeyHandler cached (0: no cache)
+    keycache_ttl = 300  # Default time to live of a cached KeyHandler
+    cryptopoolsize = 0  # Default threads sharing the fields of a block (0: none)
+    shield_prefix = 32  # Default IPv4 prefix of suspect networks (32: IP)
+    metrics_socket = 'None'  # Default Unix socket of the metrics endpoint
+    metrics_port = 0  # Default localhost port of the metrics endpoint (0: none)
+    profile = 0  # Default profiling of protocol states (0: disabled)
+    profile_threshold = 1.0  # Default duration of a slow operation (seconds)
+    profile_sample = 0  # Default cProfile sampling (one state every N; 0: none)
+    profile_memory = 0  # Default memory allocation measure (0: disabled)
+    replication_socket = 'None'  # Default Unix socket of the standby (None: no replication)
+    replication_logmb = 16  # Default change log volume (16 => 16 MBytes)
+    standby_path = os.path.expanduser('~') + '/mnemopwdstandby'  # Default replica directory
+    standby_pidfile = os.path.expanduser('~') + '/mnemopwddata/mnemopwds-standby.pid'  # Default standby pid file
     action = 'status'  # Default action if not given
+    cmdline = set()  # Settings given by the command line (kept on reload)
 
     @staticmethod
     def __test_cert_key_files__(parser, certfile, keyfile):
@@ -117,6 +168,17 @@ class Configuration:
                              format(keyfile))
         return True
 
+    @staticmethod
+    def __test_tls_curve__(parser, curve):
+        """Test the TLS key exchange curve is known by OpenSSL"""
+        if curve != 'auto':
+            try:
+                ssl.SSLContext(ssl.PROTOCOL_SSLv23).set_ecdh_curve(curve)
+            except ValueError:
+                parser.error("invalid TLS curve {} (unknown by OpenSSL)"
+                             .format(curve))
+        return True
+
     @staticmethod
     def __test_dbpath__(parser, path):
         """Test existence and permissions of database directory"""
@@ -158,8 +220,9 @@ class Configuration:
         return True
 
     @staticmethod
-    def __load_config_file__(parser, fileparser):
-        """Load configuration file"""
+    def __load_config_file__(parser, fileparser, complete=True):
+        """Load configuration file (completed with the missing options
+        if 'complete' is True)"""
         try:
             fileparser.read(Configuration.configfile)
         except configparser.ParsingError:
@@ -180,6 +243,153 @@ class Configuration:
             Configuration.logmaxmb = int(fileparser['daemon']['logmaxmb'])
             Configuration.logbackups = int(fileparser['daemon']['logbackups'])
 
+            is_incomplete = False  # Flag if config. file is incomplete
+
+            try:
+                Configuration.looppolicy = fileparser['server']['looppolicy']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.tlscurve = fileparser['server']['tlscurve']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.tlstickets = int(fileparser['server']['tlstickets'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.max_sessions = int(fileparser['server']['max_sessions'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.max_ip_sessions = int(fileparser['server']['max_ip_sessions'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.max_queue = int(fileparser['server']['max_queue'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.handshake_timeout = int(fileparser['server']['handshake_timeout'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.idle_timeout = int(fileparser['server']['idle_timeout'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.keypool_size = int(fileparser['server']['keypool_size'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.keypool_low = int(fileparser['server']['keypool_low'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.keycache_size = int(fileparser['server']['keycache_size'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.keycache_ttl = int(fileparser['server']['keycache_ttl'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.cryptopoolsize = int(fileparser['server']['cryptopoolsize'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.shield_prefix = int(fileparser['server']['shield_prefix'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.shieldfile = fileparser['daemon']['shieldfile']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.logqueue = int(fileparser['daemon']['logqueue'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.logqueuesize = int(fileparser['daemon']['logqueuesize'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.replication_socket = fileparser['replication']['socket']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.replication_logmb = int(fileparser['replication']['logmb'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.standby_path = fileparser['replication']['standby_path']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.standby_pidfile = fileparser['replication']['standby_pidfile']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.metrics_socket = fileparser['server']['metrics_socket']
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.metrics_port = int(fileparser['server']['metrics_port'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile = int(fileparser['server']['profile'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_threshold = float(fileparser['server']['profile_threshold'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_sample = int(fileparser['server']['profile_sample'])
+            except KeyError:
+                is_incomplete = True
+
+            try:
+                Configuration.profile_memory = int(fileparser['server']['profile_memory'])
+            except KeyError:
+                is_incomplete = True
+
+            # Complete configuration file if necessary
+            if is_incomplete and complete:
+                Configuration.__create_config_file__(fileparser)
+                print("configuration file {} updated".
+                      format(Configuration.configfile))
+            elif is_incomplete:
+                logging.warning('Configuration file %s incomplete: '
+                                'actual values kept for the missing options',
+                                Configuration.configfile)
+
     @staticmethod
     def __create_config_file__(fileparser):
         """Method to create default configuration file"""
@@ -197,7 +407,47 @@ class Configuration:
             'loglevel': Configuration.loglevel
             + " # Values allowed: DEBUG INFO WARNING ERROR CRITICAL",
             'max_login': str(Configuration.max_login)
-            + " # Maximum login attempt per hour"
+            + " # Maximum login attempt per hour",
+            'looppolicy': Configuration.looppolicy
+            + " # Values allowed: default uvloop",
+            'tlscurve': Configuration.tlscurve
+            + " # Values allowed: auto prime256v1 secp384r1 sect409k1 etc.",
+            'tlstickets': str(Configuration.tlstickets)
+            + " # Use TLS session tickets (1) or not (0)",
+            'max_sessions': str(Configuration.max_sessions)
+            + " # Maximum concurrent sessions (0 for no limit)",
+            'max_ip_sessions': str(Configuration.max_ip_sessions)
+            + " # Maximum concurrent sessions per IP (0 for no limit)",
+            'max_queue': str(Configuration.max_queue)
+            + " # Maximum waiting tasks before refusing connections (0 for no limit)",
+            'handshake_timeout': str(Configuration.handshake_timeout)
+            + " # Seconds to share keys and login (0 for no limit)",
+            'idle_timeout': str(Configuration.idle_timeout)
+            + " # Seconds before closing an idle session (0 for no limit)",
+            'keypool_size': str(Configuration.keypool_size)
+            + " # Number of pre-generated ephemeral keys (0 for no pool)",
+            'keypool_low': str(Configuration.keypool_low)
+            + " # Refill the ephemeral key pool below this number",
+            'keycache_size': str(Configuration.keycache_size)
+            + " # Number of cryptographic handlers cached (0 for no cache)",
+            'keycache_ttl': str(Configuration.keycache_ttl)
+            + " # Seconds a cryptographic handler stays in cache",
+            'cryptopoolsize': str(Configuration.cryptopoolsize)
+            + " # Threads encrypting or decrypting the fields of blocks (0 for none)",
+            'shield_prefix': str(Configuration.shield_prefix)
+            + " # Banish IPv4 networks of this prefix length (32 for single IP)",
+            'metrics_socket': Configuration.metrics_socket
+            + " # Unix socket of the metrics endpoint (use an absolute path)",
+            'metrics_port': str(Configuration.metrics_port)
+            + " # Localhost port of the metrics endpoint (0 for none)",
+            'profile': str(Configuration.profile)
+            + " # Profile protocol states (1) or not (0)",
+            'profile_threshold': str(Configuration.profile_threshold)
+            + " # Log operations longer than this number of seconds",
+            'profile_sample': str(Configuration.profile_sample)
+            + " # Run one state every N under cProfile (0 for never)",
+            'profile_memory': str(Configuration.profile_memory)
+            + " # Measure memory allocations (1) or not (0)"
         }
         fileparser['daemon'] = {
             'pidfile': Configuration.pidfile + " # Use an absolute path",
@@ -205,13 +455,72 @@ class Configuration:
             'logmaxmb': str(Configuration.logmaxmb)
             + " # Maximum size of log file in MBytes",
             'logbackups': str(Configuration.logbackups)
-            + " # Number of backup log files"
+            + " # Number of backup log files",
+            'logqueue': str(Configuration.logqueue)
+            + " # Write logs by a dedicated thread (1) or synchronously (0)",
+            'logqueuesize': str(Configuration.logqueuesize)
+            + " # Maximum number of queued log records (beyond: dropped)",
+            'shieldfile': Configuration.shieldfile + " # Use an absolute path"
+        }
+        fileparser['replication'] = {
+            'socket': Configuration.replication_socket
+            + " # Unix socket of the standby (None for no replication)",
+            'logmb': str(Configuration.replication_logmb)
+            + " # Maximum size of the change log in MBytes",
+            'standby_path': Configuration.standby_path
+            + " # Replica directory of the standby; use an absolute path",
+            'standby_pidfile': Configuration.standby_pidfile
+            + " # Use an absolute path"
         }
         with open(Configuration.configfile, 'w') as configfile:
             fileparser.write(configfile)
         os.chmod(Configuration.configfile,
                  stat.S_IRUSR | stat.S_IWUSR | stat.S_IREAD | stat.S_IWRITE)
 
+    @staticmethod
+    def __settings__():
+        """Return the dictionary of the settings"""
+        return {name: value for name, value in vars(Configuration).items()
+                if not name.startswith('_') and not callable(value) and
+                not isinstance(value, staticmethod) and
+                name not in ('configfile', 'version', 'action', 'cmdline')}
+
+    @staticmethod
+    def reload():
+        """
+        Reload the configuration file without modifying it (the settings
+        given by the command line are kept). Return the dictionary of the
+        changed settings (name -> (old value, new value)). Raise a ValueError
+        if the file is invalid: the configuration is then left unchanged.
+        """
+        parser = ReloadParser()
+        old = Configuration.__settings__()
+        try:
+            if not Configuration.__test_config_file__(
+                    parser, Configuration.configfile):
+                raise ValueError("configuration file {} not found"
+                                 .format(Configuration.configfile))
+            fileparser = configparser.ConfigParser(inline_comment_prefixes='#')
+            Configuration.__load_config_file__(parser, fileparser, False)
+            for name in Configuration.cmdline:
+                setattr(Configuration, name, old[name])  # Command line wins
+            Configuration.__test_tls_curve__(parser, Configuration.tlscurve)
+            if Configuration.keyfile != 'None' and \
+                    Configuration.certfile != 'None':
+                Configuration.__test_cert_key_files__(
+                    parser, Configuration.certfile, Configuration.keyfile)
+                X509(Configuration.certfile).check_validity_period()
+            elif Configuration.keyfile != Configuration.certfile:
+                parser.error(
+                    "give two files (certificate file and key file) or nothing")
+        except Exception as exc:
+            for name, value in old.items():
+                setattr(Configuration, name, value)
+            raise ValueError(str(exc))
+        return {name: (old[name], value)
+                for name, value in Configuration.__settings__().items()
+                if old[name] != value}
+
     @staticmethod
     def configure():
         """
@@ -268,6 +577,20 @@ class Configuration:
             searching only on first secret information block and 'all' \
             for searching on all information", action=MyParserAction)
 
+        # Event loop policy
+        argparser.add_argument(
+            '--looppolicy', type=str, default=Configuration.looppolicy,
+            choices=['default', 'uvloop'], help="the event loop policy; \
+            'uvloop' is used only if the uvloop module is installed",
+            action=MyParserAction)
+
+        # TLS key exchange curve
+        argparser.add_argument(
+            '--tlscurve', type=str, default=Configuration.tlscurve,
+            metavar='curve', help="the curve used by the TLS key exchange; \
+            'auto' lets OpenSSL choose the fastest curve shared with the client",
+            action=MyParserAction)
+
         # Start action
         argparser.add_argument(
             '--start', action='store_const', const='start', dest='action',
@@ -278,6 +601,24 @@ class Configuration:
             '--stop', action='store_const', const='stop', dest='action',
             default=Configuration.action, help='stop the server')
 
+        # Standby action
+        argparser.add_argument(
+            '--standby', action='store_const', const='standby', dest='action',
+            default=Configuration.action,
+            help='start a standby server replicating the server')
+
+        # Promote action
+        argparser.add_argument(
+            '--promote', action='store_const', const='promote', dest='action',
+            default=Configuration.action,
+            help='promote the standby server as the server')
+
+        # Reload action
+        argparser.add_argument(
+            '--reload', action='store_const', const='reload', dest='action',
+            default=Configuration.action,
+            help='reload the configuration file of the running server')
+
         # Status action
         argparser.add_argument(
             '--status', action='store_const', const='status', dest='action',
@@ -305,6 +646,9 @@ class Configuration:
         # Verify dbpath
         Configuration.__test_dbpath__(argparser, Configuration.dbpath)
 
+        # Verify TLS key exchange curve
+        Configuration.__test_tls_curve__(argparser, Configuration.tlscurve)
+
         # Verify private key and certificate files
         if Configuration.keyfile != 'None' and Configuration.certfile != 'None':
             Configuration.__test_cert_key_files__(
@@ -41,6 +41,8 @@ import time
 import datetime
 
 from ...server.util.Configuration import Configuration
+from ...server.util.QueueLogging import KeyValueFormatter
+from ...server.util.QueueLogging import start_queue_logging, stop_queue_logging
 
 
 class Daemon(object):
@@ -57,6 +59,14 @@ class Daemon(object):
             self.stop()
         elif Configuration.action == 'status':
             self.status()
+        elif Configuration.action == 'reload':
+            self.reload()
+        elif Configuration.action == 'standby':
+            self.primary_pidfile = Configuration.pidfile
+            Configuration.pidfile = Configuration.standby_pidfile
+            self.start()
+        elif Configuration.action == 'promote':
+            self.promote()
         else:
             raise ValueError(Configuration.action)
 
@@ -76,13 +86,18 @@ class Daemon(object):
 
         try:
             self.check_pid_writable()
-            self.check_server_accessibility()
+            if Configuration.action != 'standby':
+                self.check_server_accessibility()
             self.daemonize()
         except:
             logging.exception("failed to start due to an exception")
             raise
 
         self.write_pid()
+        queued = None
+        if Configuration.logqueue == 1:
+            # Writer thread started after daemonize (threads do not survive fork)
+            queued = start_queue_logging(Configuration.logqueuesize)
         try:
             try:
                 self.run()
@@ -96,6 +111,8 @@ class Daemon(object):
                 raise
         finally:
             self.remove_pid()
+            if queued is not None:
+                stop_queue_logging(*queued)
 
     def stop(self):
         """Stop the running process"""
@@ -118,6 +135,25 @@ class Daemon(object):
         else:
             sys.exit("not running")
             
+    def reload(self):
+        """Ask the running process to reload its configuration"""
+        if Configuration.pidfile and os.path.exists(Configuration.pidfile):
+            with open(Configuration.pidfile) as file:
+                pid = int(file.read())
+            os.kill(pid, signal.SIGHUP)
+        else:
+            sys.exit("not running")
+
+    def promote(self):
+        """Ask the standby process to become the server"""
+        if Configuration.standby_pidfile and \
+                os.path.exists(Configuration.standby_pidfile):
+            with open(Configuration.standby_pidfile) as file:
+                pid = int(file.read())
+            os.kill(pid, signal.SIGUSR1)
+        else:
+            sys.exit("no standby running")
+
     def status(self):
         self.check_pid(True)
 
@@ -130,7 +166,7 @@ class Daemon(object):
         log = logging.getLogger()
         log.setLevel(Configuration.loglevel)
         handler.setFormatter(
-            logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            KeyValueFormatter("%(asctime)s %(levelname)s %(message)s"))
         log.addHandler(handler)
 
     def check_pid(self, status=False):
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Metrics of the server.
+
+The metrics are stored in a static registry and are rendered in the
+Prometheus text exposition format. Three kinds of metrics are available:
+- counters (monotonic values);
+- gauges (values set, increased or decreased, or computed by a callback
+  at rendering time);
+- histograms (distribution of observed durations).
+
+A metric can have labels given as a dictionary. The registry is used from
+the i/o asynchronous loop and from the threads of the pool executor so
+each update acquires a lock. When no endpoint exposes the metrics, the
+registry is disabled and the updates return immediately.
+
+The MetricsProtocol class exposes the metrics on a local Unix socket or on
+a localhost TCP port: an HTTP 'GET' request gets an HTTP response, any
+other request gets the raw text.
+"""
+
+import asyncio
+import threading
+import time
+import functools
+
+
+class Metrics:
+    """Static registry of the server metrics"""
+
+    buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    enabled = True  # Disabled by the server without metrics endpoint
+    lock = threading.Lock()
+    types = dict()  # name -> (type, help)
+    values = dict()  # (name, labels) -> value (counters and gauges)
+    histograms = dict()  # (name, labels) -> [bucket counters, sum, count]
+    callbacks = dict()  # name -> function returning {labels: value}
+
+    @staticmethod
+    def _labels(labels):
+        """Return a hashable form of a label dictionary"""
+        if not labels:
+            return ()
+        return tuple(sorted(labels.items()))
+
+    @staticmethod
+    def describe(name, kind, description):
+        """Declare a metric: kind is 'counter', 'gauge' or 'histogram'"""
+        Metrics.types[name] = (kind, description)
+
+    @staticmethod
+    def inc(name, value=1, labels=None):
+        """Increase a counter or a gauge"""
+        if not Metrics.enabled:
+            return
+        key = (name, Metrics._labels(labels))
+        with Metrics.lock:
+            Metrics.values[key] = Metrics.values.get(key, 0) + value
+
+    @staticmethod
+    def dec(name, value=1, labels=None):
+        """Decrease a gauge"""
+        if not Metrics.enabled:
+            return
+        Metrics.inc(name, -value, labels)
+
+    @staticmethod
+    def set(name, value, labels=None):
+        """Set a gauge"""
+        if not Metrics.enabled:
+            return
+        with Metrics.lock:
+            Metrics.values[(name, Metrics._labels(labels))] = value
+
+    @staticmethod
+    def register(name, callback):
+        """Set a callback computing a gauge at rendering time; the callback
+        returns a value or a dictionary {labels tuple: value}"""
+        Metrics.callbacks[name] = callback
+
+    @staticmethod
+    def observe(name, value, labels=None):
+        """Add an observation to a histogram"""
+        if not Metrics.enabled:
+            return
+        key = (name, Metrics._labels(labels))
+        with Metrics.lock:
+            histogram = Metrics.histograms.get(key)
+            if histogram is None:
+                histogram = [[0] * len(Metrics.buckets), 0.0, 0]
+                Metrics.histograms[key] = histogram
+            for i, bound in enumerate(Metrics.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    @staticmethod
+    def timed(name, **labels):
+        """Decorator observing the duration of a function in a histogram"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not Metrics.enabled:
+                    return function(*args, **kwargs)
+                begin = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    Metrics.observe(name, time.perf_counter() - begin, labels)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def reset():
+        """Remove all values (declarations and callbacks are kept)"""
+        with Metrics.lock:
+            Metrics.values.clear()
+            Metrics.histograms.clear()
+
+    @staticmethod
+    def _format(name, labels, value, extra=()):
+        """Format a sample line"""
+        labels = tuple(labels) + tuple(extra)
+        if labels:
+            text = ','.join('{}="{}"'.format(k, v) for k, v in labels)
+            return '{}{{{}}} {}'.format(name, text, value)
+        return '{} {}'.format(name, value)
+
+    @staticmethod
+    def render():
+        """Return all metrics in the Prometheus text format"""
+        samples = dict()  # name -> list of lines
+        with Metrics.lock:
+            for (name, labels), value in sorted(Metrics.values.items()):
+                samples.setdefault(name, []).append(
+                    Metrics._format(name, labels, value))
+            for (name, labels), (counts, total, count) in \
+                    sorted(Metrics.histograms.items()):
+                lines = samples.setdefault(name, [])
+                cumulative = 0
+                for bound, number in zip(Metrics.buckets, counts):
+                    cumulative += number
+                    lines.append(Metrics._format(
+                        name + '_bucket', labels, cumulative, (('le', bound),)))
+                lines.append(Metrics._format(
+                    name + '_bucket', labels, count, (('le', '+Inf'),)))
+                lines.append(Metrics._format(name + '_sum', labels, total))
+                lines.append(Metrics._format(name + '_count', labels, count))
+        for name, callback in sorted(Metrics.callbacks.items()):
+            try:
+                result = callback()
+            except Exception:
+                continue  # A metric must not break the rendering
+            if not isinstance(result, dict):
+                result = {(): result}
+            samples[name] = [Metrics._format(name, labels, value)
+                             for labels, value in sorted(result.items())]
+
+        text = []
+        for name in sorted(samples):
+            kind, description = Metrics.types.get(name, ('untyped', ''))
+            if description:
+                text.append('# HELP {} {}'.format(name, description))
+            text.append('# TYPE {} {}'.format(name, kind))
+            text.extend(samples[name])
+        return '\n'.join(text) + '\n'
+
+
+class MetricsProtocol(asyncio.Protocol):
+    """Protocol of the metrics endpoint (one answer per connection)"""
+
+    timeout = 1  # Seconds to wait for a request before a raw answer
+
+    def __init__(self, loop):
+        """Initialize the handler"""
+        self.loop = loop
+        self.transport = self.handle = None
+
+    def connection_made(self, transport):
+        """See mother class"""
+        self.transport = transport
+        self.handle = self.loop.call_later(MetricsProtocol.timeout, self.answer)
+
+    def data_received(self, data):
+        """See mother class"""
+        self.answer(data.startswith(b'GET '))
+
+    def answer(self, http=False):
+        """Send the metrics then close the connection"""
+        self.handle.cancel()
+        if self.transport.is_closing():
+            return
+        body = Metrics.render().encode()
+        if http:
+            header = 'HTTP/1.0 200 OK\r\n' \
+                     'Content-Type: text/plain; version=0.0.4\r\n' \
+                     'Content-Length: {}\r\n\r\n'.format(len(body))
+            body = header.encode() + body
+        self.transport.write(body)
+        self.transport.close()
+
+    def connection_lost(self, exc):
+        """See mother class"""
+        self.handle.cancel()
+
+
+# Declaration of the server metrics
+Metrics.describe('mnemopwd_state_requests_total', 'counter',
+                 'Number of protocol state executions')
+Metrics.describe('mnemopwd_state_seconds', 'histogram',
+                 'Duration of protocol state executions')
+Metrics.describe('mnemopwd_db_seconds', 'histogram',
+                 'Duration of database operations')
+Metrics.describe('mnemopwd_sessions_active', 'gauge',
+                 'Number of connected clients')
+Metrics.describe('mnemopwd_bytes_received_total', 'counter',
+                 'Number of bytes received from clients')
+Metrics.describe('mnemopwd_bytes_sent_total', 'counter',
+                 'Number of bytes sent to clients')
+Metrics.describe('mnemopwd_executor_busy', 'gauge',
+                 'Number of protocol states in execution')
+Metrics.describe('mnemopwd_executor_queue', 'gauge',
+                 'Number of tasks waiting in the pool executor')
+Metrics.describe('mnemopwd_shield_suspects', 'gauge',
+                 'Number of suspect IPs (or networks)')
+Metrics.describe('mnemopwd_shield_banished', 'gauge',
+                 'Number of banished IPs (or networks)')
+Metrics.describe('mnemopwd_shield_bans_total', 'counter',
+                 'Number of banishments')
+Metrics.describe('mnemopwd_log_dropped', 'gauge',
+                 'Log records dropped because the log queue was full')
+Metrics.describe('mnemopwd_replication_lag', 'gauge',
+                 'Database changes not yet sent to the standby')
+Metrics.describe('mnemopwd_connections_rejected_total', 'counter',
+                 'Number of connections rejected by the admission control')
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Queue-based logging pipeline.
+
+Log calls only put records in a bounded queue (QueueLogHandler); a single
+writer thread (QueueListener) formats them and writes the log file,
+rotation included. The caller never waits for the disk: when the queue is
+full the record is dropped and counted.
+
+Records are not formatted by the caller: the message, its arguments and
+the 'extra' key/value pairs are formatted by the writer thread with the
+KeyValueFormatter.
+"""
+
+import logging
+import logging.handlers
+import queue
+
+# Attributes of a standard LogRecord (everything else comes from 'extra')
+_STANDARD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) \
+    | {'message', 'asctime'}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    Formatter appending the 'extra' attributes of a record as key=value
+    pairs, e.g. logging.info('Login', extra={'peer': peer}) gives
+    '... Login peer=...'
+    """
+
+    def format(self, record):
+        """Format the record then its extra attributes"""
+        line = super().format(record)
+        extra = ' '.join('{}={}'.format(key, value)
+                         for key, value in sorted(vars(record).items())
+                         if key not in _STANDARD)
+        return line + ' ' + extra if extra else line
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking queue handler
+
+    Attribute(s):
+    - queue: the bounded queue of records
+    - dropped: number of records dropped because the queue was full
+    """
+
+    def __init__(self, size):
+        """Object initialization"""
+        super().__init__(queue.Queue(size))
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Keep the record as is: the formatting is done by the writer
+        thread. Only the exception is rendered now because the traceback
+        would not survive the caller."""
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        """Put the record in the queue or drop it"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def dropped_records():
+    """Return the number of records dropped by the queue handlers"""
+    return sum(handler.dropped for handler in logging.getLogger().handlers
+               if isinstance(handler, QueueLogHandler))
+
+
+def start_queue_logging(size):
+    """Move the handlers of the root logger behind a queue served by a
+    writer thread. Return the listener and the queue handler."""
+    log = logging.getLogger()
+    handlers = log.handlers[:]
+    for handler in handlers:
+        log.removeHandler(handler)
+    qhandler = QueueLogHandler(size)
+    log.addHandler(qhandler)
+    listener = logging.handlers.QueueListener(
+        qhandler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener, qhandler
+
+
+def stop_queue_logging(listener, qhandler):
+    """Flush the queue, stop the writer thread and restore the handlers"""
+    listener.stop()
+    log = logging.getLogger()
+    log.removeHandler(qhandler)
+    for handler in listener.handlers:
+        log.addHandler(handler)
+    if qhandler.dropped:
+        logging.warning('%d log records dropped', qhandler.dropped)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Hashed timer wheel driven by the i/o asynchronous loop.
+
+A single periodic callback of the loop checks the expiry of all the
+entries: there is no thread and no loop callback per entry. An entry is
+any object with a 'deadline' attribute (a loop time) and an 'expire'
+method. The deadline can be postponed at any time without touching the
+wheel: when its slot is visited, an entry not yet expired is simply put
+again in the slot of its new deadline (lazy rescheduling). An entry without
+deadline (infinite) is visited once per turn until it gets one.
+"""
+
+import math
+
+
+class TimerWheel:
+    """
+    Timer wheel
+
+    Attribute(s):
+    - loop: the i/o asynchronous loop
+    - tick: duration of a slot in seconds
+    - wheel: list of slots (a slot is a set of entries)
+    - current: the index of the last visited slot
+
+    Method(s):
+    - start: start the periodic visit of the slots
+    - stop: stop the periodic visit
+    - add: add an entry
+    - remove: remove an entry
+    """
+
+    def __init__(self, loop, tick=1.0, size=64):
+        """Object initialization"""
+        self.loop = loop
+        self.tick = tick
+        self.wheel = [set() for i in range(size)]
+        self.current = 0
+        self.slot_of = dict()  # Entry -> slot index
+        self.handle = None  # Handle of the next visit
+
+    def _insert(self, entry):
+        """Put an entry in the slot of its deadline"""
+        delay = entry.deadline - self.loop.time()
+        if delay < math.inf:
+            ticks = math.ceil(delay / self.tick)
+        else:
+            ticks = len(self.wheel)  # No deadline
+        # Deadlines further than a wheel turn are visited once per turn
+        ticks = min(max(1, ticks), len(self.wheel))
+        slot = (self.current + ticks) % len(self.wheel)
+        self.wheel[slot].add(entry)
+        self.slot_of[entry] = slot
+
+    def _turn(self):
+        """Visit the next slot and expire entries"""
+        self.handle = self.loop.call_later(self.tick, self._turn)
+        self.current = (self.current + 1) % len(self.wheel)
+        entries = self.wheel[self.current]
+        self.wheel[self.current] = set()
+        now = self.loop.time()
+        for entry in entries:
+            del self.slot_of[entry]
+            if not (entry.deadline <= now and entry.expire()):
+                self._insert(entry)  # Not expired: reschedule
+
+    def start(self):
+        """Start the periodic visit of the slots"""
+        if self.handle is None:
+            self.handle = self.loop.call_later(self.tick, self._turn)
+
+    def stop(self):
+        """Stop the periodic visit of the slots"""
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+    def add(self, entry):
+        """Add an entry"""
+        if entry not in self.slot_of:
+            self._insert(entry)
+
+    def remove(self, entry):
+        """Remove an entry (if present)"""
+        slot = self.slot_of.pop(entry, None)
+        if slot is not None:
+            self.wheel[slot].discard(entry)
+
+    def __len__(self):
+        return len(self.slot_of)
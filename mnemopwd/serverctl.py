@@ -26,11 +26,13 @@
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from os import path
+import logging
 
 from .common.util.MnemopwdFingerPrint import MnemopwdFingerPrint
 from .server.util.Configuration import Configuration
 from .server.util.Daemon import Daemon
 from .server.server import Server
+from .server.replication.Standby import Standby
 
 here = path.abspath(path.dirname(__file__))
 
@@ -39,7 +41,15 @@ class ServerDaemon(Daemon):
     """Start server as a daemon"""
 
     def run(self):
-        """Start server"""
+        """Start server (a standby server starts it when promoted)"""
+        if Configuration.action == 'standby':
+            Standby().start()  # Return when promoted
+            self.remove_pid()
+            Configuration.pidfile = self.primary_pidfile
+            self.write_pid()
+            Configuration.dbpath = Configuration.standby_path
+            logging.warning('Standby promoted: serving {}'
+                            .format(Configuration.dbpath))
         Server().start()
 
 
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Asynchronous client speaking the MnemoPwd protocol.
+
+It is used by benchmark scripts to drive a server with a lot of concurrent
+connections from a single event loop. Cryptographic operations are done
+like the real client but without any user interface.
+"""
+
+import asyncio
+import ssl
+import os
+import hashlib
+import pickle
+
+from ...common.KeyHandler import KeyHandler
+from ...common.SecretInfoBlock import SecretInfoBlock
+from ...pyelliptic import ECC
+from ...pyelliptic import Cipher
+from ...pyelliptic import pbkdf2
+from ...pyelliptic import hmac_sha512
+from ...pyelliptic import hmac_sha256
+from ...client.corelayer.ResumableSSLContext import ResumableSSLContext
+
+
+def client_context(certfile=None, resumable=False):
+    """Return a SSL context compatible with the server configuration;
+    a resumable context offers the last TLS session stored"""
+    if resumable:
+        context = ResumableSSLContext(ssl.PROTOCOL_SSLv23)
+    else:
+        context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    context.options |= ssl.OP_NO_SSLv2  # SSL v2 not allowed
+    context.options |= ssl.OP_NO_SSLv3  # SSL v3 not allowed
+    context.check_hostname = False  # Don't check hostname
+    if certfile is None:
+        context.verify_mode = ssl.CERT_NONE
+        context.set_ciphers('AECDH-AES256-SHA')  # Use only ECDH-anon
+    else:
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.load_verify_locations(cafile=certfile)
+    return context
+
+
+class ProtocolError(Exception):
+    """Unexpected answer from the server"""
+    pass
+
+
+class AioClient:
+    """
+    Asynchronous MnemoPwd client
+
+    Attribute(s):
+    - host, port: the server address
+    - login, password: the user credentials (bytes)
+    - context: the SSL context used for connecting
+    - loop: the event loop used
+    - keyH: the key handler used once the configuration is sent
+
+    Method(s):
+    - connect: open a connection and receive the ephemeral server key (S0)
+    - open_session: send session, master secret and answer challenge (S1)
+    - login, creation: login or create the user account (S21, S22)
+    - configuration: send the cryptographic configuration (S31)
+    - exportation, search: get secret information blocks (S32, S34)
+    - deletion: delete the user account (S33)
+    - add_data, delete_data, update_data: manage blocks (S35, S36, S37)
+    - close: close the connection
+    """
+
+    def __init__(self, host, port, login, password, context=None, loop=None,
+                 cur1='sect571r1', cip1='aes-256-cbc'):
+        """Initialization"""
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.context = context if context is not None else client_context()
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.config = (cur1, cip1)
+        self.reader = None  # Stream reader
+        self.writer = None  # Stream writer
+        self.buffer = b''  # Received data not yet used
+        self.received = 0  # Number of bytes received
+        self.ephecc = None  # Ephemeral server public key
+        self.ms = None  # Master secret
+        self.session = None  # Session number
+        self.keyH = None  # Key handler
+
+    # Internal methods
+
+    @asyncio.coroutine
+    def _fill(self):
+        """Wait for more data from the server"""
+        data = yield from self.reader.read(65536)
+        if not data:
+            raise ConnectionError('connection closed by the server')
+        self.received += len(data)
+        self.buffer += data
+
+    @asyncio.coroutine
+    def _receive(self):
+        """Return a complete message (a request gets only one answer)"""
+        if not self.buffer:
+            yield from self._fill()
+        message, self.buffer = self.buffer, b''
+        return message
+
+    @asyncio.coroutine
+    def _receive_field(self):
+        """Return the next field terminated by a ';'"""
+        while b';' not in self.buffer:
+            yield from self._fill()
+        field, self.buffer = self.buffer.split(b';', maxsplit=1)
+        return field
+
+    @asyncio.coroutine
+    def _receive_exactly(self, size):
+        """Return the next size bytes"""
+        while len(self.buffer) < size:
+            yield from self._fill()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    @asyncio.coroutine
+    def _expect_ok(self):
+        """Receive an answer and verify it is a success; return the data"""
+        message = yield from self._receive()
+        if message[:2] != b'OK':
+            raise ProtocolError(message[:64])
+        return message[3:]
+
+    def _encrypt(self, data):
+        """Encrypt data with the ephemeral server public key"""
+        return self.ephecc.encrypt(data, pubkey=self.ephecc.get_pubkey())
+
+    def _challenge(self, var):
+        """Compute the encrypted challenge of a request"""
+        challenge = hmac_sha256(self.ms, self.session + var)
+        return self._encrypt(challenge)
+
+    def _id(self):
+        """Compute the encrypted client id"""
+        ho = hashlib.sha256()
+        ho.update(hmac_sha512(self.ms, self.ms + self.login))
+        return self._encrypt(ho.digest())
+
+    @asyncio.coroutine
+    def _receive_sibs(self, data):
+        """Receive a stream of secret information blocks (S32 and S34)"""
+        self.buffer = data + self.buffer
+        if b';' in self.buffer:
+            number = int((yield from self._receive_field()))
+        else:
+            number, self.buffer = int(self.buffer), b''
+            if number > 0:
+                yield from self._receive_exactly(1)  # The ';' separator
+        sibs = []
+        for i in range(number):
+            if (yield from self._receive_field()) != b'SIB':
+                raise ProtocolError('SIB expected')
+            index = int((yield from self._receive_field()))
+            size = int((yield from self._receive_field()))
+            psib = yield from self._receive_exactly(size)
+            if i < number - 1:
+                yield from self._receive_exactly(1)  # The ';' separator
+            sibs.append((index, pickle.loads(psib)))
+        return sibs
+
+    # External methods
+
+    @asyncio.coroutine
+    def connect(self):
+        """Open a connection then receive the ephemeral server key (S0);
+        return True if the TLS session has been resumed"""
+        self.reader, self.writer = yield from asyncio.open_connection(
+            self.host, self.port, ssl=self.context, loop=self.loop)
+        message = yield from self._receive()
+        if message[:10] != b'KEYSHARING':
+            raise ProtocolError(message[:64])
+        self.ephecc = ECC(pubkey=message[11:])
+        ssl_object = self.writer.get_extra_info('ssl_object')
+        if isinstance(self.context, ResumableSSLContext):
+            self.context.store(ssl_object)
+        return getattr(ssl_object, 'session_reused', False)
+
+    @asyncio.coroutine
+    def open_session(self):
+        """Send session number and master secret (S1S, S1C)"""
+        if self.ms is None:
+            salt, self.ms = pbkdf2(self.password, salt=self.login, hfunc='SHA1')
+        ems = self._encrypt(self.ms)
+        nonce = os.urandom(32)
+        cipher = Cipher(self.ms, Cipher.gen_IV('aes-256-cbc'), 1, 'aes-256-cbc')
+        self.session = cipher.ciphering(nonce)[:16]
+        esession = self._encrypt(self.session)
+        self.writer.write(b'SESSION;' + str(len(esession)).encode() + b';' +
+                          esession + b';' + ems)
+        message = yield from self._receive()
+        if message[:10] != b'CHALLENGER':
+            raise ProtocolError(message[:64])
+        self.writer.write(b'CHALLENGEA;' + self._challenge(b'S1.13'))
+        yield from self._expect_ok()
+
+    @asyncio.coroutine
+    def authenticate(self):
+        """Login (S21)"""
+        self.writer.write(self._challenge(b'S21.7') + b';LOGIN;' +
+                          self._id() + b';' + self._encrypt(self.login))
+        yield from self._expect_ok()
+
+    @asyncio.coroutine
+    def creation(self):
+        """Create the user account (S22)"""
+        self.writer.write(self._challenge(b'S22.7') + b';CREATION;' +
+                          self._id() + b';' + self._encrypt(self.login))
+        yield from self._expect_ok()
+
+    @asyncio.coroutine
+    def configuration(self):
+        """Send the cryptographic configuration (S31)"""
+        cur1, cip1 = self.config
+        self.keyH = KeyHandler(self.ms, cur1=cur1, cip1=cip1)
+        econfig = self._encrypt(cur1 + ';' + cip1 + ';;;;')
+        self.writer.write(self._challenge(b'S31.6') + b';CONFIGURATION;' +
+                          econfig)
+        return (yield from self._expect_ok())
+
+    @asyncio.coroutine
+    def exportation(self):
+        """Get all secret information blocks (S32)"""
+        self.writer.write(self._challenge(b'S32.4') + b';EXPORTATION')
+        data = yield from self._expect_ok()
+        return (yield from self._receive_sibs(data))
+
+    @asyncio.coroutine
+    def deletion(self):
+        """Delete the user account (S33)"""
+        self.writer.write(self._challenge(b'S33.7') + b';DELETION;' +
+                          self._id() + b';' + self._encrypt(self.login))
+        yield from self._expect_ok()
+
+    @asyncio.coroutine
+    def search(self, pattern):
+        """Get secret information blocks matching a pattern (S34)"""
+        epattern = self._encrypt(pattern.encode())
+        self.writer.write(self._challenge(b'S34.6') + b';SEARCHDATA;' +
+                          epattern)
+        data = yield from self._expect_ok()
+        return (yield from self._receive_sibs(data))
+
+    def new_sib(self, *values):
+        """Return a new secret information block filled with values"""
+        sib = SecretInfoBlock(self.keyH)
+        for i, value in enumerate(values):
+            sib['info' + str(i + 1)] = value
+        return sib
+
+    @asyncio.coroutine
+    def add_data(self, sib):
+        """Add a secret information block (S35); return its index"""
+        self.writer.write(self._challenge(b'S35.6') + b';ADDDATA;' +
+                          pickle.dumps(sib))
+        return int((yield from self._expect_ok()))
+
+    @asyncio.coroutine
+    def delete_data(self, index):
+        """Delete a secret information block (S36)"""
+        self.writer.write(self._challenge(b'S36.4') + b';DELETEDATA;' +
+                          str(index).encode())
+        yield from self._expect_ok()
+
+    @asyncio.coroutine
+    def update_data(self, index, sib):
+        """Update a secret information block (S37)"""
+        self.writer.write(self._challenge(b'S37.5') + b';UPDATEDATA;' +
+                          str(index).encode() + b';' + pickle.dumps(sib))
+        yield from self._expect_ok()
+
+    def close(self):
+        """Close the connection"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.buffer = b''
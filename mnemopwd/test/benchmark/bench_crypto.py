@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Micro-benchmark of the cryptographic layer.
+
+Measures:
+- primitives: Cipher.ciphering (per cipher), hmac_sha512, pbkdf2;
+- per curve: ECC.compute_keypair, KeyHandler construction (one stage),
+  ECC.raw_encrypt and ECC.decrypt (ECIES with aes-256-cbc);
+- per cipher suite (a curve and a cipher): encryption and decryption of a
+  field by a KeyHandler stage, then the cost of a block of several fields:
+  set, pickle (integrity fingerprint), unpickle with control_integrity, get.
+
+Every curve of OpenSSL.curves and every cipher of OpenSSL.cipher_algo is
+measured (unless restricted by options); curves not supported by the
+OpenSSL library are reported as such. Suites are then ranked by cost per
+field and per block. A configuration with several stages costs roughly
+the sum of the costs of its stages.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_crypto [-h]
+"""
+
+import argparse
+import json
+import pickle
+import time
+
+from ...common.KeyHandler import KeyHandler
+from ...common.SecretInfoBlock import SecretInfoBlock
+from ...pyelliptic import OpenSSL
+from ...pyelliptic import ECC
+from ...pyelliptic import Cipher
+from ...pyelliptic import hmac_sha512
+from ...pyelliptic import pbkdf2
+
+SECRET = b'bench crypto master secret 0123456789abcdef0123456789abcdef'
+
+
+def timeit(function, repeat):
+    """Return the mean duration (ms) of function()"""
+    function()  # Warm up
+    begin = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def bench_primitives(ciphers, options):
+    """Return the costs (ms) of the symmetric and hash primitives"""
+    data = b'x' * options.size
+    results = {}
+    for ciphername in ciphers:
+        key = b'k' * 32
+        iv = Cipher.gen_IV(ciphername)
+        results['Cipher.ciphering ' + ciphername] = timeit(
+            lambda: Cipher(key, iv, 1, ciphername).ciphering(data),
+            options.repeat * 10)
+    block = b'x' * options.size * options.fields
+    results['hmac_sha512'] = timeit(lambda: hmac_sha512(SECRET, block),
+                                    options.repeat * 10)
+    results['pbkdf2'] = timeit(lambda: pbkdf2(SECRET, salt=b'salt',
+                                              hfunc='SHA1'), 3)
+    return results
+
+
+def bench_curve(curve, options):
+    """Return the costs (ms) of the asymmetric operations of a curve"""
+    data = b'x' * options.size
+    ecc = KeyHandler(SECRET, cur1=curve)._get_ecc_(0)[0]
+    pubkey_x, pubkey_y = ecc.pubkey_x, ecc.pubkey_y
+    ciphertext = ecc.encrypt(data, ecc.get_pubkey())
+    return {
+        'compute_keypair': timeit(
+            lambda: ECC.compute_keypair(SECRET, curve), options.repeat),
+        'KeyHandler': timeit(
+            lambda: KeyHandler(SECRET, cur1=curve), options.repeat),
+        'raw_encrypt': timeit(
+            lambda: ECC.raw_encrypt(data, pubkey_x, pubkey_y, curve=curve),
+            options.repeat),
+        'decrypt': timeit(lambda: ecc.decrypt(ciphertext), options.repeat)}
+
+
+def bench_suite(curve, ciphername, options):
+    """Return the costs (ms) of a cipher suite per field and per block"""
+    keyH = KeyHandler(SECRET, cur1=curve, cip1=ciphername)
+    data = b'x' * options.size
+    ciphertext = keyH.encrypt(0, data)
+    assert keyH.decrypt(0, ciphertext) == data
+
+    def new_block():
+        sib = SecretInfoBlock(keyH, nbInfo=options.fields)
+        for i in range(1, options.fields + 1):
+            sib['info' + str(i)] = data
+        return sib
+
+    def load_block(psib):
+        sib = pickle.loads(psib)
+        sib.control_integrity(keyH)
+        return [sib['info' + str(i)] for i in range(1, options.fields + 1)]
+
+    psib = pickle.dumps(new_block())
+    results = {
+        'encrypt': timeit(lambda: keyH.encrypt(0, data), options.repeat),
+        'decrypt': timeit(lambda: keyH.decrypt(0, ciphertext),
+                          options.repeat),
+        'block set': timeit(new_block, options.repeat),
+        'block pickle': timeit(lambda: pickle.dumps(new_block()),
+                               options.repeat),
+        'block get': timeit(lambda: load_block(psib), options.repeat)}
+    results['field'] = results['encrypt'] + results['decrypt']
+    results['block'] = results['block pickle'] + results['block get']
+    return results
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the cryptographic layer')
+    argparser.add_argument('--curves', nargs='+',
+                           default=sorted(OpenSSL.curves),
+                           help='the curves to measure')
+    argparser.add_argument('--ciphers', nargs='+',
+                           default=sorted(OpenSSL.cipher_algo),
+                           help='the ciphers to measure')
+    argparser.add_argument('--repeat', type=int, default=20,
+                           help='number of executions of each operation')
+    argparser.add_argument('--fields', type=int, default=3,
+                           help='number of fields of a block')
+    argparser.add_argument('--size', type=int, default=64,
+                           help='size of a field')
+    argparser.add_argument('--top', type=int, default=0,
+                           help='number of suites in the rankings '
+                                '(0 for all)')
+    argparser.add_argument('--json', default=None, metavar='file',
+                           help='export the results in a JSON file')
+    options = argparser.parse_args()
+    results = {'primitives': {}, 'curves': {}, 'suites': {},
+               'unsupported': []}
+
+    print('Primitives ({} bytes per field)'.format(options.size))
+    results['primitives'] = bench_primitives(options.ciphers, options)
+    for name, cost in sorted(results['primitives'].items()):
+        print('{:<32}{:>12.3f} ms'.format(name, cost))
+
+    print('\nCurves')
+    columns = ['compute_keypair', 'KeyHandler', 'raw_encrypt', 'decrypt']
+    print('{:<12}'.format('curve') + ''.join('{:>16}'.format(c)
+                                             for c in columns))
+    for curve in options.curves:
+        try:
+            costs = bench_curve(curve, options)
+        except Exception:
+            results['unsupported'].append(curve)
+            print('{:<12}{:>16}'.format(curve, 'unsupported'))
+            continue
+        results['curves'][curve] = costs
+        print('{:<12}'.format(curve) + ''.join(
+            '{:>16.3f}'.format(costs[c]) for c in columns))
+
+    for curve in sorted(results['curves']):
+        for ciphername in options.ciphers:
+            results['suites'][curve + ';' + ciphername] = bench_suite(
+                curve, ciphername, options)
+
+    for key, label in (('field', 'per field (encrypt + decrypt)'),
+                       ('block', 'per block of {} fields (set + pickle, '
+                                 'unpickle + get)'.format(options.fields))):
+        print('\nSuites ranked by cost ' + label)
+        ranking = sorted(results['suites'].items(), key=lambda s: s[1][key])
+        if options.top > 0:
+            ranking = ranking[:options.top]
+        for rank, (suite, costs) in enumerate(ranking, 1):
+            print('{:>4} {:<28}{:>12.3f} ms'.format(rank, suite, costs[key]))
+
+    if options.json is not None:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
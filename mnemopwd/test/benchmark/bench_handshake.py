@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the TLS handshake rate.
+
+For each server TLS curve, connections are opened sequentially then in
+parallel with:
+- a full handshake for each connection;
+- a resumed handshake (the last TLS session is offered to the server).
+
+Each connection ends after the key sharing (state S0) so the measure
+includes the ephemeral ECC key of the server.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_handshake [-h]
+"""
+
+import argparse
+import asyncio
+import time
+
+from ...client.corelayer.ResumableSSLContext import ResumableSSLContext
+from .aioclient import AioClient, client_context
+from .benchserver import BenchServer
+from .bench_loop import percentile
+
+
+@asyncio.coroutine
+def handshakes(loop, host, port, number, concurrency, context):
+    """Open and close number connections with a context; return the
+    latencies and the number of resumed sessions"""
+    latencies = []
+    resumed = [0]
+    semaphore = asyncio.Semaphore(concurrency, loop=loop)
+
+    @asyncio.coroutine
+    def one_connection():
+        with (yield from semaphore):
+            client = AioClient(host, port, b'', b'', context=context, loop=loop)
+            begin = time.perf_counter()
+            try:
+                if (yield from client.connect()):
+                    resumed[0] += 1
+                latencies.append(time.perf_counter() - begin)
+            finally:
+                client.close()
+
+    if isinstance(context, ResumableSSLContext):
+        yield from one_connection()  # Get a first session
+        latencies.clear()
+        resumed[0] = 0
+    yield from asyncio.gather(*[one_connection() for i in range(number)],
+                              loop=loop)
+    return latencies, resumed[0]
+
+
+def run(curve, tickets, options):
+    """Run the benchmark for a server TLS curve; return result lines"""
+    loop = asyncio.get_event_loop()
+    server = BenchServer(options.host, options.port, tlscurve=curve,
+                         tlstickets=tickets)
+    results = []
+    try:
+        server.start()
+        for mode in ('full', 'resumed'):
+            context = client_context(resumable=(mode == 'resumed'))
+            begin = time.perf_counter()
+            latencies, resumed = loop.run_until_complete(handshakes(
+                loop, options.host, options.port, options.connections,
+                options.concurrency, context))
+            total = time.perf_counter() - begin
+            results.append((curve, tickets, mode, len(latencies) / total,
+                            percentile(latencies, 50) * 1000,
+                            percentile(latencies, 95) * 1000,
+                            resumed))
+    finally:
+        server.stop()
+    return results
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the TLS handshake rate')
+    argparser.add_argument('--curves', nargs='+',
+                           default=['auto', 'prime256v1', 'sect409k1'],
+                           help='the server TLS curves to compare')
+    argparser.add_argument('--tickets', type=int, nargs='+', default=[1, 0],
+                           choices=[0, 1],
+                           help='use TLS session tickets (1) or only the \
+                           server session cache (0)')
+    argparser.add_argument('--host', default='127.0.0.1',
+                           help='the IP address of the server')
+    argparser.add_argument('--port', type=int, default=62231,
+                           help='the server connexion port')
+    argparser.add_argument('--connections', type=int, default=200,
+                           help='number of connections to open')
+    argparser.add_argument('--concurrency', type=int, default=1,
+                           help='number of simultaneous connections')
+    options = argparser.parse_args()
+
+    print('{:>12}{:>9}{:>9}{:>10}{:>10}{:>10}{:>9}'.format(
+        'curve', 'tickets', 'mode', 'conn/s', 'p50 ms', 'p95 ms', 'resumed'))
+    for curve in options.curves:
+        for tickets in options.tickets:
+            for line in run(curve, tickets, options):
+                print('{:>12}{:>9}{:>9}{:>10.1f}{:>10.1f}{:>10.1f}{:>9}'
+                      .format(*line))
+
+
+if __name__ == '__main__':
+    main()
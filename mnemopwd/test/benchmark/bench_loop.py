@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the event loop policies ('default' and 'uvloop').
+
+For each policy, a server is started with this policy and the client side
+uses the same policy. Two measures are done:
+- connection setup: TLS handshake and key sharing (state S0) under
+  connection churn;
+- streaming: throughput of secret information blocks sent by a search
+  request (state S34).
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_loop [-h]
+"""
+
+import argparse
+import asyncio
+import time
+
+from ...common.util.LoopPolicy import set_loop_policy
+from .aioclient import AioClient
+from .benchserver import BenchServer
+
+
+def percentile(values, p):
+    """Return the p-th percentile of a list of values"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+@asyncio.coroutine
+def connection_setup(loop, host, port, number, concurrency):
+    """Open and close number connections; return latencies"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency, loop=loop)
+
+    @asyncio.coroutine
+    def one_connection(i):
+        with (yield from semaphore):
+            client = AioClient(host, port, b'', b'', loop=loop)
+            begin = time.perf_counter()
+            try:
+                yield from client.connect()
+                latencies.append(time.perf_counter() - begin)
+            finally:
+                client.close()
+
+    yield from asyncio.gather(*[one_connection(i) for i in range(number)],
+                              loop=loop)
+    return latencies
+
+
+@asyncio.coroutine
+def streaming(loop, host, port, nbsibs, nbsearch, size):
+    """Fill an account with nbsibs blocks then search them nbsearch times;
+    return the number of blocks received, the bytes received and the
+    duration of searches"""
+    client = AioClient(host, port, b'bench loop login', b'bench password',
+                       loop=loop)
+    try:
+        yield from client.connect()
+        yield from client.open_session()
+        yield from client.creation()
+        yield from client.configuration()
+        for i in range(nbsibs):
+            sib = client.new_sib('bench secret ' + 'x' * size)
+            yield from client.add_data(sib)
+
+        received = 0
+        begin = time.perf_counter()
+        for i in range(nbsearch):
+            sibs = yield from client.search('bench')
+            received += len(sibs)
+        duration = time.perf_counter() - begin
+        return received, client.received, duration
+    finally:
+        client.close()
+
+
+def run(policy, options):
+    """Run the benchmark for a policy; return a result dictionary"""
+    used = set_loop_policy(policy)
+    if used != policy:
+        print("Policy '{}' not available: skipped".format(policy))
+        return None
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = BenchServer(options.host, options.port, looppolicy=policy,
+                         poolsize=options.poolsize)
+    try:
+        server.start()
+        begin = time.perf_counter()
+        latencies = loop.run_until_complete(connection_setup(
+            loop, options.host, options.port,
+            options.connections, options.concurrency))
+        total = time.perf_counter() - begin
+        blocks, nbytes, duration = loop.run_until_complete(streaming(
+            loop, options.host, options.port,
+            options.sibs, options.searches, options.size))
+    finally:
+        server.stop()
+        loop.close()
+
+    return {'policy': policy,
+            'conn/s': len(latencies) / total,
+            'p50 ms': percentile(latencies, 50) * 1000,
+            'p95 ms': percentile(latencies, 95) * 1000,
+            'sibs/s': blocks / duration,
+            'MB/s': nbytes / duration / 1024 / 1024}
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the event loop policies')
+    argparser.add_argument('--policies', nargs='+', default=['default', 'uvloop'],
+                           choices=['default', 'uvloop'],
+                           help='the event loop policies to compare')
+    argparser.add_argument('--host', default='127.0.0.1',
+                           help='the IP address of the server')
+    argparser.add_argument('--port', type=int, default=62231,
+                           help='the server connexion port')
+    argparser.add_argument('--poolsize', type=int, default=10,
+                           help='the size of the server pool of execution')
+    argparser.add_argument('--connections', type=int, default=500,
+                           help='number of connections to open')
+    argparser.add_argument('--concurrency', type=int, default=50,
+                           help='number of simultaneous connections')
+    argparser.add_argument('--sibs', type=int, default=50,
+                           help='number of blocks to stream')
+    argparser.add_argument('--searches', type=int, default=10,
+                           help='number of search requests')
+    argparser.add_argument('--size', type=int, default=256,
+                           help='size of the secret information of a block')
+    options = argparser.parse_args()
+
+    columns = ['policy', 'conn/s', 'p50 ms', 'p95 ms', 'sibs/s', 'MB/s']
+    print(''.join('{:>10}'.format(c) for c in columns))
+    for policy in options.policies:
+        result = run(policy, options)
+        if result is not None:
+            print('{:>10}'.format(result['policy']) +
+                  ''.join('{:>10.1f}'.format(result[c]) for c in columns[1:]))
+
+
+if __name__ == '__main__':
+    main()
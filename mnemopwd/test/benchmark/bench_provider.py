@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the providers of the pyelliptic primitives.
+
+Measures, for each provider (stdlib and openssl), the cost of hmac_sha256
+and hmac_sha512 (on a field and on a block), pbkdf2 (SHA1 and SHA256),
+equals and rand, checks that both providers give the same outputs and
+prints the speedup of the stdlib provider.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_provider [-h]
+"""
+
+import argparse
+import time
+
+from ...pyelliptic.provider import OpenSSLProvider, StdlibProvider
+
+
+def timeit(function, repeat):
+    """Return the mean duration (µs) of function()"""
+    function()  # Warm up
+    begin = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - begin) / repeat * 1000000
+
+
+def operations(options):
+    """Return the list of (label, function of a provider, repeat factor)"""
+    key = b'k' * 64
+    field = b'x' * options.size
+    block = b'x' * options.size * 10
+    return [
+        ('hmac_sha256 field', lambda p: p.hmac_sha256(key, field), 1),
+        ('hmac_sha512 field', lambda p: p.hmac_sha512(key, field), 1),
+        ('hmac_sha512 block', lambda p: p.hmac_sha512(key, block), 1),
+        ('pbkdf2 SHA1', lambda p: p.pbkdf2(key, b'salt', options.iterations,
+                                           64, 'SHA1'), 0.01),
+        ('pbkdf2 SHA256', lambda p: p.pbkdf2(key, b'salt', options.iterations,
+                                             64, 'SHA256'), 0.01),
+        ('equals', lambda p: p.equals(key, key), 1),
+        ('rand 16', lambda p: p.rand(16), 1)]
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the providers of pyelliptic primitives')
+    argparser.add_argument('--repeat', type=int, default=10000,
+                           help='number of executions of each operation')
+    argparser.add_argument('--size', type=int, default=64,
+                           help='size of a field')
+    argparser.add_argument('--iterations', type=int, default=10000,
+                           help='number of pbkdf2 iterations')
+    options = argparser.parse_args()
+
+    print('{:<20}{:>14}{:>14}{:>10}'.format('operation', 'openssl (µs)',
+                                            'stdlib (µs)', 'speedup'))
+    for label, function, factor in operations(options):
+        if not label.startswith('rand'):
+            assert function(OpenSSLProvider) == function(StdlibProvider), label
+        repeat = max(1, int(options.repeat * factor))
+        fallback = timeit(lambda: function(OpenSSLProvider), repeat)
+        stdlib = timeit(lambda: function(StdlibProvider), repeat)
+        print('{:<20}{:>14.2f}{:>14.2f}{:>9.1f}x'.format(
+            label, fallback, stdlib, fallback / stdlib))
+
+
+if __name__ == '__main__':
+    main()
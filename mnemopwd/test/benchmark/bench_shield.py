@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the brute-force shield with a lot of tracked addresses.
+
+Measures for N suspect addresses (100k by default):
+- adding suspect addresses (login failures);
+- testing addresses on connection (half suspect, half unknown);
+- rehabilitation of all addresses once the banishment period is over;
+- saving then loading a snapshot file.
+The cost of the former full table scan (done on each connection) is
+given for reference.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_shield [-h]
+"""
+
+import argparse
+import ipaddress
+import logging
+import os
+import tempfile
+import time
+
+from ...server.clients.BruteForceShield import BruteForceShield
+
+
+def addresses(number, start='10.0.0.0'):
+    """Return a list of number IPv4 addresses"""
+    first = int(ipaddress.IPv4Address(start))
+    return [str(ipaddress.IPv4Address(first + i)) for i in range(number)]
+
+
+def measure(label, function, count):
+    """Run function and print its duration per operation"""
+    begin = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - begin
+    print('{:<28}{:>12.3f} s{:>12.2f} us/op'.format(
+        label, duration, duration / max(1, count) * 1e6))
+    return result
+
+
+def legacy_scan(shield):
+    """The former rehabilitation: a scan of the whole table"""
+    to_rehabilitate = list()
+    for key in shield.shield.keys():
+        counter, start_time = shield.shield[key]
+        duration = time.time() - start_time
+        if duration > BruteForceShield.banishment_period:
+            to_rehabilitate.append(key)
+    return to_rehabilitate
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the brute-force shield')
+    argparser.add_argument('-n', '--number', type=int, default=100000,
+                           help='number of suspect addresses')
+    argparser.add_argument('--prefix', type=int, default=32,
+                           help='IPv4 aggregation prefix')
+    options = argparser.parse_args()
+    logging.disable(logging.CRITICAL)  # Do not measure logging
+
+    n = options.number
+    suspects = addresses(n)
+    unknown = addresses(n, start='172.16.0.0')
+    shield = BruteForceShield(options.prefix)
+
+    measure('add_suspect_ip', lambda: [shield.add_suspect_ip(ip)
+                                       for ip in suspects], n)
+    print('{:<28}{:>12}'.format('tracked entries', len(shield)))
+    measure('is_suspect_ip (suspect)', lambda: [shield.is_suspect_ip(ip)
+                                                for ip in suspects], n)
+    measure('is_suspect_ip (unknown)', lambda: [shield.is_suspect_ip(ip)
+                                                for ip in unknown], n)
+    measure('legacy full scan (x1)', lambda: legacy_scan(shield), 1)
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = os.path.join(path, 'shield')
+        measure('save snapshot', lambda: shield.save(filename), len(shield))
+        print('{:<28}{:>12} bytes'.format('snapshot size',
+                                          os.path.getsize(filename)))
+        loaded = BruteForceShield(options.prefix)
+        measure('load snapshot', lambda: loaded.load(filename), len(shield))
+
+    # Age all entries then rehabilitate them
+    old = time.time() - BruteForceShield.banishment_period - 1
+    for key, (counter, start_time) in shield.shield.items():
+        shield.shield[key] = (counter, old)
+    shield.heap = [(old, key) for start_time, key in shield.heap]
+    count = len(shield)
+    measure('rehabilitation (all)', lambda: shield.is_suspect_ip('1.1.1.1'),
+            count)
+
+
+if __name__ == '__main__':
+    main()
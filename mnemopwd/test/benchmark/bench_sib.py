@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the save of a block on the client side.
+
+Measures, for each number of fields, the latency of the construction of a
+SecretInfoBlock field by field (as before) and at once with
+SecretInfoBlock.from_values on pools of threads of several sizes. The
+blocks are checked to give the same information in clear text.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_sib [-h]
+"""
+
+import argparse
+import concurrent.futures
+import time
+
+from ...common.KeyHandler import KeyHandler
+from ...common.SecretInfoBlock import SecretInfoBlock
+
+
+def sequential(keyH, values):
+    """Build a block field by field"""
+    sib = SecretInfoBlock(keyH, len(values))
+    for j, value in enumerate(values, start=1):
+        sib['info' + str(j)] = value
+    return sib
+
+
+def timeit(function, repeat):
+    """Return the mean duration (ms) of function()"""
+    function()  # Warm up
+    begin = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the save of a block')
+    argparser.add_argument('--fields', default='1,3,6,9',
+                           help='numbers of fields of a block')
+    argparser.add_argument('--threads', default='2,4',
+                           help='sizes of the pools of threads')
+    argparser.add_argument('--repeat', type=int, default=10,
+                           help='number of saves for each measure')
+    argparser.add_argument('--size', type=int, default=32,
+                           help='size of a field')
+    argparser.add_argument('--curves', default='sect571r1,secp521r1,sect409r1',
+                           help='curves of the three stages')
+    options = argparser.parse_args()
+
+    curves = options.curves.split(',')
+    keyH = KeyHandler(b'benchmark master secret',
+                      cur1=curves[0], cip1='aes-256-cbc',
+                      cur2=curves[1], cip2='aes-256-cbc',
+                      cur3=curves[2], cip3='aes-256-cbc')
+    threads = [int(n) for n in options.threads.split(',')]
+    executors = [concurrent.futures.ThreadPoolExecutor(n) for n in threads]
+
+    print('{:<8}{:>16}'.format('fields', 'sequential (ms)') +
+          ''.join('{:>16}'.format('{} threads (ms)'.format(n))
+                  for n in threads))
+    for nbfields in [int(n) for n in options.fields.split(',')]:
+        values = [bytes([65 + j]) * options.size for j in range(nbfields)]
+        assert sequential(keyH, values).decrypt_all() == values
+        line = '{:<8}{:>16.1f}'.format(nbfields, timeit(
+            lambda: sequential(keyH, values), options.repeat))
+        for executor in executors:
+            sib = SecretInfoBlock.from_values(keyH, values, executor)
+            assert sib.decrypt_all() == values
+            line += '{:>16.1f}'.format(timeit(
+                lambda: SecretInfoBlock.from_values(keyH, values, executor),
+                options.repeat))
+        print(line)
+
+    for executor in executors:
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmark of the startup time of mnemopwdc and mnemopwds.
+
+Each measure runs a fresh interpreter (median of several runs):
+- importing the module of the command (mnemopwd.clientctl and
+  mnemopwd.serverctl) and 'mnemopwd.pyelliptic' alone;
+- the first use of OpenSSL (library loading, tables and a few functions);
+- the commands with '--help' (argument parsing, no connection).
+The base cost of the interpreter is measured and subtracted. With
+'--detail', the most expensive imports given by 'python -X importtime'
+are printed.
+
+Usage: python3 -m mnemopwd.test.benchmark.bench_startup [-h]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_USE = ('from mnemopwd.pyelliptic import OpenSSL, Cipher; '
+             'Cipher(b"k" * 32, Cipher.gen_IV("aes-256-cbc"), 1)'
+             '.ciphering(b"data"); OpenSSL.get_curve("sect571r1")')
+
+MEASURES = [
+    ('interpreter', ['-c', 'pass']),
+    ('import mnemopwd.pyelliptic', ['-c', 'import mnemopwd.pyelliptic']),
+    ('first use of OpenSSL', ['-c', FIRST_USE]),
+    ('import mnemopwd.clientctl', ['-c', 'import mnemopwd.clientctl']),
+    ('import mnemopwd.serverctl', ['-c', 'import mnemopwd.serverctl']),
+    ('mnemopwdc --help', ['-m', 'mnemopwd.clientctl', '--help']),
+    ('mnemopwds --help', ['-m', 'mnemopwd.serverctl', '--help'])]
+
+
+def run(arguments, repeat):
+    """Return the median duration (ms) of an interpreter execution or
+    None if it fails"""
+    durations = []
+    for i in range(repeat):
+        begin = time.perf_counter()
+        result = subprocess.run([sys.executable] + arguments,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return None
+        durations.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(durations)
+
+
+def detail(module, top):
+    """Print the most expensive imports (cumulative time) of a module"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import ' + module], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    print('\nSlowest imports of {} (cumulative)'.format(module))
+    for cumulative, name in sorted(imports, reverse=True)[:top]:
+        print('{:>10.1f} ms  {}'.format(cumulative / 1000, name))
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description='Benchmark of the startup time of mnemopwdc and mnemopwds')
+    argparser.add_argument('--repeat', type=int, default=10,
+                           help='number of runs of each measure')
+    argparser.add_argument('--detail', type=int, default=0, metavar='N',
+                           help='print the N slowest imports of each command')
+    options = argparser.parse_args()
+
+    base = run(MEASURES[0][1], options.repeat)
+    print('{:<32}{:>10.1f} ms'.format(MEASURES[0][0], base))
+    for label, arguments in MEASURES[1:]:
+        duration = run(arguments, options.repeat)
+        if duration is None:
+            print('{:<32}{:>13}'.format(label, 'failed'))
+        else:
+            print('{:<32}{:>10.1f} ms'.format(label, duration - base))
+
+    if options.detail > 0:
+        for module in ('mnemopwd.clientctl', 'mnemopwd.serverctl'):
+            detail(module, options.detail)
+
+
+if __name__ == '__main__':
+    main()
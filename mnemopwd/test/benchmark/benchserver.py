@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Run a MnemoPwd server in a child process for benchmarking purpose.
+
+The server is started with its own configuration (database directory,
+port, event loop policy...) so several benchmarks can be run one after
+the other without interfering.
+"""
+
+import multiprocessing
+import socket
+import tempfile
+import shutil
+import time
+import os
+
+
+def _run_server(settings):
+    """Child process: configure then start the server"""
+    from ...server.util.Configuration import Configuration
+    from ...server.server import Server
+    for name, value in settings.items():
+        setattr(Configuration, name, value)
+    try:
+        Server().start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
+class BenchServer:
+    """
+    A server running in a child process
+
+    Attribute(s):
+    - host, port: the server address
+    - dbpath: the temporary database directory (removed by stop)
+    - process: the child process
+
+    Method(s):
+    - start: start the server and wait until it accepts connections
+    - stop: stop the server and remove the database directory
+    """
+
+    def __init__(self, host='127.0.0.1', port=62231, **settings):
+        """Initialization: settings are Configuration attributes"""
+        self.host = host
+        self.port = port
+        self.dbpath = None
+        self.process = None
+        self.settings = settings
+
+    def start(self, timeout=10):
+        """Start the server"""
+        self.dbpath = tempfile.mkdtemp(prefix='mnemopwd-bench-')
+        os.chmod(self.dbpath, 0o700)
+        settings = {'host': self.host, 'port': self.port,
+                    'dbpath': self.dbpath, 'loglevel': 'WARNING',
+                    'logfile': os.path.join(self.dbpath, 'mnemopwds.log'),
+                    'shieldfile': os.path.join(self.dbpath, 'mnemopwds.shield')}
+        settings.update(self.settings)
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(target=_run_server, args=(settings,),
+                                       daemon=True)
+        self.process.start()
+
+        # Wait until the server accepts connections
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                socket.create_connection((self.host, self.port), 0.5).close()
+            except OSError:
+                time.sleep(0.1)
+            else:
+                return self
+        self.stop()
+        raise RuntimeError('server not started on {}:{}'
+                           .format(self.host, self.port))
+
+    def stop(self):
+        """Stop the server"""
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+        if self.dbpath is not None:
+            shutil.rmtree(self.dbpath, ignore_errors=True)
+            self.dbpath = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
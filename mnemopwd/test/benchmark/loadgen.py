@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Load generator driving a server with synthetic clients.
+
+Each synthetic client opens a session with its own account then runs
+operations drawn from a scenario mix until the end of the run. Every
+protocol request is timed and recorded under its state name so the
+results give the throughput and the latency percentiles per state.
+
+A scenario mix is a name of a predefined mix (see SCENARIOS) or a list of
+weighted operations like 'login=1,add=3,search=4'. Operations:
+- login: close the connection then reconnect and login (S0, S1, S21, S31)
+- add, update, delete: manage a secret information block (S35, S37, S36)
+- search, export: get secret information blocks (S34, S32)
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import mnemopwd
+from .aioclient import AioClient
+from .bench_loop import percentile
+
+SCENARIOS = {
+    'read': {'login': 1, 'search': 6, 'export': 2, 'add': 1},
+    'write': {'add': 4, 'update': 3, 'delete': 2, 'search': 1},
+    'mixed': {'login': 1, 'add': 3, 'search': 4, 'export': 1, 'update': 2,
+              'delete': 1},
+    'login': {'login': 1}
+}
+
+OPERATIONS = ('login', 'add', 'update', 'delete', 'search', 'export')
+
+
+def parse_mix(text):
+    """Return the dictionary operation -> weight of a scenario mix"""
+    if text in SCENARIOS:
+        return dict(SCENARIOS[text])
+    mix = {}
+    for item in text.split(','):
+        operation, _, weight = item.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError("unknown operation '{}'".format(operation))
+        mix[operation] = int(weight) if weight else 1
+    if sum(mix.values()) <= 0:
+        raise ValueError('empty scenario mix')
+    return mix
+
+
+class Recorder:
+    """
+    Latencies and errors per state
+
+    Method(s):
+    - timed: run a request and record its latency under a state name
+    - results: return the statistics per state
+    """
+
+    def __init__(self):
+        """Initialization"""
+        self.latencies = dict()  # state -> list of latencies (seconds)
+        self.errors = dict()  # state -> number of errors
+
+    @asyncio.coroutine
+    def timed(self, state, coroutine):
+        """Run a request and record its latency"""
+        begin = time.perf_counter()
+        try:
+            result = yield from coroutine
+        except Exception:
+            self.errors[state] = self.errors.get(state, 0) + 1
+            raise
+        self.latencies.setdefault(state, []).append(
+            time.perf_counter() - begin)
+        return result
+
+    def results(self, duration):
+        """Return the statistics per state (latencies in milliseconds)"""
+        states = dict()
+        for state in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies.get(state, [])
+            states[state] = {
+                'count': len(latencies),
+                'errors': self.errors.get(state, 0),
+                'throughput': len(latencies) / duration if duration else 0.0,
+                'mean': sum(latencies) / len(latencies) * 1000
+                if latencies else 0.0,
+                'p50': percentile(latencies, 50) * 1000,
+                'p95': percentile(latencies, 95) * 1000,
+                'p99': percentile(latencies, 99) * 1000}
+        return states
+
+
+class SyntheticClient:
+    """
+    A client with its own account running a scenario mix
+
+    Method(s):
+    - setup: create the account and add the first blocks
+    - step: run one operation
+    - teardown: delete the account
+    """
+
+    def __init__(self, number, options, recorder, context, loop):
+        """Initialization"""
+        login = 'bench-{}-{}'.format(options.seed, number).encode()
+        self.client = AioClient(options.host, options.port, login,
+                                b'bench password', context=context, loop=loop,
+                                cur1=options.curve, cip1=options.cipher)
+        self.recorder = recorder
+        self.size = options.size
+        self.sibs = options.sibs
+        self.random = random.Random(hash((options.seed, number)))
+        self.indexes = []  # Indexes of the blocks stored
+
+    @asyncio.coroutine
+    def _connect(self, authenticate):
+        """Open a connection and a session"""
+        timed = self.recorder.timed
+        yield from timed('S0', self.client.connect())
+        yield from timed('S1', self.client.open_session())
+        if authenticate:
+            yield from timed('S21', self.client.authenticate())
+        else:
+            yield from timed('S22', self.client.creation())
+        yield from timed('S31', self.client.configuration())
+
+    def _new_sib(self):
+        """Return a new block"""
+        return self.client.new_sib(
+            'bench {}'.format(self.random.randrange(1000)),
+            'x' * self.size)
+
+    @asyncio.coroutine
+    def setup(self):
+        """Create the account and add the first blocks"""
+        yield from self._connect(False)
+        for i in range(self.sibs):
+            yield from self.step('add')
+
+    @asyncio.coroutine
+    def step(self, operation):
+        """Run one operation"""
+        timed = self.recorder.timed
+        if operation in ('update', 'delete') and not self.indexes:
+            operation = 'add'
+        if operation == 'login':
+            self.client.close()
+            yield from self._connect(True)
+        elif operation == 'add':
+            self.indexes.append((yield from timed(
+                'S35', self.client.add_data(self._new_sib()))))
+        elif operation == 'update':
+            index = self.random.choice(self.indexes)
+            yield from timed('S37', self.client.update_data(
+                index, self._new_sib()))
+        elif operation == 'delete':
+            index = self.indexes.pop(self.random.randrange(len(self.indexes)))
+            yield from timed('S36', self.client.delete_data(index))
+        elif operation == 'search':
+            yield from timed('S34', self.client.search('bench'))
+        elif operation == 'export':
+            yield from timed('S32', self.client.exportation())
+
+    @asyncio.coroutine
+    def teardown(self):
+        """Delete the account"""
+        try:
+            yield from self.recorder.timed('S33', self.client.deletion())
+        finally:
+            self.client.close()
+
+
+@asyncio.coroutine
+def run(options, context, loop):
+    """Run the synthetic clients; return the results dictionary"""
+    mix = parse_mix(options.mix)
+    population = [operation for operation in sorted(mix)
+                  for i in range(mix[operation])]  # Weighted operations
+    recorder = Recorder()
+    setup = asyncio.Semaphore(options.ramp, loop=loop)  # Concurrent setups
+    prepared = [0]  # Number of clients set up (or failed)
+    failures = []
+
+    @asyncio.coroutine
+    def one_client(number):
+        client = SyntheticClient(number, options, recorder, context, loop)
+        try:
+            with (yield from setup):
+                yield from client.setup()
+        finally:
+            prepared[0] += 1
+        yield from ready.wait()
+        done = 0
+        while time.perf_counter() < deadline[0] and \
+                (options.operations == 0 or done < options.operations):
+            operation = client.random.choice(population)
+            yield from client.step(operation)
+            done += 1
+        yield from client.teardown()
+
+    @asyncio.coroutine
+    def guarded(number):
+        try:
+            yield from one_client(number)
+        except Exception as exc:
+            failures.append('{}: {}'.format(type(exc).__name__, exc))
+
+    ready = asyncio.Event(loop=loop)  # All clients set up
+    deadline = [float('inf')]
+    tasks = [asyncio.ensure_future(guarded(i), loop=loop)
+             for i in range(options.clients)]
+
+    # Wait for the setups then measure the scenario only
+    while prepared[0] < options.clients:
+        yield from asyncio.sleep(0.1, loop=loop)
+    setup_states = recorder.results(1.0)
+    recorder.latencies.clear()
+    recorder.errors.clear()
+    begin = time.perf_counter()
+    deadline[0] = begin + options.duration
+    ready.set()
+    yield from asyncio.gather(*tasks, loop=loop)
+    duration = time.perf_counter() - begin
+
+    states = recorder.results(duration)
+    count = sum(state['count'] for state in states.values())
+    return {'version': mnemopwd.__version__,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'settings': {'clients': options.clients, 'mix': mix,
+                         'duration': options.duration,
+                         'operations': options.operations,
+                         'sibs': options.sibs, 'size': options.size,
+                         'curve': options.curve, 'cipher': options.cipher},
+            'duration': duration,
+            'throughput': count / duration if duration else 0.0,
+            'setup': setup_states,
+            'states': states,
+            'failures': failures}
+
+
+def report(results, previous=None):
+    """Return the text report of the results (compared with previous
+    results if given)"""
+    columns = ['count', 'errors', 'throughput', 'p50', 'p95', 'p99']
+    lines = ['MnemoPwd {} - {} clients - {:.1f}s - {:.1f} requests/s'.format(
+        results['version'], results['settings']['clients'],
+        results['duration'], results['throughput'])]
+    lines.append('{:>6}'.format('state') +
+                 ''.join('{:>12}'.format(c) for c in columns))
+    for state, values in sorted(results['states'].items()):
+        line = '{:>6}'.format(state) + ''.join(
+            '{:>12.1f}'.format(values[c]) for c in columns)
+        if previous is not None and state in previous['states']:
+            old = previous['states'][state]
+            line += '  p95 {:+.0%} throughput {:+.0%}'.format(
+                values['p95'] / old['p95'] - 1 if old['p95'] else 0.0,
+                values['throughput'] / old['throughput'] - 1
+                if old['throughput'] else 0.0)
+        lines.append(line)
+    if previous is not None:
+        lines.append('compared with MnemoPwd {} ({})'.format(
+            previous['version'], previous['date']))
+    for failure in sorted(set(results['failures'])):
+        lines.append('failure: ' + failure)
+    return '\n'.join(lines)
+
+
+def save(results, filename):
+    """Export the results as JSON"""
+    with open(filename, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load(filename):
+    """Import results exported as JSON"""
+    with open(filename) as file:
+        return json.load(file)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import asyncio
+import logging
+
+if not hasattr(asyncio, 'coroutine'):
+    raise unittest.SkipTest('the client needs generator-based co-routines')
+
+from mnemopwd.client.util.Configuration import Configuration
+from mnemopwd.client.corelayer.ClientCore import ClientCore
+
+
+class FakeTransport:
+    """Transport of a connection"""
+    def close(self):
+        pass
+
+
+class FakeServer:
+    """Server storing blocks and able to lose the connection once the
+    next request is executed"""
+    def __init__(self):
+        self.blocks = dict()
+        self.index = 0
+        self.added = self.deleted = self.rejected = 0
+        self.drop = False
+
+
+class FakeProtocol:
+    """Protocol handler executing the requests on a fake server"""
+    def __init__(self, core, server):
+        self.core = core
+        self.server = server
+        self.states = {'32R': '32R', '35R': '35R', '36R': '36R'}
+        self.state = None
+
+    def data_received(self, data):
+        """Execute the request of the actual state (in the executor)"""
+        server, core = self.server, self.core
+        if self.state == '35R':
+            server.index += 1
+            server.blocks[server.index] = data
+            server.added += 1
+            core.last_index = server.index
+        elif self.state == '36R':
+            if data not in server.blocks:
+                server.rejected += 1  # The server would close the session
+            else:
+                del server.blocks[data]
+                server.deleted += 1
+        elif self.state == '32R':
+            for index, sib in server.blocks.items():
+                core.assign_result_search_block(index, sib)
+        if server.drop:
+            # Executed by the server but the answer is lost
+            server.drop = False
+            core.loop.call_soon_threadsafe(core.resume, self)
+        else:
+            core.taskInProgress = False
+
+
+class FakeBlock:
+    """Block with encrypted information"""
+    def __init__(self, *infos):
+        self.infos = infos
+        self.nbInfo = len(infos)
+
+    def get_info(self, number):
+        return self.infos[number - 1]
+
+
+class FakeCore(ClientCore):
+    """Client core without UI layer and resuming on the fake server"""
+    def __init__(self, loop, server):
+        self.observers = []
+        self.loop = loop
+        self.server = server
+        self.table = {}
+        self.notify = True
+        self.last_index = None
+        self.interrupted = self.taskInProgress = False
+        self.resumption = None
+        self.vault = ('login', 'ms', 'keyH')  # Vault unlocked
+        self.transport = FakeTransport()
+        self.protocol = FakeProtocol(self, server)
+        self.resumed = 0
+
+    @asyncio.coroutine
+    def _resume(self):
+        """Resume the session on a new connection"""
+        yield from asyncio.sleep(0, loop=self.loop)
+        self.transport = FakeTransport()
+        self.protocol = FakeProtocol(self, self.server)
+        self.resumed += 1
+        resumption, self.resumption = self.resumption, None
+        resumption.set_result(True)
+
+
+class Test_ClientCoreResumptionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(filename='test/test_client/test_ClientCore.log')
+
+    def setUp(self):
+        self.sessionresume = Configuration.sessionresume
+        Configuration.sessionresume = 1
+        self.loop = asyncio.new_event_loop()
+        self.server = FakeServer()
+        self.core = FakeCore(self.loop, self.server)
+
+    def tearDown(self):
+        Configuration.sessionresume = self.sessionresume
+        self.loop.close()
+
+    def run_task(self, coro):
+        self.loop.run_until_complete(
+            asyncio.wait_for(coro, 5, loop=self.loop))
+
+    def test_add_not_replayed(self):
+        sib = FakeBlock(b'login', b'password')
+        self.run_task(self.core._task_add_data(FakeBlock(b'other')))
+        self.server.drop = True
+        self.run_task(self.core._task_add_data(sib))
+        self.assertEqual(self.core.resumed, 1)
+        self.assertEqual(self.server.added, 2)  # A single add
+        self.assertEqual(self.core.last_index, 2)
+        self.assertIs(self.core.table[2], self.server.blocks[2])
+        self.assertIsNotNone(self.core.transport)
+
+    def test_add_replayed(self):
+        # Connection lost before the execution by the server
+        sib = FakeBlock(b'login', b'password')
+        self.core.protocol.data_received = \
+            lambda data: self.loop.call_soon_threadsafe(
+                self.core.resume, self.core.protocol)
+        self.run_task(self.core._task_add_data(sib))
+        self.assertEqual(self.core.resumed, 1)
+        self.assertEqual(self.server.added, 1)
+        self.assertEqual(list(self.server.blocks), [1])
+
+    def test_delete_not_replayed(self):
+        self.run_task(self.core._task_add_data(FakeBlock(b'login')))
+        self.server.drop = True
+        self.run_task(self.core._task_delete_data(1))
+        self.assertEqual(self.core.resumed, 1)
+        self.assertEqual(self.server.deleted, 1)
+        self.assertEqual(self.server.rejected, 0)
+        self.assertNotIn(1, self.core.table)
+        self.assertIsNotNone(self.core.transport)  # Session alive
+        self.assertIsNotNone(self.core.vault)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,6 +27,7 @@
 
 import unittest
 import logging
+import concurrent.futures
 from mnemopwd.common.KeyHandler import KeyHandler
 
 
@@ -73,5 +74,27 @@ class Test_KeyHandlerTestCase(unittest.TestCase):
         cyphertext = self.foo1.decrypt(1, cyphertext)
         self.assertEqual(self.plaintext1, self.foo1.decrypt(0, cyphertext))
 
+    def test_encrypt_decrypt_many(self):
+        plaintexts = [self.plaintext1, b'', b'x' * 100]
+        cyphertexts = self.foo1.encrypt_many(plaintexts)
+        cyphertext = self.foo1.decrypt(2, cyphertexts[2])
+        cyphertext = self.foo1.decrypt(1, cyphertext)
+        self.assertEqual(plaintexts[2], self.foo1.decrypt(0, cyphertext))
+        self.assertEqual(plaintexts, self.foo1.decrypt_many(cyphertexts))
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            cyphertexts = self.foo1.encrypt_many(plaintexts, executor)
+            self.assertEqual(plaintexts,
+                             self.foo1.decrypt_many(cyphertexts, executor))
+
+    def test_aead_stages(self):
+        foo2 = KeyHandler(self.ikey, cip1='aes-256-gcm',
+                          cur2='sect409k1', cip2='aes-256-cbc',
+                          cur3='secp256k1', cip3='aes-128-gcm')
+        plaintexts = [self.plaintext1, b'']
+        cyphertexts = foo2.encrypt_many(plaintexts)
+        self.assertEqual(plaintexts, foo2.decrypt_many(cyphertexts))
+        cyphertext = foo2.encrypt(0, self.plaintext1)
+        self.assertEqual(self.plaintext1, foo2.decrypt(0, cyphertext))
+
 if __name__ == '__main__':
     unittest.main()
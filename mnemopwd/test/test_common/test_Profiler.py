@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import cProfile
+
+from mnemopwd.common.util.Profiler import Profiler, anonymize
+
+
+class Test_ProfilerTestCase(unittest.TestCase):
+
+    def test_run(self):
+        profiler = Profiler(threshold=10.0)
+        self.assertEqual(profiler.run('add', lambda a, b: a + b, 1, 2), 3)
+        profiler.run('add', lambda a, b: a + b, 3, 4)
+        self.assertEqual(profiler.stats['add'][0], 2)
+        self.assertIn('add: 2 x', profiler.summary())
+
+    def test_exception(self):
+        profiler = Profiler(threshold=10.0)
+        with self.assertRaises(ZeroDivisionError):
+            profiler.run('div', lambda: 1 / 0)
+        self.assertEqual(profiler.stats['div'][0], 1)
+
+    def test_slow_operation(self):
+        profiler = Profiler(threshold=0.0)
+        with self.assertLogs(level='WARNING') as log:
+            profiler.run('S1', len, b'data', account='alice')
+        self.assertIn('Slow operation S1', log.output[0])
+        self.assertIn(anonymize('alice'), log.output[0])
+        self.assertNotIn('alice', log.output[0])
+
+    def test_sample_and_memory(self):
+        profiler = Profiler(threshold=10.0, sample=2, memory=True)
+        with self.assertLogs(level='INFO') as log:
+            for _ in range(4):
+                profiler.run('S2', sorted, list(range(100)))
+        self.assertEqual(len(log.output), 2)
+        self.assertIn('Profile of S2', log.output[0])
+
+    def test_one_sample_at_a_time(self):
+        profiler = Profiler(threshold=10.0, sample=1)
+        inner = lambda: profiler.run('inner', sorted, [3, 1, 2])
+        with self.assertLogs(level='INFO') as log:
+            self.assertEqual(profiler.run('outer', inner), [1, 2, 3])
+        self.assertEqual(len(log.output), 1)  # Inner sample skipped
+        self.assertIn('Profile of outer', log.output[0])
+        self.assertFalse(profiler.sampling.locked())
+
+    def test_other_profiling_tool(self):
+        profiler = Profiler(threshold=10.0, sample=1)
+        other = cProfile.Profile()
+        other.enable()
+        try:
+            # Refused since Python 3.12: the sample is skipped
+            self.assertEqual(profiler.run('S3', sorted, [2, 1]), [1, 2])
+        finally:
+            other.disable()
+        self.assertEqual(profiler.stats['S3'][0], 1)
+        self.assertFalse(profiler.sampling.locked())
+
+    def test_anonymize(self):
+        self.assertEqual(anonymize(None), '-')
+        self.assertEqual(anonymize('bob'), anonymize(b'bob'))
+        self.assertEqual(len(anonymize('bob')), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,6 +27,9 @@
 
 import unittest
 import logging
+import concurrent.futures
+import pickle
+import struct
 
 from mnemopwd.pyelliptic import hash as _hash
 from mnemopwd.common.SecretInfoBlock import SecretInfoBlock
@@ -51,13 +54,18 @@ class SecretInfoBlockTestCase(unittest.TestCase):
         self.foo1 = SecretInfoBlock(SecretInfoBlockTestCase.keyh)
         
         # Compute hmac
-        state = self.foo1.__dict__.copy()
-        del state['keyH']
+        state = {'_infos': dict(self.foo1.infos), '_nbInfo': self.foo1.nbInfo}
         state_list = list(state['_infos'].items())
         state_list.append(('_nbInfo', state['_nbInfo']))
         state_list.sort()
         sorted_list =  str(state_list).encode() + SecretInfoBlockTestCase.keyh.config.encode()
-        self.hmac1 = _hash.hmac_sha512(SecretInfoBlockTestCase.keyh.ikey, sorted_list)
+        self.legacy1 = _hash.hmac_sha512(SecretInfoBlockTestCase.keyh.ikey, sorted_list)
+
+        # Compute hmac of the canonical binary encoding (version 2)
+        config = SecretInfoBlockTestCase.keyh.config.encode()
+        message = b'SIB\x02' + struct.pack('>I', 1) + b'\xff\xff\xff\xff' + \
+            struct.pack('>I', len(config)) + config
+        self.hmac1 = b'\x02' + _hash.hmac_sha512(SecretInfoBlockTestCase.keyh.ikey, message)
         
         self.nbInfo2 = 2
         self.foo2 = SecretInfoBlock(SecretInfoBlockTestCase.keyh, self.nbInfo2)
@@ -123,6 +131,40 @@ class SecretInfoBlockTestCase(unittest.TestCase):
             self.foo1.__setstate__(state)
             self.foo1.control_integrity(SecretInfoBlockTestCase.keyh)
 
+    def test_legacy_fingerprint(self):
+        state = {"_infos":{}, "_nbInfo":1, "fingerprint":self.legacy1}
+        self.foo1.__setstate__(state)
+        self.foo1.control_integrity(SecretInfoBlockTestCase.keyh)
+        # An unmodified block keeps its fingerprint
+        self.assertEqual(self.foo1.__getstate__()["fingerprint"], self.legacy1)
+
+        state = {"_infos":{}, "_nbInfo":2, "fingerprint":self.legacy1}
+        with self.assertRaises(AssertionError):
+            self.foo1.__setstate__(state)
+            self.foo1.control_integrity(SecretInfoBlockTestCase.keyh)
+
+    def test_fingerprint_cache(self):
+        self.foo2["info1"] = self.value
+        fingerprint = self.foo2.__getstate__()["fingerprint"]
+        self.assertIs(self.foo2.__getstate__()["fingerprint"], fingerprint)
+        bar = pickle.loads(pickle.dumps(self.foo2))
+        bar.control_integrity(SecretInfoBlockTestCase.keyh)
+        self.assertIs(bar.__getstate__()["fingerprint"], bar.fingerprint)
+        # Each modification needs a new fingerprint
+        for modify in (lambda: bar.set_secret(2, self.value),
+                       lambda: bar.del_info(2),
+                       lambda: setattr(bar, 'nbInfo', 3),
+                       lambda: bar.set_many({'info3': self.value})):
+            fingerprint = bar.__getstate__()["fingerprint"]
+            modify()
+            self.assertIsNone(bar.fingerprint)
+            state = bar.__getstate__()
+            self.assertNotEqual(state["fingerprint"], fingerprint)
+        foo = SecretInfoBlock()
+        foo.__setstate__(state)
+        foo.control_integrity(SecretInfoBlockTestCase.keyh)
+        self.assertEqual(foo["info3"], self.value)
+
     def test__verifyindex__(self):
         with self.assertRaises(TypeError):
             self.foo1._verify_index_(10)
@@ -193,9 +235,82 @@ class SecretInfoBlockTestCase(unittest.TestCase):
         self.foo1["info1"] = self.value
         self.assertEqual(len(self.foo1), 1)
         
-        self.foo1.infos["info2"] = self.value
-        with self.assertRaises(AssertionError):
-            len(self.foo1)
+        with self.assertRaises(KeyError):
+            self.foo1.infos["info2"] = self.value
+        self.assertEqual(len(self.foo1), 1)
+
+    def test_info_numbers(self):
+        self.foo2.set_secret(2, self.value)
+        self.assertEqual(self.foo2.get_secret(2), self.value)
+        self.assertEqual(self.foo2.get_info(2), self.foo2.infos['info2'])
+        self.assertEqual(list(self.foo2.infos), ['info2'])
+        with self.assertRaises(KeyError):
+            self.foo2.get_info(1)
+        with self.assertRaises(KeyError):
+            self.foo2.set_info(3, self.value)
+        self.foo2.del_info(2)
+        self.assertEqual(len(self.foo2), 0)
+        with self.assertRaises(AttributeError):
+            self.foo2.other = None  # No __dict__
+
+    def test_many_fields(self):
+        values = [str(j).encode() for j in range(1, 13)]
+        foo = SecretInfoBlock.from_values(SecretInfoBlockTestCase.keyh, values)
+        self.assertEqual(foo['info12'], b'12')
+        self.assertEqual(list(foo), values)
+        with self.assertRaises(KeyError):
+            foo._verify_index_("info13")
+        for index in ("info\u0663", "info1\u0661", "info\uff11", "info01",
+                      "info", "info+1", "info 1"):
+            with self.assertRaises(KeyError):
+                foo._verify_index_(index)
+        with self.assertRaises(KeyError):
+            foo._verify_index_("info01")
+        bar = pickle.loads(pickle.dumps(foo))
+        bar.control_integrity(SecretInfoBlockTestCase.keyh)
+        self.assertEqual(bar.decrypt_all(), values)
+
+    def test_legacy_state(self):
+        # State of the dictionary based blocks (still used by pickle)
+        self.foo2["info2"] = self.value
+        state = self.foo2.__getstate__()
+        self.assertEqual(sorted(state), ['_infos', '_nbInfo', 'fingerprint'])
+        self.assertEqual(list(state['_infos']), ['info2'])
+        foo = SecretInfoBlock.__new__(SecretInfoBlock)
+        foo.__setstate__(dict(state, keyH=None, _iter_counter=2))
+        foo.control_integrity(SecretInfoBlockTestCase.keyh)
+        self.assertEqual(foo["info2"], self.value)
+        self.assertEqual(foo.nbInfo, 2)
+
+    def test_set_many_decrypt_all(self):
+        self.foo1.nbInfo = 3
+        values = {'info1': b'one', 'info2': b'two', 'info3': self.value}
+        self.foo1.set_many(values)
+        self.assertEqual(self.foo1['info2'], b'two')
+        self.assertEqual(self.foo1.decrypt_all(), [b'one', b'two', self.value])
+        with concurrent.futures.ThreadPoolExecutor(3) as executor:
+            self.foo1.set_many(values, executor)
+            self.assertEqual(self.foo1.decrypt_all(executor),
+                             [b'one', b'two', self.value])
+        with self.assertRaises(KeyError):
+            self.foo1.set_many({'info4': self.value})
+
+    def test_from_values(self):
+        values = [b'one', b'two', self.value]
+        with concurrent.futures.ThreadPoolExecutor(3) as executor:
+            foo = SecretInfoBlock.from_values(SecretInfoBlockTestCase.keyh,
+                                              values, executor)
+        self.assertEqual(foo.nbInfo, 3)
+        self.assertEqual(sorted(foo.infos), ['info1', 'info2', 'info3'])
+        self.assertEqual(foo.decrypt_all(), values)
+        # The fingerprint is controlled as for a block built field by field
+        state = foo.__getstate__()
+        bar = SecretInfoBlock()
+        bar.__setstate__(state)
+        bar.control_integrity(SecretInfoBlockTestCase.keyh)
+        self.assertEqual(bar['info3'], self.value)
+        foo = SecretInfoBlock.from_values(SecretInfoBlockTestCase.keyh, [])
+        self.assertEqual((foo.nbInfo, len(foo)), (1, 0))
 
 if __name__ == '__main__':
     unittest.main()
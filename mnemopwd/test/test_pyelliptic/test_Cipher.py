@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from mnemopwd.pyelliptic import Cipher
+
+
+class Test_CipherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.key = b'k' * 32
+        self.plaintext = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" * 50
+
+    def test_ciphering(self):
+        for ciphername in Cipher.get_all_cipher():
+            iv = Cipher.gen_IV(ciphername)
+            ctx = Cipher(self.key, iv, 1, ciphername)
+            ciphertext = ctx.ciphering(self.plaintext)
+            ctx2 = Cipher(self.key, iv, 0, ciphername)
+            if Cipher.is_aead(ciphername):
+                ctx2.set_tag(ctx.get_tag())
+            self.assertEqual(self.plaintext, ctx2.ciphering(ciphertext))
+
+    def test_aead(self):
+        iv = Cipher.gen_IV('aes-256-gcm')
+        self.assertEqual(len(iv), 12)
+        ctx = Cipher(self.key, iv, 1, 'aes-256-gcm')
+        ctx.update_aad(b'header')
+        ciphertext = ctx.ciphering(self.plaintext)
+        tag = ctx.get_tag()
+        self.assertEqual(len(ciphertext), len(self.plaintext))  # No padding
+        self.assertEqual(len(tag), Cipher.tagsize)
+        ctx = Cipher(self.key, iv, 0, 'aes-256-gcm')
+        ctx.update_aad(b'header')
+        ctx.set_tag(tag)
+        self.assertEqual(self.plaintext, ctx.ciphering(ciphertext))
+        # Additional data, ciphertext or tag modified
+        for aad, data, tag2 in ((b'Header', ciphertext, tag),
+                                (b'header', b'X' + ciphertext[1:], tag),
+                                (b'header', ciphertext, b'X' + tag[1:])):
+            ctx = Cipher(self.key, iv, 0, 'aes-256-gcm')
+            ctx.update_aad(aad)
+            ctx.set_tag(tag2)
+            with self.assertRaises(Exception):
+                ctx.ciphering(data)
+
+    def test_update(self):
+        iv = Cipher.gen_IV('aes-256-cbc')
+        ctx = Cipher(self.key, iv, 1)
+        ciphertext = ctx.update(self.plaintext[:100])
+        ciphertext += ctx.update(self.plaintext[100:])
+        ciphertext += ctx.final()
+        self.assertEqual(ciphertext, Cipher(self.key, iv, 1).ciphering(
+            self.plaintext))
+
+    def test_bytes_like_input(self):
+        iv = Cipher.gen_IV('aes-256-cbc')
+        ciphertext = Cipher(self.key, iv, 1).ciphering(self.plaintext)
+        for data in (bytearray(ciphertext), memoryview(ciphertext),
+                     memoryview(bytearray(b'x' + ciphertext))[1:]):
+            self.assertEqual(self.plaintext,
+                             Cipher(self.key, iv, 0).ciphering(data))
+
+    def test_context_reuse(self):
+        iv = Cipher.gen_IV('aes-256-cbc')
+        ctx = Cipher(self.key, iv, 1)
+        ciphertext = ctx.ciphering(self.plaintext)
+        ctx.close()
+        self.assertIsNone(ctx.ctx)
+        # A reused context must not keep the state of the previous one
+        ctx = Cipher(b'o' * 32, iv, 1)
+        ctx.ciphering(b'other')
+        ctx.close()
+        self.assertEqual(self.plaintext, Cipher(self.key, iv, 0).ciphering(
+            ciphertext))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from mnemopwd.pyelliptic import ECC, OpenSSL
+
+
+class Test_ECCTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.curves = ['secp256k1', 'prime256v1', 'sect283r1', 'sect571r1']
+        self.plaintext = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    def test_ecdh(self):
+        for curve in self.curves:
+            alice, bob = ECC(curve=curve), ECC(curve=curve)
+            secret = alice.get_ecdh_key(bob.get_pubkey())
+            self.assertEqual(secret, bob.get_ecdh_key(alice.get_pubkey()))
+            # The native key is kept and reused
+            self.assertEqual(secret, alice.get_ecdh_key(bob.get_pubkey()))
+
+    def test_ecdh_bad_pubkey(self):
+        for curve in self.curves:
+            alice, bob = ECC(curve=curve), ECC(curve=curve)
+            pubkey = bob.get_pubkey()
+            pubkey = pubkey[:-1] + bytes([pubkey[-1] ^ 1])  # Not on curve
+            with self.assertRaises(Exception):
+                alice.get_ecdh_key(pubkey)
+
+    def test_encrypt_decrypt(self):
+        for curve in self.curves:
+            alice = ECC(curve=curve)
+            for i in range(3):
+                ciphertext = alice.encrypt(self.plaintext, alice.get_pubkey(),
+                                           ephemcurve=curve)
+                self.assertEqual(self.plaintext, alice.decrypt(ciphertext))
+
+    def test_ephemeral_format(self):
+        for curve in self.curves:
+            alice = ECC(curve=curve)
+            ciphertext = ECC.raw_encrypt(self.plaintext, alice.pubkey_x,
+                                         alice.pubkey_y, curve=curve,
+                                         ephemcurve=OpenSSL.get_curve(curve))
+            # iv + 04 + ephemeral x + ephemeral y + ciphertext + mac
+            pubkey = ciphertext[16:16 + 1 + 2 * len(alice.pubkey_x)]
+            self.assertEqual(ECC(pubkey=pubkey, curve=curve).get_pubkey(),
+                             pubkey)
+            self.assertEqual(len(ciphertext), 16 + len(pubkey) + 48 + 32)
+            self.assertEqual(self.plaintext, alice.decrypt(ciphertext))
+
+    def test_encrypt_decrypt_aead(self):
+        alice = ECC(curve='sect283r1')
+        cbc = alice.encrypt(self.plaintext, alice.get_pubkey())
+        for ciphername in ('aes-128-gcm', 'aes-256-gcm'):
+            ciphertext = alice.encrypt(self.plaintext, alice.get_pubkey(),
+                                       ciphername=ciphername)
+            self.assertEqual(self.plaintext,
+                             alice.decrypt(ciphertext, ciphername=ciphername))
+            # iv (12) + pubkey + ciphertext (no padding) + tag (16)
+            self.assertEqual(len(ciphertext),
+                             len(cbc) - 4 - 12 - 16)
+            ciphertext = ciphertext[:-20] + b'X' + ciphertext[-19:]
+            with self.assertRaises(RuntimeError):
+                alice.decrypt(ciphertext, ciphername=ciphername)
+
+    def test_encrypt_bad_pubkey(self):
+        alice = ECC(curve='prime256v1')
+        pubkey = alice.get_pubkey()
+        pubkey = pubkey[:-1] + bytes([pubkey[-1] ^ 1])  # Not on curve
+        with self.assertRaises(Exception):
+            alice.encrypt(self.plaintext, pubkey)
+
+
+if __name__ == '__main__':
+    unittest.main()
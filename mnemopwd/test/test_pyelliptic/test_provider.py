@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from mnemopwd.pyelliptic import provider
+from mnemopwd.pyelliptic import hmac_sha256, hmac_sha512, pbkdf2, equals
+from mnemopwd.pyelliptic.provider import OpenSSLProvider, StdlibProvider
+
+
+class Test_ProviderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = [b'', b'key', b'k' * 64, b'k' * 200]
+        self.messages = [b'', b'message', bytes(range(256)) * 10]
+
+    def tearDown(self):
+        provider.use('stdlib')
+
+    def test_default(self):
+        self.assertIs(provider.active, StdlibProvider)
+
+    def test_hmac_parity(self):
+        for k in self.keys:
+            for m in self.messages:
+                self.assertEqual(OpenSSLProvider.hmac_sha256(k, m),
+                                 StdlibProvider.hmac_sha256(k, m))
+                self.assertEqual(OpenSSLProvider.hmac_sha512(k, m),
+                                 StdlibProvider.hmac_sha512(k, m))
+                parts = [m[:3], b'', m[3:]]
+                self.assertEqual(OpenSSLProvider.hmac_sha512_parts(k, parts),
+                                 StdlibProvider.hmac_sha512(k, m))
+                self.assertEqual(StdlibProvider.hmac_sha512_parts(k, parts),
+                                 StdlibProvider.hmac_sha512(k, m))
+
+    def test_pbkdf2_parity(self):
+        for hfunc in ('SHA1', 'SHA256'):
+            for keylen in (16, 32, 64, 100):
+                for i in (1, 1000):
+                    self.assertEqual(
+                        OpenSSLProvider.pbkdf2(b'password', b'salt', i,
+                                               keylen, hfunc),
+                        StdlibProvider.pbkdf2(b'password', b'salt', i,
+                                              keylen, hfunc))
+
+    def test_equals_parity(self):
+        for a, b in ((b'abc', b'abc'), (b'abc', b'abd'), (b'abc', b'ab'),
+                     ('abc', 'abc'), ('abc', 'abd'), ('é', 'é'), ('é', 'e')):
+            self.assertEqual(OpenSSLProvider.equals(a, b),
+                             StdlibProvider.equals(a, b))
+
+    def test_rand(self):
+        for p in (OpenSSLProvider, StdlibProvider):
+            self.assertEqual(len(p.rand(16)), 16)
+            self.assertNotEqual(p.rand(16), p.rand(16))
+
+    def test_use(self):
+        salt, key = pbkdf2(b'password', hfunc='SHA1')
+        self.assertEqual(provider.use('openssl'), 'stdlib')
+        self.assertIs(provider.active, OpenSSLProvider)
+        self.assertEqual((salt, key), pbkdf2(b'password', salt, hfunc='SHA1'))
+        self.assertEqual(hmac_sha512(b'k', b'm'),
+                         StdlibProvider.hmac_sha512(b'k', b'm'))
+        self.assertTrue(equals(hmac_sha256(b'k', b'm'),
+                               StdlibProvider.hmac_sha256(b'k', b'm')))
+        with self.assertRaises(Exception):
+            provider.use('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
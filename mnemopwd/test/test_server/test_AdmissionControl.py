@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import logging
+import concurrent.futures
+import threading
+
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.clients.AdmissionControl import AdmissionControl
+
+
+class Test_AdmissionControlTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(filename='test/test_server/test_AdmissionControl.log')
+
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.admission = AdmissionControl(self.executor)
+        self.saved = (Configuration.max_sessions, Configuration.max_ip_sessions,
+                      Configuration.max_queue)
+        Configuration.max_sessions = 3
+        Configuration.max_ip_sessions = 2
+        Configuration.max_queue = 2
+
+    def tearDown(self):
+        Configuration.max_sessions, Configuration.max_ip_sessions, \
+            Configuration.max_queue = self.saved
+        self.executor.shutdown()
+
+    def test_ip_sessions(self):
+        self.assertIsNone(self.admission.admit('10.0.0.1'))
+        self.assertIsNone(self.admission.admit('10.0.0.1'))
+        self.assertEqual(self.admission.admit('10.0.0.1'), 'ip')
+        self.admission.release('10.0.0.1')
+        self.assertIsNone(self.admission.admit('10.0.0.1'))
+        self.assertEqual(self.admission.rejected['ip'], 1)
+
+    def test_sessions(self):
+        self.assertIsNone(self.admission.admit('10.0.0.1'))
+        self.assertIsNone(self.admission.admit('10.0.0.2'))
+        self.assertIsNone(self.admission.admit('10.0.0.3'))
+        self.assertEqual(self.admission.admit('10.0.0.4'), 'sessions')
+        for ip in ['10.0.0.1', '10.0.0.2', '10.0.0.3']:
+            self.admission.release(ip)
+        self.assertEqual(self.admission.sessions, 0)
+        self.assertEqual(self.admission.ip_sessions, {})
+
+    def test_busy(self):
+        event = threading.Event()
+        for i in range(3):
+            self.executor.submit(event.wait)  # One running, two waiting
+        try:
+            self.assertEqual(self.admission.admit('10.0.0.1'), 'busy')
+            self.assertEqual(self.admission.rejected['busy'], 1)
+        finally:
+            event.set()
+
+if __name__ == '__main__':
+    unittest.main()
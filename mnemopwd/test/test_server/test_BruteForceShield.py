@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import tempfile
+import os
+import stat
+
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.clients.BruteForceShield import BruteForceShield
+
+
+class Test_BruteForceShieldTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.max_login = Configuration.max_login
+        Configuration.max_login = 2
+
+    def tearDown(self):
+        Configuration.max_login = self.max_login
+
+    def attack(self, shield, ip, attempts):
+        for i in range(attempts):
+            shield.add_suspect_ip(ip)
+
+    def test_banishment(self):
+        shield = BruteForceShield()
+        self.attack(shield, '10.0.0.1', 2)
+        self.assertFalse(shield.is_suspect_ip('10.0.0.1'))
+        shield.add_suspect_ip('10.0.0.1')
+        self.assertTrue(shield.is_suspect_ip('10.0.0.1'))
+        self.assertFalse(shield.is_suspect_ip('10.0.0.2'))
+
+    def test_rehabilitation(self):
+        shield = BruteForceShield()
+        self.attack(shield, '10.0.0.1', 3)
+        self.attack(shield, '10.0.0.2', 3)
+        # Simulate an old suspicion period for the first IP
+        counter, start_time = shield.shield['10.0.0.1']
+        old = start_time - BruteForceShield.banishment_period - 1
+        shield.shield['10.0.0.1'] = (counter, old)
+        shield.heap = [(old, '10.0.0.1'), (start_time, '10.0.0.2')]
+        self.assertFalse(shield.is_suspect_ip('10.0.0.1'))
+        self.assertTrue(shield.is_suspect_ip('10.0.0.2'))
+        self.assertEqual(len(shield), 1)
+        self.assertEqual(len(shield.heap), 1)
+
+    def test_prefix(self):
+        shield = BruteForceShield(prefix=24)
+        shield.add_suspect_ip('10.0.0.1')
+        shield.add_suspect_ip('10.0.0.2')
+        shield.add_suspect_ip('10.0.0.3')
+        self.assertTrue(shield.is_suspect_ip('10.0.0.200'))
+        self.assertFalse(shield.is_suspect_ip('10.0.1.1'))
+        self.assertEqual(list(shield.shield), ['10.0.0.0/24'])
+
+    def test_snapshot(self):
+        shield = BruteForceShield()
+        self.attack(shield, '10.0.0.1', 3)
+        self.attack(shield, '10.0.0.2', 1)
+        shield.prefix = 16
+        self.attack(shield, '192.168.3.4', 3)
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'shield')
+            shield.save(filename)
+            self.assertEqual(stat.filemode(os.stat(filename).st_mode),
+                             '-rw-------')
+            loaded = BruteForceShield()
+            loaded.load(filename)
+            self.assertEqual(loaded.shield, shield.shield)
+            self.assertTrue(loaded.is_suspect_ip('10.0.0.1'))
+            self.assertFalse(loaded.is_suspect_ip('10.0.0.2'))
+            loaded.load(os.path.join(path, 'unknown'))  # No snapshot
+            self.assertEqual(len(loaded), 3)
+            self.assertTrue(loaded.is_suspect_ip('192.168.200.1'))
+            # Loaded with another prefix
+            loaded = BruteForceShield(prefix=24)
+            loaded.load(filename)
+            self.assertEqual(sorted(loaded.shield),
+                             ['10.0.0.0/24', '192.168.0.0/16'])
+            self.assertTrue(loaded.is_suspect_ip('10.0.0.2'))
+            self.assertTrue(loaded.is_suspect_ip('192.168.200.1'))
+
+    def test_set_prefix(self):
+        shield = BruteForceShield()
+        self.attack(shield, '10.0.0.1', 3)
+        self.attack(shield, '10.0.0.2', 1)
+        shield.set_prefix(24)
+        self.assertEqual(list(shield.shield), ['10.0.0.0/24'])
+        self.assertTrue(shield.is_suspect_ip('10.0.0.9'))
+        # A smaller prefix keeps the banished network
+        shield.set_prefix(32)
+        self.assertEqual(list(shield.shield), ['10.0.0.0/24'])
+        self.assertTrue(shield.is_suspect_ip('10.0.0.9'))
+        self.assertFalse(shield.is_suspect_ip('10.0.1.1'))
+        shield.add_suspect_ip('10.0.0.9')  # Counted for the network
+        self.assertEqual(shield.shield['10.0.0.0/24'][0], 4)
+        self.attack(shield, '10.0.1.1', 3)
+        self.assertTrue(shield.is_suspect_ip('10.0.1.1'))
+        self.assertIn('10.0.1.1', shield.shield)
+
+if __name__ == '__main__':
+    unittest.main()
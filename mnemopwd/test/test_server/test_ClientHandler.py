@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import logging
+import asyncio
+
+from mnemopwd.server.clients.ClientHandler import ClientHandler
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.util.TimerWheel import TimerWheel
+
+
+class FakeTransport:
+    """Transport closed by the connection handler"""
+    def close(self):
+        pass
+
+
+class LostDuringState:
+    """State losing the connection during its execution"""
+    def __init__(self, testcase):
+        self.testcase = testcase
+
+    def do(self, client, data):
+        client.connection_lost(None)
+        # The session resources are still available for the running state
+        self.testcase.assertIsNotNone(client.dbH)
+        self.testcase.assertIsNotNone(client.keyH)
+
+
+class Test_ClientHandlerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.basicConfig(filename='test/test_server/test_ClientHandler.log')
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = ClientHandler(self.loop, '.', None)
+        self.client.transport = FakeTransport()
+        self.client.peername = ('127.0.0.1', 50000)
+        self.client.dbH = self.client.keyH = object()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_release_when_idle(self):
+        self.client.connection_lost(None)
+        self.assertIsNone(self.client.dbH)
+        self.assertIsNone(self.client.keyH)
+
+    def test_release_after_running_state(self):
+        self.client.running = 1  # As done by execute
+        self.client._execute(LostDuringState(self), None)
+        self.assertEqual(self.client.running, 0)
+        self.assertIsNone(self.client.dbH)
+        self.assertIsNone(self.client.keyH)
+
+    def test_no_timeout(self):
+        saved = Configuration.handshake_timeout, Configuration.idle_timeout
+        Configuration.handshake_timeout = Configuration.idle_timeout = 0
+        try:
+            timers = TimerWheel(self.loop, tick=0.01, size=4)
+            self.client.dbH = None  # Handshake in progress
+            timers.add(self.client)
+            self.client.dbH = object()  # Idle session
+            timers.start()
+            self.loop.run_until_complete(asyncio.sleep(0.1))
+            timers.stop()
+            self.assertEqual(len(timers), 1)  # Still watched, not expired
+        finally:
+            Configuration.handshake_timeout, Configuration.idle_timeout = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import configparser
+import tempfile
+import os
+
+from mnemopwd.server.util.Configuration import Configuration
+
+
+class Test_ConfigurationReloadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = Configuration.configfile, Configuration.poolsize, \
+            Configuration.max_login, Configuration.cmdline
+        self.tmpdir = tempfile.TemporaryDirectory()
+        Configuration.configfile = os.path.join(self.tmpdir.name, 'config')
+        Configuration.__create_config_file__(
+            configparser.ConfigParser(inline_comment_prefixes='#'))
+
+    def tearDown(self):
+        Configuration.configfile, Configuration.poolsize, \
+            Configuration.max_login, Configuration.cmdline = self.saved
+        self.tmpdir.cleanup()
+
+    def set_option(self, section, option, value):
+        fileparser = configparser.ConfigParser(inline_comment_prefixes='#')
+        fileparser.read(Configuration.configfile)
+        fileparser[section][option] = value
+        with open(Configuration.configfile, 'w') as configfile:
+            fileparser.write(configfile)
+
+    def test_unchanged(self):
+        self.assertEqual(Configuration.reload(), {})
+
+    def test_changed(self):
+        poolsize, max_login = Configuration.poolsize, Configuration.max_login
+        self.set_option('server', 'poolsize', str(poolsize + 2))
+        self.set_option('server', 'max_login', str(max_login + 1))
+        self.assertEqual(Configuration.reload(),
+                         {'poolsize': (poolsize, poolsize + 2),
+                          'max_login': (max_login, max_login + 1)})
+        self.assertEqual(Configuration.poolsize, poolsize + 2)
+
+    def test_command_line(self):
+        poolsize, max_login = Configuration.poolsize, Configuration.max_login
+        Configuration.cmdline = {'poolsize'}
+        self.set_option('server', 'poolsize', str(poolsize + 2))
+        self.set_option('server', 'max_login', str(max_login + 1))
+        self.assertEqual(Configuration.reload(),
+                         {'max_login': (max_login, max_login + 1)})
+        self.assertEqual(Configuration.poolsize, poolsize)
+
+    def test_read_only(self):
+        fileparser = configparser.ConfigParser(inline_comment_prefixes='#')
+        fileparser.read(Configuration.configfile)
+        del fileparser['server']['max_sessions']
+        with open(Configuration.configfile, 'w') as configfile:
+            fileparser.write(configfile)
+        with open(Configuration.configfile) as configfile:
+            content = configfile.read()
+        with self.assertLogs(level='WARNING') as log:
+            self.assertEqual(Configuration.reload(), {})
+        self.assertIn('incomplete', log.output[0])
+        with open(Configuration.configfile) as configfile:
+            self.assertEqual(configfile.read(), content)
+
+    def test_invalid(self):
+        poolsize = Configuration.poolsize
+        self.set_option('server', 'poolsize', str(poolsize + 2))
+        self.set_option('server', 'tlscurve', 'unknown-curve')
+        with self.assertRaises(ValueError):
+            Configuration.reload()
+        self.assertEqual(Configuration.poolsize, poolsize)
+        self.assertEqual(Configuration.tlscurve, 'auto')
+
+
+if __name__ == '__main__':
+    unittest.main()
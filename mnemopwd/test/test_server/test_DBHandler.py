@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import re
+
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.clients.DBHandler import DBHandler
+
+
+class FakeKeyHandler:
+    """Key handler with clear information counting the decryptions"""
+    def __init__(self):
+        self.decrypted = []
+
+    def decrypt_many(self, infos):
+        self.decrypted.extend(infos)
+        return infos
+
+
+class FakeBlock:
+    """Block of information"""
+    def __init__(self, *infos):
+        self.infos = infos
+        self.nbInfo = len(infos)
+
+    def get_info(self, number):
+        return self.infos[number - 1]
+
+
+class Test_DBHandlerSearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.search_mode = Configuration.search_mode
+        self.keyH = FakeKeyHandler()
+        self.batch = [(1, FakeBlock(b'Mail', b'alice', b'secret')),
+                      (2, FakeBlock(b'Bank', b'bob')),
+                      (4, FakeBlock(b'Forum', b'ALICE', b'other', b'x'))]
+
+    def tearDown(self):
+        Configuration.search_mode = self.search_mode
+
+    def search(self, pattern):
+        tabsibs = []
+        DBHandler._search_batch(self.keyH, pattern, self.batch, tabsibs)
+        return [i for i, sib in tabsibs]
+
+    def test_search_all(self):
+        Configuration.search_mode = 'all'
+        self.assertEqual(self.search(re.compile('alice', re.IGNORECASE)),
+                         [1, 4])
+        # No decryption after the first matching information of a sib
+        self.assertEqual(self.keyH.decrypted,
+                         [b'Mail', b'Bank', b'Forum', b'alice', b'bob',
+                          b'ALICE'])
+
+    def test_search_first(self):
+        Configuration.search_mode = 'first'
+        self.assertEqual(self.search(re.compile('^[bf]', re.IGNORECASE)),
+                         [2, 4])
+        self.assertEqual(self.keyH.decrypted, [b'Mail', b'Bank', b'Forum'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import time
+
+from mnemopwd.server.clients.EphemeralKeyPool import EphemeralKeyPool
+
+
+class Test_EphemeralKeyPoolTestCase(unittest.TestCase):
+
+    def wait_for(self, pool, number, timeout=10):
+        deadline = time.time() + timeout
+        while len(pool.keys) < number and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_get(self):
+        pool = EphemeralKeyPool(8, 2)
+        pool.start()
+        try:
+            self.wait_for(pool, 8)
+            self.assertEqual(len(pool.keys), 8)
+            keys = [pool.get() for i in range(20)]
+            # Each keypair is handed out once
+            self.assertEqual(len({key.get_pubkey() for key in keys}), 20)
+            self.assertGreater(pool.misses, 0)
+            # Pool is refilled
+            self.wait_for(pool, 8)
+            self.assertEqual(len(pool.keys), 8)
+        finally:
+            pool.stop()
+        self.assertIsNone(pool.thread)
+
+    def test_no_pool(self):
+        pool = EphemeralKeyPool(0, 0)
+        pool.start()
+        self.assertIsNone(pool.thread)
+        self.assertIsNotNone(pool.get().get_pubkey())
+        self.assertEqual(pool.misses, 1)
+        pool.stop()
+
+if __name__ == '__main__':
+    unittest.main()
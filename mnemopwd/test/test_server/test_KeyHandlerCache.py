@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import time
+
+from mnemopwd.server.clients.KeyHandlerCache import KeyHandlerCache
+
+CONFIG = 'sect283r1;aes-256-cbc;;;;'
+
+
+class Test_KeyHandlerCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ms1 = b'the master secret 1'
+        self.ms2 = b'the master secret 2'
+
+    def test_hit(self):
+        cache = KeyHandlerCache(2, 60)
+        keyH = cache.get(self.ms1, CONFIG, 'account1')
+        self.assertEqual(keyH.config, CONFIG)
+        self.assertIs(cache.get(self.ms1, CONFIG, 'account1'), keyH)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # Another configuration is another entry
+        other = cache.get(self.ms1, 'sect283r1;aes-128-cbc;;;;', 'account1')
+        self.assertIsNot(other, keyH)
+        self.assertEqual(len(cache), 2)
+
+    def test_lru(self):
+        cache = KeyHandlerCache(2, 60)
+        keyH1 = cache.get(self.ms1, CONFIG, 'account1')
+        cache.get(self.ms2, CONFIG, 'account2')
+        cache.get(self.ms1, CONFIG, 'account1')  # account1 is the most recent
+        cache.get(b'the master secret 3', CONFIG, 'account3')
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(self.ms1, CONFIG, 'account1'), keyH1)
+        self.assertNotIn('account2', cache.accounts)
+
+    def test_ttl(self):
+        cache = KeyHandlerCache(2, 0.05)
+        keyH = cache.get(self.ms1, CONFIG, 'account1')
+        time.sleep(0.1)
+        self.assertIsNot(cache.get(self.ms1, CONFIG, 'account1'), keyH)
+        self.assertEqual(len(cache), 1)
+
+    def test_invalidate(self):
+        cache = KeyHandlerCache(4, 60)
+        cache.get(self.ms1, CONFIG, 'account1')
+        cache.get(self.ms1, 'sect283r1;aes-128-cbc;;;;', 'account1')
+        cache.get(self.ms2, CONFIG, 'account2')
+        cache.invalidate('account1')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(list(cache.accounts), ['account2'])
+
+    def test_disabled(self):
+        cache = KeyHandlerCache(0, 60)
+        keyH = cache.get(self.ms1, CONFIG, 'account1')
+        self.assertIsNot(cache.get(self.ms1, CONFIG, 'account1'), keyH)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import asyncio
+import tempfile
+import os
+import socket
+
+from mnemopwd.server.util.Metrics import Metrics, MetricsProtocol
+
+
+class Test_MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        Metrics.reset()
+
+    def tearDown(self):
+        Metrics.callbacks.pop('test_callback', None)
+        Metrics.reset()
+
+    def test_counter_gauge(self):
+        Metrics.inc('mnemopwd_bytes_sent_total', 10)
+        Metrics.inc('mnemopwd_bytes_sent_total', 5)
+        Metrics.inc('mnemopwd_sessions_active')
+        Metrics.dec('mnemopwd_sessions_active')
+        Metrics.inc('mnemopwd_state_requests_total', labels={'state': 'StateS0'})
+        text = Metrics.render()
+        self.assertIn('# TYPE mnemopwd_bytes_sent_total counter', text)
+        self.assertIn('mnemopwd_bytes_sent_total 15\n', text)
+        self.assertIn('mnemopwd_sessions_active 0\n', text)
+        self.assertIn('mnemopwd_state_requests_total{state="StateS0"} 1\n', text)
+
+    def test_histogram(self):
+        @Metrics.timed('mnemopwd_db_seconds', operation='test')
+        def operation():
+            return 42
+        self.assertEqual(operation(), 42)
+        Metrics.observe('mnemopwd_db_seconds', 20, labels={'operation': 'test'})
+        text = Metrics.render()
+        self.assertIn('# TYPE mnemopwd_db_seconds histogram', text)
+        self.assertIn('mnemopwd_db_seconds_bucket{operation="test",le="0.001"} 1\n', text)
+        self.assertIn('mnemopwd_db_seconds_bucket{operation="test",le="10"} 1\n', text)
+        self.assertIn('mnemopwd_db_seconds_bucket{operation="test",le="+Inf"} 2\n', text)
+        self.assertIn('mnemopwd_db_seconds_count{operation="test"} 2\n', text)
+
+    def test_disabled(self):
+        @Metrics.timed('mnemopwd_db_seconds', operation='test')
+        def operation():
+            return 42
+        Metrics.enabled = False
+        try:
+            Metrics.inc('mnemopwd_bytes_sent_total', 10)
+            Metrics.set('mnemopwd_sessions_active', 3)
+            Metrics.observe('mnemopwd_state_seconds', 0.5)
+            self.assertEqual(operation(), 42)
+        finally:
+            Metrics.enabled = True
+        self.assertEqual(Metrics.values, {})
+        self.assertEqual(Metrics.histograms, {})
+
+    def test_callback(self):
+        Metrics.register('test_callback', lambda: {(('reason', 'ip'),): 3})
+        self.assertIn('test_callback{reason="ip"} 3\n', Metrics.render())
+
+    def test_endpoint(self):
+        Metrics.inc('mnemopwd_bytes_received_total', 7)
+        loop = asyncio.new_event_loop()
+        with tempfile.TemporaryDirectory() as path:
+            path = os.path.join(path, 'metrics')
+            server = loop.run_until_complete(loop.create_unix_server(
+                lambda: MetricsProtocol(loop), path))
+
+            def request(data):
+                sock = socket.socket(socket.AF_UNIX)
+                sock.setblocking(False)
+                loop.run_until_complete(loop.sock_connect(sock, path))
+                if data:
+                    loop.run_until_complete(loop.sock_sendall(sock, data))
+                answer = b''
+                while True:
+                    chunk = loop.run_until_complete(loop.sock_recv(sock, 4096))
+                    if not chunk:
+                        break
+                    answer += chunk
+                sock.close()
+                return answer
+
+            try:
+                http = request(b'GET /metrics HTTP/1.0\r\n\r\n')
+                self.assertTrue(http.startswith(b'HTTP/1.0 200 OK'))
+                self.assertIn(b'mnemopwd_bytes_received_total 7\n', http)
+                raw = request(None)
+                self.assertTrue(raw.startswith(b'# '))
+            finally:
+                server.close()
+                loop.run_until_complete(server.wait_closed())
+                loop.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import logging
+import io
+
+from mnemopwd.server.util.QueueLogging import KeyValueFormatter, \
+    QueueLogHandler, start_queue_logging, stop_queue_logging
+
+
+class Test_QueueLoggingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.log = logging.getLogger()
+        self.saved = self.log.handlers[:], self.log.level
+        self.log.handlers = []
+        self.log.setLevel(logging.INFO)
+        self.output = io.StringIO()
+        handler = logging.StreamHandler(self.output)
+        handler.setFormatter(KeyValueFormatter('%(levelname)s %(message)s'))
+        self.log.addHandler(handler)
+
+    def tearDown(self):
+        self.log.handlers, level = self.saved
+        self.log.setLevel(level)
+
+    def test_key_value_formatter(self):
+        logging.info('Login from %s', 'peer', extra={'state': 'S21', 'ms': 3})
+        self.assertEqual(self.output.getvalue(),
+                         'INFO Login from peer ms=3 state=S21\n')
+
+    def test_queue(self):
+        listener, qhandler = start_queue_logging(100)
+        self.assertEqual(self.log.handlers, [qhandler])
+        for i in range(10):
+            logging.info('Record %d', i)
+        try:
+            raise ValueError('failure')
+        except ValueError:
+            logging.exception('Exception')
+        stop_queue_logging(listener, qhandler)
+        self.assertNotIn(qhandler, self.log.handlers)
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(lines[:10], ['INFO Record %d' % i for i in range(10)])
+        self.assertEqual(lines[10], 'ERROR Exception')
+        self.assertIn('ValueError: failure', self.output.getvalue())
+
+    def test_drop(self):
+        qhandler = QueueLogHandler(2)
+        self.log.handlers = [qhandler]
+        for i in range(5):
+            logging.info('Record %d', i)
+        self.assertEqual(qhandler.queue.qsize(), 2)
+        self.assertEqual(qhandler.dropped, 3)
+        self.assertEqual(qhandler.queue.get().getMessage(), 'Record 0')
+
+
+if __name__ == '__main__':
+    unittest.main()
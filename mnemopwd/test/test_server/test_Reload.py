@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import configparser
+import tempfile
+import asyncio
+import os
+
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.clients.EphemeralKeyPool import EphemeralKeyPool
+from mnemopwd.server.server import Server
+
+
+class Test_ServerReloadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = {name: getattr(Configuration, name) for name in
+                      ('configfile', 'keypool_size', 'keypool_low',
+                       'tlscurve', 'cmdline')}
+        self.tmpdir = tempfile.TemporaryDirectory()
+        Configuration.configfile = os.path.join(self.tmpdir.name, 'config')
+        Configuration.keypool_size = Configuration.keypool_low = 0
+        Configuration.__create_config_file__(
+            configparser.ConfigParser(inline_comment_prefixes='#'))
+        self.server = Server.__new__(Server)  # Only the reloaded parts
+        self.server.loop = asyncio.new_event_loop()
+        self.server.keypool = EphemeralKeyPool(0, 0)
+        self.server.keypool.start()
+
+    def tearDown(self):
+        self.server.keypool.stop()
+        self.server.loop.close()
+        for name, value in self.saved.items():
+            setattr(Configuration, name, value)
+        self.tmpdir.cleanup()
+
+    def set_option(self, section, option, value):
+        fileparser = configparser.ConfigParser(inline_comment_prefixes='#')
+        fileparser.read(Configuration.configfile)
+        fileparser[section][option] = value
+        with open(Configuration.configfile, 'w') as configfile:
+            fileparser.write(configfile)
+
+    def test_keypool_enabled(self):
+        self.assertIsNone(self.server.keypool.thread)
+        self.set_option('server', 'keypool_size', '2')
+        self.set_option('server', 'keypool_low', '1')
+        self.assertEqual(self.server.reload(), [])
+        self.assertIsNotNone(self.server.keypool.thread)
+        self.set_option('server', 'keypool_size', '0')
+        self.assertEqual(self.server.reload(), [])
+        self.assertIsNone(self.server.keypool.thread)
+
+    def test_restart_needed(self):
+        tlscurve = Configuration.tlscurve
+        self.set_option('server', 'tlscurve', 'secp384r1')
+        self.assertEqual(self.server.reload(), ['tlscurve'])
+        self.assertEqual(Configuration.tlscurve, tlscurve)  # Value in use
+
+
+if __name__ == '__main__':
+    unittest.main()
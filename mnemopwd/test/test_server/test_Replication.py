@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import tempfile
+import shelve
+import dbm
+import os
+import stat
+
+from mnemopwd.server.util.Configuration import Configuration
+from mnemopwd.server.replication.ChangeLog import ChangeLog
+from mnemopwd.server.replication.Standby import Standby
+from mnemopwd.server.clients.ClientHandler import ClientHandler
+from mnemopwd.server.clients.DBHandler import DBHandler
+from mnemopwd.server.clients.KeyHandlerCache import KeyHandlerCache
+from mnemopwd.common.SecretInfoBlock import SecretInfoBlock
+
+
+def db_suffix():
+    """Test if the database files have the '.db' suffix expected by
+    DBHandler (depends on the dbm module available)"""
+    with tempfile.TemporaryDirectory() as path:
+        shelve.open(os.path.join(path, 'test'), flag='n').close()
+        return os.listdir(path) == ['test.db']
+
+
+class Test_ChangeLogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'changes.log')
+        self.log = ChangeLog(self.filename, 1024)
+
+    def tearDown(self):
+        self.log.close()
+        self.tmpdir.cleanup()
+
+    def test_encode_decode(self):
+        data = ChangeLog.encode(1, ChangeLog.NEW, 'account') + \
+            ChangeLog.encode(2, ChangeLog.SET, 'account', '1', b'\x00value')
+        records, rest = ChangeLog.decode(data + data[:10])
+        self.assertEqual(records, [(1, ChangeLog.NEW, 'account', '', b''),
+                                   (2, ChangeLog.SET, 'account', '1',
+                                    b'\x00value')])
+        self.assertEqual(rest, data[:10])
+
+    def test_append_records(self):
+        received = []
+        self.log.listeners.append(lambda lsn, record: received.append(lsn))
+        for i in range(1, 6):
+            self.assertEqual(self.log.append(ChangeLog.SET, 'a', str(i),
+                                             b'v'), i)
+        self.assertEqual(received, [1, 2, 3, 4, 5])
+        data, lsn = self.log.records(3)
+        self.assertEqual(lsn, 5)
+        self.assertEqual([r[0] for r in ChangeLog.decode(data)[0]], [4, 5])
+        self.assertEqual(self.log.records(5), (b'', 5))
+
+    def test_reopen(self):
+        self.log.append(ChangeLog.NEW, 'a')
+        self.log.append(ChangeLog.DROP, 'a')
+        self.log.close()
+        self.log = ChangeLog(self.filename, 1024)
+        self.assertEqual(self.log.position, 2)
+        self.assertEqual(self.log.append(ChangeLog.NEW, 'a'), 3)
+
+    def test_rotation(self):
+        for i in range(100):
+            self.log.append(ChangeLog.SET, 'a', str(i), b'x' * 20)
+        self.assertTrue(os.path.exists(self.filename + '.1'))
+        self.assertTrue(self.log.available(100))
+        self.assertTrue(self.log.available(95))
+        self.assertFalse(self.log.available(0))  # Snapshot needed
+        self.assertFalse(self.log.available(101))  # Standby ahead
+
+
+class Test_StandbyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.saved = Configuration.standby_path
+        Configuration.standby_path = self.tmpdir.name
+        self.standby = Standby()
+
+    def tearDown(self):
+        Configuration.standby_path = self.saved
+        self.tmpdir.cleanup()
+
+    def test_apply(self):
+        dbfile = os.path.join(self.tmpdir.name, 'account')
+        dbm.open(dbfile, 'c').close()
+        self.standby.apply([(1, ChangeLog.SET, 'account', '1', b'one'),
+                            (2, ChangeLog.SET, 'account', '2', b'two'),
+                            (3, ChangeLog.DEL, 'account', '1', b''),
+                            (4, ChangeLog.DEL, 'account', '3', b'')])
+        with dbm.open(dbfile, 'r') as db:
+            self.assertEqual(dict(db), {b'2': b'two'})
+        self.assertEqual(self.standby.position, 4)
+        with open(os.path.join(self.tmpdir.name, 'replication.lsn')) as file:
+            self.assertEqual(file.read(), '4')
+
+    def test_listen(self):
+        socket = os.path.join(self.tmpdir.name, 'standby.sock')
+        umask = os.umask(0o022)
+        try:
+            server = self.standby.listen(socket)
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(socket).st_mode), 0o600)
+        self.assertEqual(os.umask(umask), umask)  # Umask restored
+        server.close()
+        self.standby.loop.run_until_complete(server.wait_closed())
+
+    def test_rename(self):
+        for name, content in (('account', b'old'), ('account_tmp', b'new')):
+            with open(os.path.join(self.tmpdir.name, name + '.db'), 'wb') \
+                    as file:
+                file.write(content)
+        self.standby.apply([(1, ChangeLog.RENAME, 'account_tmp', 'account',
+                             b''),
+                            (2, ChangeLog.RENAME, 'unknown', 'account', b'')])
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)),
+                         ['account.db', 'replication.lsn'])
+        with open(os.path.join(self.tmpdir.name, 'account.db'), 'rb') as file:
+            self.assertEqual(file.read(), b'new')
+
+
+@unittest.skipUnless(db_suffix(), 'no database module creating .db files')
+class Test_ReKeyReplicationTestCase(unittest.TestCase):
+
+    config1 = 'sect409k1;aes-256-cbc;sect409k1;aes-256-cbc;sect409k1;aes-256-cbc'
+    config2 = 'sect571r1;aes-128-cbc;sect571r1;aes-128-cbc;sect571r1;aes-128-cbc'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.primary = os.path.join(self.tmpdir.name, 'primary')
+        self.replica = os.path.join(self.tmpdir.name, 'replica')
+        os.mkdir(self.primary)
+        self.saved = Configuration.standby_path, DBHandler.changelog
+        Configuration.standby_path = self.replica
+        DBHandler.changelog = ChangeLog(
+            os.path.join(self.tmpdir.name, 'changes.log'), 1 << 20)
+        self.ms = b'this is the master secret for testing'
+
+    def tearDown(self):
+        DBHandler.changelog.close()
+        Configuration.standby_path, DBHandler.changelog = self.saved
+        self.tmpdir.cleanup()
+
+    def replicate(self):
+        standby = Standby()
+        standby.apply(ChangeLog.decode(DBHandler.changelog.records(0)[0])[0])
+        standby.loop.close()
+
+    def test_update_crypto(self):
+        DBHandler.new(self.primary, 'account')
+        dbH = DBHandler(self.primary, 'account')
+        dbH['config'] = self.config1
+        keyH = KeyHandlerCache.new_keyhandler(self.ms, self.config1)
+        sib = SecretInfoBlock(keyH, 2)
+        sib.set_many({'info1': b'login', 'info2': b'password'})
+        dbH.add_data(sib)
+        dbH['config_tmp'] = self.config2
+
+        client = ClientHandler.__new__(ClientHandler)
+        client.ms, client.dbH, client.keyH = self.ms, dbH, keyH
+        client.keycache = None
+        self.assertTrue(client.update_crypto())
+        self.assertEqual(client.dbH.filename, 'account')
+        self.assertEqual(client.dbH['config'], self.config2)
+
+        self.replicate()
+        self.assertEqual(sorted(os.listdir(self.replica)),
+                         ['account.db', 'replication.lsn'])
+        replica = DBHandler(self.replica, 'account')
+        self.assertEqual(replica['config'], self.config2)
+        sib = replica['1']
+        sib.keyH = KeyHandlerCache.new_keyhandler(self.ms, self.config2)
+        self.assertEqual(sib.decrypt_all(), [b'login', b'password'])
+
+    def test_update_crypto_failure(self):
+        DBHandler.new(self.primary, 'account')
+        dbH = DBHandler(self.primary, 'account')
+        dbH['config'] = self.config1
+        dbH['config_tmp'] = 'unknown;aes-128-cbc;unknown;aes-128-cbc;unknown;aes-128-cbc'
+
+        client = ClientHandler.__new__(ClientHandler)
+        client.ms, client.dbH = self.ms, dbH
+        client.keyH = KeyHandlerCache.new_keyhandler(self.ms, self.config1)
+        client.keycache = None
+        self.assertFalse(client.update_crypto())
+
+        self.replicate()
+        self.assertEqual(sorted(os.listdir(self.replica)),
+                         ['account.db', 'replication.lsn'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015-2017, Thierry Lemeunier <thierry at lemeunier dot net>
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this 
+# list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import asyncio
+
+from mnemopwd.server.util.TimerWheel import TimerWheel
+
+
+class Entry:
+    def __init__(self, deadline, busy=0):
+        self.deadline = deadline
+        self.busy = busy
+        self.expired = False
+
+    def expire(self):
+        if self.busy > 0:
+            self.busy -= 1
+            return False
+        self.expired = True
+        return True
+
+
+class Test_TimerWheelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.wheel = TimerWheel(self.loop, tick=0.01, size=8)
+
+    def tearDown(self):
+        self.wheel.stop()
+        self.loop.close()
+
+    def run_for(self, duration):
+        self.wheel.start()
+        self.loop.run_until_complete(asyncio.sleep(duration))
+
+    def test_expire(self):
+        now = self.loop.time()
+        early = Entry(now + 0.02)
+        late = Entry(now + 0.5)  # Further than a wheel turn
+        self.wheel.add(early)
+        self.wheel.add(late)
+        self.run_for(0.1)
+        self.assertTrue(early.expired)
+        self.assertFalse(late.expired)
+        self.assertEqual(len(self.wheel), 1)
+        self.run_for(0.5)
+        self.assertTrue(late.expired)
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_postpone(self):
+        entry = Entry(self.loop.time() + 0.02)
+        self.wheel.add(entry)
+        entry.deadline += 0.2
+        self.run_for(0.1)
+        self.assertFalse(entry.expired)
+        self.run_for(0.2)
+        self.assertTrue(entry.expired)
+
+    def test_busy(self):
+        entry = Entry(self.loop.time() + 0.01, busy=3)
+        self.wheel.add(entry)
+        self.run_for(0.2)
+        self.assertTrue(entry.expired)
+        self.assertEqual(entry.busy, 0)
+
+    def test_no_deadline(self):
+        entry = Entry(float('inf'))  # Timeout set to 0
+        self.wheel.add(entry)
+        self.run_for(0.2)
+        self.assertFalse(entry.expired)
+        self.assertEqual(len(self.wheel), 1)
+        entry.deadline = self.loop.time()  # Deadline given later
+        self.run_for(0.2)
+        self.assertTrue(entry.expired)
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_remove(self):
+        entry = Entry(self.loop.time() + 0.01)
+        self.wheel.add(entry)
+        self.wheel.remove(entry)
+        self.run_for(0.05)
+        self.assertFalse(entry.expired)
+        self.assertEqual(len(self.wheel), 0)
+
+if __name__ == '__main__':
+    unittest.main()
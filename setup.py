@@ -61,7 +61,8 @@ setup(
     entry_points={
         'console_scripts': [
             'mnemopwds = mnemopwd.serverctl:main',
-            'mnemopwdc = mnemopwd.clientctl:main'
+            'mnemopwdc = mnemopwd.clientctl:main',
+            'mnemopwd-bench = mnemopwd.benchctl:main'
         ],
     },
     author="Thierry Lemeunier",